@@ -26,6 +26,10 @@ def check_rnx(
     epoch_end,
     sites_list=[],
     output_dir=None,
+    workers=1,
+    stats_cache=True,
+    fast=True,
+    store_dir=None,
 ):
     """
     Checks the presence of RINEX files in the input directory over a specified time range,
@@ -45,6 +49,23 @@ def check_rnx(
         A list of site identifiers to filter the check.
     output_dir : str, optional
         The output directory.
+    workers : int, optional
+        The number of processes parsing the RINEX files. Default is 1.
+        If more than 1, the calling script needs a ``if __name__ == "__main__":`` guard.
+    stats_cache : bool or str, optional
+        The RINEX statistics cache, so that a re-check only parses
+        the new or modified files (see ``CheckGnss.analyze_rnxs``).
+        True for the default cache, a path for a custom one, False for no cache.
+        Default is True.
+    fast : bool, optional
+        If True, the RINEX files are read with the fast scanner of their
+        epoch lines, if False, they are fully loaded with rinexMod.
+        Default is True.
+    store_dir : str, optional
+        The directory of a check results store (see ``CheckStore``):
+        the results are merged in its site/year partitions, and the summaries
+        and plots are regenerated only for the changed partitions.
+        Default is None (no store).
 
     Returns
     -------
@@ -68,15 +89,17 @@ def check_rnx(
 
     chk_tab_stk = []
     chk_tab_stats_stk = []
+    chk_tab_store_stk = []
     for site in sites_use:
         chk = arochk.CheckGnss(
             inp_dir=str(inp_dir),
             site={"site_id": site},
             epoch_range=eporng
         )
-        chk.check()
+        chk.check(workers=workers, stats_cache=stats_cache, fast=fast)
         chk_tab_stk.append(chk.table)
         chk_tab_stats_stk.append(chk.table_stats)
+        chk_tab_store_stk.append(chk.get_table_store())
 
     df_chk_table_cat = pd.concat(chk_tab_stk)
     df_chk_full_stats = pd.concat(chk_tab_stats_stk)
@@ -87,6 +110,11 @@ def check_rnx(
 
     logger.info("Check: \n" + tabu_chk_col)
 
+    if store_dir:
+        store = arochk.CheckStore(store_dir)
+        store.update(pd.concat(chk_tab_store_stk))
+        store.render()
+
     if output_dir:
         checkrnx_output(
             output_dir,
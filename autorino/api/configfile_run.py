@@ -8,6 +8,7 @@ Created on 18/09/2024 18:23:30
 
 import glob
 import os
+import time
 import autorino.cfgfiles as arocfg
 import autorino.common as arocmn
 
@@ -30,6 +31,9 @@ def cfgfile_run(
     steps_list=None,
     exclude_steps=False,
     force=False,
+    metrics_textfile=None,
+    metrics_port=None,
+    metrics_addr=None,
 ):
     """
     Run the Autorino configuration files.
@@ -79,6 +83,19 @@ def cfgfile_run(
         If True, the steps will be executed even if the output files already exist.
         overrides the 'force' parameters in the configuration file.
         Default is False.
+    metrics_textfile : str, optional
+        The Prometheus/OpenMetrics metrics file of the steps
+        (e.g. in the node_exporter's textfile collector directory).
+        Overrides the 'metrics_textfile' value of the environment file.
+        Default is None.
+    metrics_port : int, optional
+        The port of the local HTTP endpoint of the metrics.
+        Overrides the 'metrics_http_port' value of the environment file.
+        Default is None.
+    metrics_addr : str, optional
+        The address of the local HTTP endpoint of the metrics.
+        Overrides the 'metrics_http_addr' value of the environment file.
+        Default is None.
 
     Raises
     ------
@@ -92,6 +109,11 @@ def cfgfile_run(
         If no steps were executed, returns 0.
     """
 
+    # Enable the metrics (the steps feed them), if asked
+    arocmn.get_metrics(
+        textfile=metrics_textfile, http_port=metrics_port, http_addr=metrics_addr
+    )
+
     # Check if cfg_in is a directory or a file and get the list of configuration files
     if os.path.isdir(cfg_in):
         cfg_use_lis = []
@@ -159,3 +181,38 @@ def cfgfile_run(
     )
 
     return exit_code_max
+
+
+def cfgfile_run_daemon(run_interval, **kwargs):
+    """
+    Run the Autorino configuration files periodically (daemon mode).
+
+    The configuration files are run every `run_interval` seconds
+    (see ``cfgfile_run``), in the same process: the local HTTP endpoint
+    of the metrics, if any, stays up between the runs.
+    A run longer than `run_interval` is followed immediately by the next one.
+
+    Parameters
+    ----------
+    run_interval : float
+        The interval in seconds between the starts of two runs.
+    **kwargs
+        The parameters of ``cfgfile_run``.
+
+    Returns
+    -------
+    None
+        Runs until interrupted.
+    """
+    while True:
+        t_srt = time.time()
+        try:
+            exit_code = cfgfile_run(**kwargs)
+            logger.info("daemon run done, exit code: %s", exit_code)
+        except Exception as e:
+            # a failed run must not stop the daemon
+            logger.exception("daemon run failed: %s", e)
+
+        t_wait = max(0.0, run_interval - (time.time() - t_srt))
+        logger.info("next daemon run in %.0f s", t_wait)
+        time.sleep(t_wait)
@@ -14,7 +14,9 @@ def main():
             "  * run the config file site_cfg.yml from the 1st January 2025 for a range of 10 days:\n"
             "    autorino_cfgfile_run -c site_cfg.yml -s 2025-01-01 -e '10 days ago'\n"
             "  * run download and convert steps only for HOUZ00GLP & BORG00REU sites only:\n"
-            "    autorino_cfgfile_run -c cfgfiles_dir -si HOUZ00GLP BORG00REU -sp download convert"
+            "    autorino_cfgfile_run -c cfgfiles_dir -si HOUZ00GLP BORG00REU -sp download convert\n"
+            "  * run all the config files every hour, with the metrics served on port 9101:\n"
+            "    autorino_cfgfile_run -c cfgfiles_dir -d 3600 -mp 9101"
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
@@ -117,6 +119,44 @@ def main():
         "Overrides the 'force' parameters in the configuration file. "
         "Default is False.",
     )
+    parser.add_argument(
+        "-mt",
+        "--metrics_textfile",
+        type=str,
+        help="The Prometheus/OpenMetrics metrics file of the steps "
+        "(e.g. in the node_exporter's textfile collector directory, *.prom). "
+        "Overrides the 'metrics_textfile' value of the environment file. "
+        "Default is None.",
+        default=None,
+    )
+    parser.add_argument(
+        "-mp",
+        "--metrics_port",
+        type=int,
+        help="The port of the local HTTP endpoint of the metrics (/metrics). "
+        "Overrides the 'metrics_http_port' value of the environment file. "
+        "Default is None.",
+        default=None,
+    )
+    parser.add_argument(
+        "-ma",
+        "--metrics_addr",
+        type=str,
+        help="The address of the local HTTP endpoint of the metrics "
+        "('0.0.0.0' for all the interfaces). "
+        "Overrides the 'metrics_http_addr' value of the environment file. "
+        "Default is None.",
+        default=None,
+    )
+    parser.add_argument(
+        "-d",
+        "--daemon",
+        type=float,
+        help="Daemon mode: the configuration files are run every DAEMON seconds, "
+        "in the same process (the metrics endpoint stays up). "
+        "Default is None (a single run).",
+        default=None,
+    )
 
     args = parser.parse_args()
 
@@ -130,8 +170,12 @@ def main():
     steps_list = args.steps_list
     exclude_steps = args.exclude_steps
     force = args.force
+    metrics_textfile = args.metrics_textfile
+    metrics_port = args.metrics_port
+    metrics_addr = args.metrics_addr
+    daemon = args.daemon
 
-    exit_code = aroapi.cfgfile_run(
+    run_kwargs = dict(
         cfg_in=config,
         incl_cfg_in=include_config,
         sites_list=sites_list,
@@ -142,8 +186,17 @@ def main():
         steps_list=steps_list,
         exclude_steps=exclude_steps,
         force=force,
+        metrics_textfile=metrics_textfile,
+        metrics_port=metrics_port,
+        metrics_addr=metrics_addr,
     )
 
+    if daemon:
+        # runs until interrupted
+        aroapi.cfgfile_run_daemon(daemon, **run_kwargs)
+
+    exit_code = aroapi.cfgfile_run(**run_kwargs)
+
     sys.exit(exit_code)
 
 
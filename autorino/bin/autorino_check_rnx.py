@@ -53,9 +53,44 @@ def main():
         help="List of specific sites to check. If not provided, all sites will be processed. (optional)",
         default=[],
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of processes parsing the RINEX files. (optional)",
+        default=1,
+    )
+    parser.add_argument(
+        "-c",
+        "--stats_cache",
+        help="Path to the RINEX statistics cache database, "
+        "'none' to disable it. Default is the cache defined in the environment file. (optional)",
+        default=None,
+    )
+    parser.add_argument(
+        "-f",
+        "--full_load",
+        action="store_true",
+        help="Fully load the RINEX files with rinexMod, instead of the fast scan "
+        "of their epoch lines. (optional)",
+    )
+    parser.add_argument(
+        "-s",
+        "--store_dir",
+        help="Path to the check results store, partitioned by site and year: "
+        "only the summaries and plots of the changed partitions are regenerated. (optional)",
+        default=None,
+    )
 
     args = parser.parse_args()
 
+    if args.stats_cache is None:
+        stats_cache = True
+    elif args.stats_cache.lower() == "none":
+        stats_cache = False
+    else:
+        stats_cache = args.stats_cache
+
     # Call the check_rnx function
     _ = check_rnx(
         inp_dir_parent=args.input_dir_parent,
@@ -64,6 +99,10 @@ def main():
         epoch_end=args.epoch_end,
         sites_list=args.sites_list,
         output_dir=args.output,
+        workers=args.workers,
+        stats_cache=stats_cache,
+        fast=not args.full_load,
+        store_dir=args.store_dir,
     )
 
 if __name__ == "__main__":
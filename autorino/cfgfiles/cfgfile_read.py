@@ -19,6 +19,8 @@ import autorino.convert as arocnv
 import autorino.download as arodwl
 import autorino.handle as arohdl
 
+from geodezyx import utils
+
 #### new rinexmod v4 import
 import rinexmod.api as rimo_api
 import rinexmod.classes as rimo_cls
@@ -341,6 +343,8 @@ def run_steps(
     only the steps in the list will be executed.
     If the 'verbose' flag is set to True,
     the tables will be printed during the execution of the steps.
+    The run report and the metrics of a step are written
+    even if the step fails (exit code 8).
 
     Parameters
     ----------
@@ -413,32 +417,51 @@ def run_steps(
             stp.options["force"] = True
 
         load_table_msg_str = BOLD_SRT + ">>>>>>>> Load table for step %s" + BOLD_END
-        # Execute the step based on its type
-        if stp.get_step_type() == "download":
-            stp.download(**stp.options)
-        elif stp.get_step_type() == "convert":
-            logger.info(load_table_msg_str, stp.get_step_type())
-            stp.load_tab_inpdir()
-            stp.convert(**stp.options)
-        elif stp.get_step_type() == "splice":
-            stp_rnx_inp = stp.copy()
-            logger.info(load_table_msg_str, stp.get_step_type())
-            stp_rnx_inp.load_tab_inpdir(update_epochs=True)
-            stp.splice(input_mode="given", input_rinexs=stp_rnx_inp, **stp.options)
-        elif stp.get_step_type() == "split":
-            stp_rnx_inp = stp.copy()
-            logger.info(load_table_msg_str, stp.get_step_type())
-            stp_rnx_inp.load_tab_inpdir(update_epochs=True)
-            stp.split(input_mode="given", input_rinexs=stp_rnx_inp, **stp.options)
-        elif stp.get_step_type() in ("modify", "rinexmod"):
-            if stp.get_step_type()  == "rinexmod":
-                warnmsg = "step 'rinexmod' is deprecated, use 'modify' instead"
-                logger.warning(warnmsg)
-                DeprecationWarning(warnmsg)
-            stp.load_tab_inpdir(update_epochs=True)
-            stp.modify(**stp.options)
-
-        ##### close the step
+        prof_prefix = os.path.join(
+            stp.tmp_dir_tables if stp.tmp_dir_tables else stp.tmp_dir,
+            "_".join((utils.get_timestamp(), stp.site_id, stp.get_step_type(), "profile")),
+        )
+        # the whole step is timed, and profiled if asked in the environment file
+        try:
+            with arocmn.step_profiler(prof_prefix), stp.timer.stage("total"):
+                # Execute the step based on its type
+                if stp.get_step_type() == "download":
+                    stp.download(**stp.options)
+                elif stp.get_step_type() == "convert":
+                    logger.info(load_table_msg_str, stp.get_step_type())
+                    stp.load_tab_inpdir()
+                    stp.convert(**stp.options)
+                elif stp.get_step_type() == "splice":
+                    stp_rnx_inp = stp.copy()
+                    logger.info(load_table_msg_str, stp.get_step_type())
+                    stp_rnx_inp.load_tab_inpdir(update_epochs=True)
+                    stp.splice(input_mode="given", input_rinexs=stp_rnx_inp, **stp.options)
+                elif stp.get_step_type() == "split":
+                    stp_rnx_inp = stp.copy()
+                    logger.info(load_table_msg_str, stp.get_step_type())
+                    stp_rnx_inp.load_tab_inpdir(update_epochs=True)
+                    stp.split(input_mode="given", input_rinexs=stp_rnx_inp, **stp.options)
+                elif stp.get_step_type() in ("modify", "rinexmod"):
+                    if stp.get_step_type()  == "rinexmod":
+                        warnmsg = "step 'rinexmod' is deprecated, use 'modify' instead"
+                        logger.warning(warnmsg)
+                        DeprecationWarning(warnmsg)
+                    stp.load_tab_inpdir(update_epochs=True)
+                    stp.modify(**stp.options)
+        except BaseException:
+            # the step crashed (or was interrupted)
+            stp.exit_code = 8
+            raise
+        finally:
+            ##### close the step, the run report and the metrics
+            # are written even if it failed
+            for close_fct in (stp.write_run_report, stp.write_metrics):
+                try:
+                    close_fct()
+                except Exception as e:
+                    logger.error(
+                        "unable to close the step %s (%s): %s", stp, close_fct.__name__, e
+                    )
 
     return None
 
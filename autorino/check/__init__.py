@@ -4,4 +4,7 @@
 #from .check_old import *
 from .check_cls import *
 from .check_fcts import *
+from .chkstats_cls import *
+from .chkstore_cls import *
+from .rnxscan_fcts import *
 from .trimble_filelist_html import *
\ No newline at end of file
@@ -5,14 +5,27 @@ Created on 27/01/2025 09:35:53
 
 @author: psakic
 """
+import concurrent.futures
+import functools
+import os
+import sqlite3
+import tempfile
+
 import pandas as pd
 import numpy as np
 
+import autorino.common as arocmn
 import autorino.handle as arohdl
 import autorino.check as arochk
-import rinexmod.classes as rimo_cls
 import tqdm
 
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
 
 class CheckGnss(arohdl.HandleGnss):
     def __init__(
@@ -45,10 +58,39 @@ class CheckGnss(arohdl.HandleGnss):
         self.table_stats = pd.DataFrame()
 
 
-    def analyze_rnxs(self):
+    def analyze_rnxs(self, workers=1, stats_cache=True, fast=True):
         """
         this function do the basic analysis of the table of RINEXs
 
+        The statistics of the RINEX files (see ``rnx_file_stats``)
+        are computed in a pool of processes, and are stored in a persistent
+        cache (see ``RnxStatsCache``): a re-check only parses the new
+        or modified files.
+
+        Parameters
+        ----------
+        workers : int, optional
+            The number of processes parsing the RINEX files.
+            With more than one process, a calling script must protect
+            its code with ``if __name__ == "__main__":``.
+            Default is 1 (sequential).
+        stats_cache : bool or str or RnxStatsCache, optional
+            The statistics cache.
+            True to use the cache defined by ``check_stats_cache``
+            in the 'general' section of the environment file,
+            a path for a custom cache database, False for no cache.
+            Default is True.
+        fast : bool, optional
+            If True, the RINEX files are read with the fast scanner
+            of their epoch lines (see ``rnx_scan_epochs``),
+            if False, they are fully loaded with rinexMod.
+            Default is True.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The statistics table.
+
         Note
         ----
         Flags meaning
@@ -60,36 +102,74 @@ class CheckGnss(arohdl.HandleGnss):
 
         self.table_stats = pd.DataFrame()
 
+        ### the files to analyze
+        irows_ok = [irow for irow in self.table.index if self.mono_ok_check(int(irow), 'check')]
+        fpaths_ok = list(dict.fromkeys(self.table.loc[irows_ok, "fpath_inp"]))
+
+        ### the statistics already in the cache
+        cache = self.get_stats_cache(stats_cache)
+        if cache:
+            stats_dic = cache.get(fpaths_ok, method="fast" if fast else "full")
+        else:
+            stats_dic = dict()
+        fpaths_new = [f for f in fpaths_ok if f not in stats_dic]
+
+        logger.debug(
+            "%i RINEX files to analyze, %i found in the statistics cache",
+            len(fpaths_new),
+            len(fpaths_ok) - len(fpaths_new),
+        )
+
+        ### the statistics of the new (or modified) files
+        desc = "Analyzing RINEX files for " + self.site_id
+        stats_fct = functools.partial(arochk.rnx_file_stats, fast=fast)
+        if workers and workers > 1 and len(fpaths_new) > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=arocmn.process_pool_context()
+            ) as executor:
+                chunksize = max(1, len(fpaths_new) // (4 * workers))
+                stats_new = list(
+                    tqdm.tqdm(
+                        executor.map(stats_fct, fpaths_new, chunksize=chunksize),
+                        total=len(fpaths_new),
+                        desc=desc,
+                    )
+                )
+        else:
+            stats_new = [
+                stats_fct(f) for f in tqdm.tqdm(fpaths_new, desc=desc)
+            ]
+
+        stats_new_dic = dict(zip(fpaths_new, stats_new))
+        if cache:
+            cache.put(stats_new_dic)
+        stats_dic.update(stats_new_dic)
+
+        irows_ok_set = set(irows_ok)
+
         ds_stk = []
 
-        for irow, row in tqdm.tqdm(self.table.iterrows(), total=len(self.table),
-                                   desc="Analyzing RINEX files for " + self.site_id):
+        for irow, row in self.table.iterrows():
 
             ds = dict()
             ds["fpath"] = self.table.loc[irow, "fpath_inp"]
             ds["site"] = self.table.loc[irow, "site"]
 
-            if not self.mono_ok_check(int(irow), 'check'):
+            stats = stats_dic.get(ds["fpath"]) if irow in irows_ok_set else None
+            if not stats:
                 ds["%"] = 0
             else:
-                ### get RINEX as an rinexMod's Object
-                rnxobj = rimo_cls.RinexFile(ds["fpath"])
-                ### get RINEX site code
-                ds["site"] = rnxobj.get_site(lower_case=False, only_4char=False)
+                ds["site"] = stats["site"]
 
                 ### theoretical epochs
                 ds["epoch_srt"] = self.table.loc[irow, "epoch_srt"]
                 ds["epoch_end"] = self.table.loc[irow, "epoch_end"]
 
-                ### get RINEX start/end in the data
-                ds["epoch_srt_data"] = pd.to_datetime(rnxobj.start_date, format='%H:%M:%S')
-                ds["epoch_end_data"] = pd.to_datetime(rnxobj.end_date, format='%H:%M:%S')
-                ### get RINEX nominal interval
-                ds["itrvl"] = rnxobj.sample_rate_numeric
-                ### get RINEX number of epochs
-                ds["nepochs"] = len(rnxobj.get_dates_all())
+                ### RINEX start/end in the data, nominal interval, number of epochs
+                for k in ("epoch_srt_data", "epoch_end_data", "itrvl", "nepochs"):
+                    ds[k] = stats[k]
                 ### get completness
-                ds["td_str"] = rnxobj.get_file_period_from_filename()[0]
+                ds["td_str"] = stats["td_str"]
 
                 # improve with right fct !!!!
                 if ds["td_str"] == "01H":
@@ -109,12 +189,63 @@ class CheckGnss(arohdl.HandleGnss):
 
         return dfts
 
-
-    def check(self):
+    def get_stats_cache(self, stats_cache=True):
+        """
+        Returns the statistics cache used by ``analyze_rnxs``.
+
+        Parameters
+        ----------
+        stats_cache : bool or str or RnxStatsCache, optional
+            True to use the cache defined by ``check_stats_cache``
+            in the 'general' section of the environment file
+            (empty: a database in the system's tmp directory),
+            a path for a custom cache database, False for no cache.
+            Default is True.
+
+        Returns
+        -------
+        RnxStatsCache or None
+            The statistics cache, None if disabled.
+        """
+        if not stats_cache:
+            return None
+        elif isinstance(stats_cache, arochk.RnxStatsCache):
+            return stats_cache
+        elif stats_cache is True:
+            db_path = aroenv.ARO_ENV_DIC["general"].get("check_stats_cache")
+            if not db_path:
+                db_path = os.path.join(
+                    tempfile.gettempdir(),
+                    "autorino_check_stats_{}.sqlite".format(os.getuid()),
+                )
+        else:
+            db_path = stats_cache
+
+        try:
+            return arochk.RnxStatsCache(self.translate_path(str(db_path)))
+        except sqlite3.Error as e:
+            logger.warning("unable to use the statistics cache %s: %s", db_path, e)
+            return None
+
+    def check(self, workers=1, stats_cache=True, fast=True):
         self.guess_local_rnx(io="inp")
         self.check_local_files(io="inp")
         self.print_table()
-        self.analyze_rnxs()
+        self.analyze_rnxs(workers=workers, stats_cache=stats_cache, fast=fast)
         self.table["%"] = self.table_stats["%"]
 
-
+    def get_table_store(self):
+        """
+        Returns the check results to be stored in a ``CheckStore``:
+        the epochs and the site of the table, with the statistics
+        of ``analyze_rnxs`` (one row per expected RINEX file).
+
+        Returns
+        -------
+        pandas.DataFrame
+            The check results.
+        """
+        df_store = self.table_stats.copy().reset_index(drop=True)
+        for col in ("site", "epoch_srt", "epoch_end"):
+            df_store[col] = self.table[col].values
+        return df_store
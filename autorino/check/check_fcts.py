@@ -11,6 +11,86 @@ import pandas as pd
 import tabulate
 import os
 
+import rinexmod.classes as rimo_cls
+
+import autorino.check as arochk
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+
+def rnx_file_stats(fpath, fast=True):
+    """
+    This function computes the basic statistics of a RINEX file.
+
+    It is designed to be run in a pool of processes
+    (see ``CheckGnss.analyze_rnxs``).
+
+    Parameters
+    ----------
+    fpath : str
+        The path of the RINEX file.
+    fast : bool, optional
+        If True, the file is read with the fast scanner of the epoch lines
+        (see ``rnx_scan_epochs``), and with rinexMod's ``RinexFile``
+        only if the scan fails.
+        If False, the file is fully loaded with ``RinexFile``.
+        Both give the same statistics.
+        Default is True.
+
+    Returns
+    -------
+    dict or None
+        The statistics: site, epoch_srt_data, epoch_end_data,
+        itrvl (nominal interval), nepochs (number of epochs)
+        td_str (nominal period from the filename)
+        and method (the one used, 'fast' or 'full').
+        None if the file can not be read.
+    """
+    if fast:
+        try:
+            scan = arochk.rnx_scan_epochs(fpath)
+            ds = dict()
+            ds["site"] = arochk.rnx_site_from_filename(fpath, scan["marker"])
+            ds["epoch_srt_data"] = pd.to_datetime(scan["epoch_srt"])
+            ds["epoch_end_data"] = pd.to_datetime(scan["epoch_end"])
+            ds["itrvl"] = scan["itrvl"]
+            ds["nepochs"] = scan["nepochs"]
+            ds["td_str"] = arochk.rnx_period_from_filename(fpath)
+            ds["method"] = "fast"
+            return ds
+        except Exception as e:
+            logger.warning(
+                "fast scan of %s failed, full load with RinexFile: %s", fpath, e
+            )
+
+    try:
+        ### get RINEX as an rinexMod's Object
+        rnxobj = rimo_cls.RinexFile(fpath)
+
+        ds = dict()
+        ### get RINEX site code
+        ds["site"] = rnxobj.get_site(lower_case=False, only_4char=False)
+        ### get RINEX start/end in the data
+        ds["epoch_srt_data"] = pd.to_datetime(rnxobj.start_date, format="%H:%M:%S")
+        ds["epoch_end_data"] = pd.to_datetime(rnxobj.end_date, format="%H:%M:%S")
+        ### get RINEX nominal interval
+        ds["itrvl"] = rnxobj.sample_rate_numeric
+        ### get RINEX number of epochs
+        ds["nepochs"] = len(rnxobj.get_dates_all())
+        ### get nominal period
+        ds["td_str"] = rnxobj.get_file_period_from_filename()[0]
+        ds["method"] = "full"
+    except Exception as e:
+        logger.error("unable to analyze %s: %s", fpath, e)
+        return None
+
+    return ds
+
 
 def color(val):
     """
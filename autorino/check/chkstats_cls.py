@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:31:08 2026
+
+@author: psakic
+
+This module, chkstats_cls.py, provides a class for a persistent cache
+of the RINEX files statistics computed by CheckGnss, stored in a SQLite database.
+"""
+
+import os
+import time
+
+import pandas as pd
+
+import autorino.common as arocmn
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+
+class RnxStatsCache:
+    """
+    A class used to represent a persistent cache of RINEX files statistics.
+
+    The statistics of a RINEX file (site, data start/end, interval,
+    number of epochs, nominal period) are stored with its path, size and
+    modification time: a re-check only parses the new or modified files.
+    They are also stored with the method which computed them
+    ('fast' scan or 'full' load, see ``rnx_file_stats``), a full load
+    does not get the statistics of a fast scan.
+
+    No connection is kept open: the object only stores the database path
+    and can thus be copied or sent to other processes.
+
+    Attributes
+    ----------
+    db_path : str
+        The path of the SQLite database file.
+    """
+
+    # the statistics stored in the cache, and their SQLite type
+    COLS = {
+        "site": "TEXT",
+        "epoch_srt_data": "TEXT",
+        "epoch_end_data": "TEXT",
+        "itrvl": "REAL",
+        "nepochs": "INTEGER",
+        "td_str": "TEXT",
+    }
+    # the statistics stored as ISO timestamps
+    COLS_EPOCH = ["epoch_srt_data", "epoch_end_data"]
+    # the methods computing the statistics, from the least to the most exact
+    METHODS = ["fast", "full"]
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._create_db()
+
+    def __repr__(self):
+        return "RnxStatsCache: {}".format(self.db_path)
+
+    def _connect(self):
+        # rollback journal per default, WAL if enabled (see sqlite_connect)
+        return arocmn.sqlite_connect(self.db_path)
+
+    def _create_db(self):
+        cols_def = ", ".join(c + " " + t for c, t in self.COLS.items())
+        conn = self._connect()
+        try:
+            with conn:
+                cols_old = [r[1] for r in conn.execute("PRAGMA table_info(stats)")]
+                if cols_old and "method" not in cols_old:
+                    # cache of a former version, without the methods: rebuilt
+                    logger.info("outdated statistics cache, rebuilt: %s", self.db_path)
+                    conn.execute("DROP TABLE stats")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS stats ("
+                    "fpath TEXT, method TEXT, size INTEGER, mtime_ns INTEGER, "
+                    + cols_def
+                    + ", updated REAL, PRIMARY KEY (fpath, method))"
+                )
+        finally:
+            conn.close()
+
+    @staticmethod
+    def file_sign(fpath):
+        """
+        Returns the signature of a file: its size and modification time.
+
+        Parameters
+        ----------
+        fpath : str
+            The file path.
+
+        Returns
+        -------
+        tuple or None
+            (size, mtime_ns), None if the file does not exist.
+        """
+        try:
+            st = os.stat(fpath)
+        except (OSError, TypeError):
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, fpaths, method="fast", chunk_size=500):
+        """
+        Gets the cached statistics of RINEX files.
+        Only the files whose size and modification time are unchanged are returned.
+
+        Parameters
+        ----------
+        fpaths : iterable of str
+            The RINEX files.
+        method : str, optional
+            The method of the wanted statistics: 'fast' gets the ones of
+            a fast scan or of a full load (preferred), 'full' gets only
+            the ones of a full load. Default is 'fast'.
+        chunk_size : int, optional
+            The number of paths per SQL query. Default is 500.
+
+        Returns
+        -------
+        dict
+            The statistics (as dict) of the cached files, with their path as key.
+        """
+        fpaths = list(dict.fromkeys(str(f) for f in fpaths if isinstance(f, str)))
+        methods = self.METHODS[self.METHODS.index(method) :]
+        cols = ["fpath", "method", "size", "mtime_ns"] + list(self.COLS)
+
+        recs = []
+        conn = self._connect()
+        try:
+            for i in range(0, len(fpaths), chunk_size):
+                chunk = fpaths[i : i + chunk_size]
+                sql = (
+                    "SELECT "
+                    + ", ".join(cols)
+                    + " FROM stats WHERE fpath IN ("
+                    + ", ".join(["?"] * len(chunk))
+                    + ") AND method IN ("
+                    + ", ".join(["?"] * len(methods))
+                    + ")"
+                )
+                recs.extend(conn.execute(sql, chunk + methods).fetchall())
+        finally:
+            conn.close()
+
+        # the most exact method last, it overrides the other ones
+        recs.sort(key=lambda rec: methods.index(rec[1]))
+
+        stats_dic = dict()
+        for rec in recs:
+            rec_dic = dict(zip(cols, rec))
+            fpath = rec_dic.pop("fpath")
+            sign = (rec_dic.pop("size"), rec_dic.pop("mtime_ns"))
+            if sign != self.file_sign(fpath):
+                # modified file, parsed again
+                continue
+            for c in self.COLS_EPOCH:
+                rec_dic[c] = pd.to_datetime(rec_dic[c])
+            stats_dic[fpath] = rec_dic
+
+        return stats_dic
+
+    def put(self, stats_dic):
+        """
+        Stores the statistics of RINEX files.
+
+        Parameters
+        ----------
+        stats_dic : dict
+            The statistics (as dict, with the keys of COLS and the method,
+            see ``rnx_file_stats``) with the file path as key.
+
+        Returns
+        -------
+        None
+        """
+        now = time.time()
+        recs = []
+        for fpath, stats in stats_dic.items():
+            sign = self.file_sign(fpath)
+            if not sign or not stats or stats.get("method") not in self.METHODS:
+                continue
+            vals = []
+            for c, typ in self.COLS.items():
+                val = stats.get(c)
+                if val is None or pd.isna(val):
+                    val = None
+                elif c in self.COLS_EPOCH:
+                    val = pd.Timestamp(val).isoformat()
+                elif typ == "REAL":
+                    val = float(val)
+                elif typ == "INTEGER":
+                    val = int(val)
+                else:
+                    val = str(val)
+                vals.append(val)
+            recs.append([str(fpath), stats["method"], sign[0], sign[1]] + vals + [now])
+
+        if not recs:
+            return None
+
+        cols_all = ["fpath", "method", "size", "mtime_ns"] + list(self.COLS) + ["updated"]
+        sql = (
+            "INSERT OR REPLACE INTO stats ("
+            + ", ".join(cols_all)
+            + ") VALUES ("
+            + ", ".join(["?"] * len(cols_all))
+            + ")"
+        )
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(sql, recs)
+        finally:
+            conn.close()
+
+        return None
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:05:37 2026
+
+@author: psakic
+
+This module, chkstore_cls.py, provides a class for a store of the
+check results, partitioned by site and year, and for the incremental
+regeneration of their summaries and plots.
+"""
+
+import json
+import os
+import time
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import autorino.check as arochk
+from geodezyx import utils
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+
+class CheckStore:
+    """
+    A class used to represent a store of the check results.
+
+    The check results (one row per expected RINEX file, see ``CheckGnss.check``)
+    are stored in a columnar table partitioned by site and year::
+
+        <store_dir>/stats/site=<SITE>/year=<YYYY>/stats.parquet
+
+    A new check is merged into its partitions: the rows of the same
+    epochs are replaced, the other ones are kept.
+    A partition is rewritten, and flagged as changed, only if its content
+    actually changed (e.g. a new or completed RINEX file).
+
+    The summaries (CSV, tabulated text and plots) are then regenerated
+    only for the changed partitions (``<store_dir>/reports/<SITE>/<YYYY>``),
+    and the network summaries only for the years of the changed
+    partitions (``<store_dir>/reports/network/<YYYY>``).
+    The partitions' state is kept in ``<store_dir>/manifest.json``.
+
+    The 'parquet' format requires pyarrow, the partitions are written
+    as CSV otherwise.
+
+    Attributes
+    ----------
+    store_dir : str
+        The directory of the store.
+    fmt : str
+        The format of the partitions, 'parquet' or 'csv'.
+    """
+
+    # the stored columns, and their type
+    COLS = {
+        "site": "str",
+        "epoch_srt": "datetime",
+        "epoch_end": "datetime",
+        "fpath": "str",
+        "epoch_srt_data": "datetime",
+        "epoch_end_data": "datetime",
+        "itrvl": "float",
+        "nepochs": "float",
+        "td_str": "str",
+        "%": "float",
+    }
+
+    def __init__(self, store_dir, fmt="parquet"):
+        self.store_dir = os.path.abspath(str(store_dir))
+        self.fmt = fmt
+
+        if self.fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                logger.warning("pyarrow not installed, check store written as CSV")
+                self.fmt = "csv"
+
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def __repr__(self):
+        return "CheckStore: {} ({})".format(self.store_dir, self.fmt)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.store_dir, "manifest.json")
+
+    def _partition_path(self, site, year):
+        return os.path.join(
+            self.store_dir,
+            "stats",
+            "site=" + str(site),
+            "year=" + str(year),
+            "stats." + self.fmt,
+        )
+
+    def _report_dir(self, site, year):
+        return os.path.join(self.store_dir, "reports", str(site), str(year))
+
+    @staticmethod
+    def _part_key(site, year):
+        return "{}/{}".format(site, year)
+
+    def _manifest_read(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"partitions": {}, "network": {}}
+
+    def _manifest_write(self, manifest):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _normalize(self, df):
+        """
+        Returns a copy of a table with the stored columns only,
+        with their types, sorted by epoch.
+        """
+        df = df.reindex(columns=list(self.COLS)).copy()
+        for col, typ in self.COLS.items():
+            if typ == "datetime":
+                df[col] = pd.to_datetime(df[col], errors="coerce").astype("datetime64[ns]")
+            elif typ == "float":
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+            else:
+                df[col] = df[col].where(df[col].notna(), "").astype(str)
+        df = df.sort_values("epoch_srt", kind="stable")
+        return df.reset_index(drop=True)
+
+    def read_partition(self, site, year, columns=None):
+        """
+        Reads a partition of the store.
+
+        Parameters
+        ----------
+        site : str
+            The site code.
+        year : int
+            The year.
+        columns : list, optional
+            The columns to read. Default is None (all columns).
+
+        Returns
+        -------
+        pandas.DataFrame
+            The partition's table (empty if the partition does not exist).
+        """
+        part_path = self._partition_path(site, year)
+        if not os.path.isfile(part_path):
+            return self._normalize(pd.DataFrame(columns=list(self.COLS)))
+
+        if self.fmt == "parquet":
+            df = pd.read_parquet(part_path, columns=columns)
+        else:
+            df = pd.read_csv(part_path, usecols=columns)
+
+        if columns:
+            return df
+        return self._normalize(df)
+
+    def _write_partition(self, site, year, df):
+        part_path = self._partition_path(site, year)
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        # written then renamed, a reader never sees a partial partition
+        tmp_path = part_path + ".tmp"
+        if self.fmt == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+
+    def update(self, df_chk):
+        """
+        Merges check results in the store.
+
+        Parameters
+        ----------
+        df_chk : pandas.DataFrame
+            The check results, with at least the site, epoch_srt and %
+            columns (see ``CheckGnss.get_table_store``).
+
+        Returns
+        -------
+        list
+            The (site, year) of the changed partitions.
+        """
+        df_chk = self._normalize(df_chk)
+        df_chk = df_chk[df_chk["epoch_srt"].notna()]
+
+        manifest = self._manifest_read()
+        parts_changed = []
+
+        for (site, year), df_new in df_chk.groupby(
+            [df_chk["site"], df_chk["epoch_srt"].dt.year]
+        ):
+            year = int(year)
+            df_old = self.read_partition(site, year)
+            df_mrg = pd.concat([df_old, df_new])
+            df_mrg = df_mrg.drop_duplicates("epoch_srt", keep="last")
+            df_mrg = self._normalize(df_mrg)
+
+            if df_mrg.equals(df_old):
+                continue
+
+            self._write_partition(site, year, df_mrg)
+            parts_changed.append((site, year))
+            part_dic = manifest["partitions"].setdefault(self._part_key(site, year), {})
+            part_dic.update(site=site, year=year, nrows=len(df_mrg), updated=time.time())
+
+        if parts_changed:
+            self._manifest_write(manifest)
+
+        logger.info(
+            "%i partitions changed in %s: %s",
+            len(parts_changed),
+            self,
+            ", ".join(self._part_key(*p) for p in parts_changed),
+        )
+
+        return parts_changed
+
+    def parts_to_render(self):
+        """
+        Returns the partitions whose summaries are out-of-date.
+
+        Returns
+        -------
+        list
+            The (site, year) of the partitions changed since their last rendering.
+        """
+        manifest = self._manifest_read()
+        return [
+            (p["site"], p["year"])
+            for p in manifest["partitions"].values()
+            if p.get("updated", 0) > p.get("rendered", -1)
+        ]
+
+    def _render_table(self, df_chk, out_dir, prefix):
+        """
+        Writes the summary CSV, the tabulated texts and the plot of a table.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        tabu_chk_col, tabu_chk_bnw, df_chk_sum = arochk.get_tabult_raw(
+            df_chk, short_label=True
+        )
+
+        df_chk_sum.to_csv(os.path.join(out_dir, prefix + "_check_rnx_summ.csv"))
+        utils.write_in_file(
+            tabu_chk_col, os.path.join(out_dir, prefix + "_check_rnx_tabu_col.txt")
+        )
+        utils.write_in_file(
+            tabu_chk_bnw, os.path.join(out_dir, prefix + "_check_rnx_tabu_bnw.txt")
+        )
+
+        fig, ax = plt.subplots()
+        df_chk_sum.plot(ax=ax)
+        utils.figure_saver(fig, out_dir, prefix + "_check_rnx_plot", outtype=(".png", ".pdf"))
+        plt.close(fig)
+
+    def render(self, force=False):
+        """
+        Regenerates the summaries and plots of the changed partitions,
+        and the network summaries of their years.
+
+        Parameters
+        ----------
+        force : bool, optional
+            If True, all the partitions are rendered. Default is False.
+
+        Returns
+        -------
+        list
+            The (site, year) of the rendered partitions.
+        """
+        manifest = self._manifest_read()
+        if force:
+            parts = [(p["site"], p["year"]) for p in manifest["partitions"].values()]
+        else:
+            parts = self.parts_to_render()
+
+        ### the site/year summaries
+        for site, year in parts:
+            df_part = self.read_partition(site, year)
+            self._render_table(
+                df_part, self._report_dir(site, year), "{}_{}".format(site, year)
+            )
+            manifest["partitions"][self._part_key(site, year)]["rendered"] = time.time()
+
+        ### the network summaries, only for the years with changed partitions
+        for year in sorted(set(y for _, y in parts)):
+            df_net = self.read_network(year)
+            if df_net.empty:
+                continue
+            self._render_table(
+                df_net, self._report_dir("network", year), "network_{}".format(year)
+            )
+            manifest["network"][str(year)] = dict(rendered=time.time())
+
+        if parts:
+            self._manifest_write(manifest)
+
+        logger.info("%i partitions rendered in %s", len(parts), self)
+
+        return parts
+
+    def read_network(self, year):
+        """
+        Reads the completeness of all the sites for a year,
+        with a complete epochs × sites grid (a missing row is 0%).
+
+        Only the site, epoch_srt and % columns of the year's partitions are read.
+
+        Parameters
+        ----------
+        year : int
+            The year.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The site, epoch_srt and % columns of the year's check results.
+        """
+        manifest = self._manifest_read()
+        cols = ["site", "epoch_srt", "%"]
+        df_stk = [
+            self.read_partition(p["site"], p["year"], columns=cols)
+            for p in manifest["partitions"].values()
+            if p["year"] == int(year)
+        ]
+        if not df_stk:
+            return pd.DataFrame(columns=cols)
+
+        df_net = pd.concat(df_stk)
+        df_net["epoch_srt"] = pd.to_datetime(df_net["epoch_srt"])
+        df_pvt = df_net.pivot_table(
+            index="epoch_srt", columns="site", values="%", aggfunc="max"
+        ).fillna(0)
+        df_net = df_pvt.stack().rename("%").reset_index()
+
+        return df_net[cols]
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+@author: psakic
+
+This module, rnxscan_fcts.py, provides a lightweight scanner of the
+RINEX observation files, reading only their header and epoch lines.
+"""
+
+import collections
+import datetime as dt
+import mmap
+import os
+import re
+
+import autorino.common as arocmn
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+# the epoch lines of the RINEX 3/4 files:
+# > 2024 01 01 00 00  0.0000000  0 32
+# NB: the leading newline (instead of a multiline ^) gives a literal prefix,
+# searched much faster by the regex engine
+RNX_EPOCH_REGEX_V3 = re.compile(
+    rb"\n> (\d{4}) ([ \d]\d) ([ \d]\d) ([ \d]\d) ([ \d]\d)([ \d]{2}\d\.\d{7})  ([0-6])"
+)
+# the epoch lines of the RINEX 2 files:
+#  24  1  1  0  0  0.0000000  0 12G01G02...
+RNX_EPOCH_REGEX_V2 = re.compile(
+    rb"\n ([ \d]\d) ([ \d]\d) ([ \d]\d) ([ \d]\d) ([ \d]\d)([ \d]{2}\d\.\d{7})  ([0-6])"
+)
+# the magic numbers of the gzip, bzip2, LZW and zip compressions
+RAW_COMPRESS_MAGICS = (b"\x1f\x8b", b"BZ", b"\x1f\x9d", b"PK")
+# the period in a RINEX long name: SITE00XXX_R_20240010000_01D_30S_MO.rnx
+RNX_LONGNAME_REGEX = re.compile(r"^(\w{9})_._\d{11}_(\d{2}[SMHDYU])_")
+# the session character in a RINEX short name: site001a.24o
+RNX_SHORTNAME_REGEX = re.compile(r"^(\w{4})\d{3}(\w)\.\d{2}[od]", re.IGNORECASE)
+
+
+def _rnx_header_parse(header):
+    """
+    internal function for ``rnx_scan_epochs``.
+    Gets the version, the marker name and the interval from a RINEX header.
+    """
+    head_dic = dict(version=None, marker=None, itrvl_header=None)
+    for line in header.decode("ascii", errors="ignore").splitlines():
+        label = line[60:].strip()
+        if label == "RINEX VERSION / TYPE":
+            try:
+                head_dic["version"] = float(line[:9])
+            except ValueError:
+                pass
+        elif label == "MARKER NAME":
+            head_dic["marker"] = line[:60].strip()
+        elif label == "INTERVAL":
+            try:
+                head_dic["itrvl_header"] = float(line[:10])
+            except ValueError:
+                pass
+    return head_dic
+
+
+class _EpochsCounter:
+    """
+    internal class for ``rnx_scan_epochs``.
+    Counts the epoch lines, and keeps the first/last epochs and
+    the histogram of the intervals (no per-epoch structure is kept).
+    """
+
+    def __init__(self, version):
+        self.regex = RNX_EPOCH_REGEX_V2 if version < 3 else RNX_EPOCH_REGEX_V3
+        self.yy_only = version < 3
+        self.nepochs = 0
+        self.epoch_srt = None
+        self.epoch_end = None
+        self.itrvl_hist = collections.Counter()
+        self._ord_cache = dict()
+        self._t_prev = None
+
+    def _epoch(self, yyyy, mm, dd, hh, mi, ss):
+        yyyy = int(yyyy)
+        if self.yy_only:
+            yyyy += 2000 if yyyy < 80 else 1900
+        date_key = (yyyy, int(mm), int(dd))
+        if date_key not in self._ord_cache:
+            self._ord_cache[date_key] = dt.date(*date_key).toordinal()
+        # seconds since the proleptic Gregorian origin, enough for the intervals
+        t = self._ord_cache[date_key] * 86400 + int(hh) * 3600 + int(mi) * 60 + float(ss)
+        return t, date_key
+
+    def feed(self, buf, pos=0):
+        # NB: all the dated epoch lines are counted, whatever their flag,
+        # as rinexMod's RinexFile does (see rnx_file_stats)
+        for m in self.regex.finditer(buf, pos):
+            *epo, flag = m.groups()
+            t, date_key = self._epoch(*epo)
+            if self._t_prev is not None:
+                self.itrvl_hist[round(t - self._t_prev, 3)] += 1
+            else:
+                self.epoch_srt = (date_key, t)
+            self._t_prev = t
+            self.epoch_end = (date_key, t)
+            self.nepochs += 1
+
+    def itrvl_nominal(self):
+        """
+        Returns the nominal interval: the most frequent non-zero interval,
+        rounded as rinexMod's ``RinexFile.get_sample_rate`` does.
+        None if there is less than one interval, 0.0 if there is only one,
+        or if more than 45% of the intervals are not the nominal one.
+        """
+        itrvl_hist = {d: n for d, n in self.itrvl_hist.items() if d != 0}
+        n_itrvl = sum(itrvl_hist.values())
+        if n_itrvl < 1:
+            return None
+        if n_itrvl < 2:
+            return 0.0
+
+        itrvl, n_nominal = max(itrvl_hist.items(), key=lambda e: e[1])
+        if (n_itrvl - n_nominal) / n_itrvl > 0.45:
+            return 0.0
+
+        if itrvl <= 0.0001:
+            return itrvl
+        elif itrvl <= 0.01:
+            return round(itrvl, 4)
+        elif itrvl < 1:
+            return round(itrvl, 2)
+        return float(round(itrvl, 0))
+
+    @staticmethod
+    def to_datetime(epoch):
+        if epoch is None:
+            return None
+        date_key, t = epoch
+        sec_day = t - dt.date(*date_key).toordinal() * 86400
+        return dt.datetime(*date_key) + dt.timedelta(seconds=sec_day)
+
+
+def rnx_scan_epochs(fpath, chunk_size=arocmn.DECMP_CHUNK_SIZE):
+    """
+    This function scans a RINEX observation file (version 2, 3 or 4)
+    and gets its epochs statistics, reading only its header and its epoch lines.
+
+    The data records are not parsed: the epoch lines are matched with
+    a regular expression over large chunks of the file, so the scan
+    is much faster than a full load, with a bounded memory.
+    The uncompressed files are scanned through a memory-mapped view,
+    the compressed ones (gzip, Hatanaka...) are streamed
+    (see ``autorino.common.decompress_stream``).
+
+    The results are the ones of a full load with rinexMod's ``RinexFile``
+    (see ``rnx_file_stats``): all the dated epoch lines are counted
+    (whatever their epoch flag), and the nominal interval is the most
+    frequent one in the data (the header's INTERVAL is only informative).
+
+    Parameters
+    ----------
+    fpath : str
+        The path of the RINEX file.
+    chunk_size : int, optional
+        The size in bytes of the read chunks. Default is 1 MiB.
+
+    Returns
+    -------
+    dict
+        The statistics:
+        version, marker (the header's marker name),
+        epoch_srt and epoch_end (first/last epochs as datetime),
+        nepochs (number of epochs),
+        itrvl (nominal interval: the most frequent interval in the data),
+        itrvl_header (the header's interval, None if absent).
+    """
+    fpath = str(fpath)
+
+    with open(fpath, "rb") as f:
+        head = f.read(80)
+    plain = head[:2] not in RAW_COMPRESS_MAGICS and b"COMPACT RINEX" not in head
+
+    if plain and os.path.getsize(fpath) > 0:
+        with open(fpath, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            i_end_head = max(mm.find(b"END OF HEADER"), 0)
+            head_dic = _rnx_header_parse(mm[:i_end_head])
+            counter = _EpochsCounter(head_dic["version"] or 3.0)
+            # the regex is run on the mapped file itself, without any copy
+            counter.feed(mm, i_end_head)
+    else:
+        head_dic = None
+        counter = None
+        buf = b""
+        for chunk in arocmn.decompress_stream(fpath, chunk_size=chunk_size):
+            buf += chunk
+            if head_dic is None:
+                i_end_head = buf.find(b"END OF HEADER")
+                if i_end_head < 0:
+                    continue
+                head_dic = _rnx_header_parse(buf[:i_end_head])
+                counter = _EpochsCounter(head_dic["version"] or 3.0)
+                buf = buf[i_end_head:]
+            # the last (maybe incomplete) line is kept for the next chunk,
+            # with its leading newline
+            i_last = buf.rfind(b"\n")
+            if i_last <= 0:
+                continue
+            counter.feed(buf[:i_last])
+            buf = buf[i_last:]
+        if head_dic is None:
+            head_dic = _rnx_header_parse(buf)
+            counter = _EpochsCounter(head_dic["version"] or 3.0)
+        elif buf:
+            counter.feed(buf)
+
+    itrvl = counter.itrvl_nominal()
+
+    return dict(
+        version=head_dic["version"],
+        marker=head_dic["marker"],
+        epoch_srt=counter.to_datetime(counter.epoch_srt),
+        epoch_end=counter.to_datetime(counter.epoch_end),
+        nepochs=counter.nepochs,
+        itrvl=itrvl,
+        itrvl_header=head_dic["itrvl_header"],
+    )
+
+
+def rnx_period_from_filename(fpath):
+    """
+    This function gets the nominal period of a RINEX file from its name.
+
+    Parameters
+    ----------
+    fpath : str
+        The path of the RINEX file.
+
+    Returns
+    -------
+    str or None
+        The period (e.g. '01D' or '01H'),
+        None if it can not be deduced from the name.
+    """
+    fname = os.path.basename(str(fpath))
+    m = RNX_LONGNAME_REGEX.match(fname)
+    if m:
+        return m.group(2)
+    m = RNX_SHORTNAME_REGEX.match(fname)
+    if m:
+        return "01D" if m.group(2) == "0" else "01H"
+    return None
+
+
+def rnx_site_from_filename(fpath, marker=None):
+    """
+    This function gets the 9-character site code of a RINEX file
+    from its name, as rinexMod's ``RinexFile`` does: the long name's one,
+    or the short name's 4 characters completed with '00XXX'.
+    The marker name is used only if the file name is too short.
+
+    Parameters
+    ----------
+    fpath : str
+        The path of the RINEX file.
+    marker : str, optional
+        The marker name of the header. Default is None.
+
+    Returns
+    -------
+    str
+        The site code, upper case ('XXXX00XXX' if not found).
+    """
+    fname = os.path.basename(str(fpath))
+    m = RNX_LONGNAME_REGEX.match(fname)
+    if m:
+        return m.group(1).upper()
+
+    site4 = fname[:4] if len(fname) >= 4 else (marker or "")[:4]
+    if len(site4) < 4:
+        return "XXXX00XXX"
+    return site4.upper() + "00XXX"
@@ -1,6 +1,12 @@
 from .decompress import *
+from .decmpcache_cls import *
 from .eporng_cls import *
 from .eporng_fcts import *
+from .fsindex_cls import *
+from .ledger_cls import *
+from .metrics_cls import *
 from .step_cls import *
 from .step_fcts import *
+from .steptimer_cls import *
+from .talowriter_cls import *
 from .translate import *
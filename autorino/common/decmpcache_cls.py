@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:05:38 2026
+
+@author: psakic
+
+This module, decmpcache_cls.py, provides a class for a content-addressed
+cache of the decompressed files, shared by the steps of a run.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import autorino.common as arocmn
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+
+class DecmpCache:
+    """
+    A class used to represent a cache of decompressed files.
+
+    Each compressed source file is identified by a key built from its
+    real path, its size and its modification time: a modified source file
+    is thus decompressed again.
+    The decompressed file is stored with its usual name in a subdirectory
+    named after the key (``<cache_dir>/<key>/<decompressed file>``),
+    so the same file decompressed by the convert, splice or split steps
+    (or by several processes) is decompressed only once.
+
+    The cached files must not be removed by the steps:
+    the cache size is limited by a least-recently-used eviction,
+    based on the total size in bytes of the cached files.
+
+    The object only stores paths and sizes, and can thus be copied
+    or sent to other processes.
+
+    Attributes
+    ----------
+    cache_dir : str
+        The directory of the cache.
+    max_bytes : int
+        The maximum total size of the cached files in bytes.
+    keep_recent : float
+        The entries used during the last keep_recent seconds are never evicted
+        (they may be used by a running step).
+    n_hits : int
+        The number of cache hits.
+    n_miss : int
+        The number of cache misses.
+    """
+
+    def __init__(self, cache_dir, max_bytes=10 * 1024**3, keep_recent=3600):
+        self.cache_dir = os.path.abspath(str(cache_dir))
+        self.max_bytes = max_bytes
+        self.keep_recent = keep_recent
+        self.n_hits = 0
+        self.n_miss = 0
+        self._bytes_added = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __repr__(self):
+        return "DecmpCache: {} ({} hits, {} misses)".format(
+            self.cache_dir, self.n_hits, self.n_miss
+        )
+
+    @staticmethod
+    def key(file_inp):
+        """
+        Returns the key of a source file, based on its real path,
+        its size and its modification time.
+
+        Parameters
+        ----------
+        file_inp : str
+            The source file.
+
+        Returns
+        -------
+        str
+            The key (hexadecimal SHA-1 digest).
+        """
+        st = os.stat(file_inp)
+        key_str = "|".join(
+            (os.path.realpath(file_inp), str(st.st_size), str(st.st_mtime_ns))
+        )
+        return hashlib.sha1(key_str.encode()).hexdigest()
+
+    def is_cache_file(self, file_inp):
+        """
+        Checks if a path is stored in the cache.
+
+        Parameters
+        ----------
+        file_inp : str
+            The file path.
+
+        Returns
+        -------
+        bool
+            True if the file is in the cache directory.
+        """
+        if not file_inp:
+            return False
+        return os.path.abspath(str(file_inp)).startswith(self.cache_dir + os.sep)
+
+    def get(self, file_inp):
+        """
+        Gets the cached decompressed file of a source file,
+        and marks it as recently used.
+
+        Parameters
+        ----------
+        file_inp : str
+            The compressed source file.
+
+        Returns
+        -------
+        str or None
+            The path of the cached decompressed file, None if not cached.
+        """
+        entry_dir = os.path.join(self.cache_dir, self.key(file_inp))
+        try:
+            names = os.listdir(entry_dir)
+        except FileNotFoundError:
+            return None
+
+        if len(names) != 1:
+            return None
+
+        # the modification time of the entry is the last use
+        os.utime(entry_dir)
+        return os.path.join(entry_dir, names[0])
+
+    def decompress(self, file_inp, force=False):
+        """
+        Decompresses a file through the cache.
+        Same interface as ``decompress_file``.
+
+        Parameters
+        ----------
+        file_inp : str
+            The input file to decompress.
+        force : bool, optional
+            If True, the file is decompressed again even if it is cached.
+
+        Returns
+        -------
+        str
+            The path to the decompressed (cached) file.
+        bool
+            Always False, since the cached files are not temporary files
+            to be removed by the steps.
+        """
+        file_inp = str(file_inp)
+
+        if not os.path.isfile(file_inp):
+            # nothing is written, decompress_file logs the missing file
+            return arocmn.decompress_file(file_inp)
+
+        if not force:
+            file_hit = self.get(file_inp)
+            if file_hit:
+                self.n_hits += 1
+                logger.debug("decompress (cache hit): %s", os.path.basename(file_inp))
+                return file_hit, False
+
+        self.n_miss += 1
+        key = self.key(file_inp)
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        # decompressed in a temporary entry, then renamed: another process
+        # decompressing the same file at the same time can not see a partial entry
+        tmp_entry = tempfile.mkdtemp(prefix=key + ".", suffix=".part", dir=self.cache_dir)
+        try:
+            file_out, bool_decmp = arocmn.decompress_file(
+                file_inp, tmp_entry, force=True
+            )
+            if not bool_decmp:
+                # no valid compression, nothing to cache
+                return file_out, False
+
+            if force:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.rename(tmp_entry, entry_dir)
+            except OSError:
+                file_hit = self.get(file_inp)
+                if file_hit:
+                    # cached meanwhile by another process
+                    return file_hit, False
+                # invalid entry, replaced
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.rename(tmp_entry, entry_dir)
+
+            file_cached = os.path.join(entry_dir, os.path.basename(file_out))
+            self._bytes_added += os.path.getsize(file_cached)
+        finally:
+            if os.path.isdir(tmp_entry):
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+
+        if self._bytes_added > 0.05 * self.max_bytes:
+            self.evict()
+
+        return file_cached, False
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the total size
+        of the cache is below max_bytes (see ``evict_cache_dir``).
+
+        Returns
+        -------
+        int
+            The number of removed entries.
+        """
+        self._bytes_added = 0
+        n_evict = evict_cache_dir(self.cache_dir, self.max_bytes, self.keep_recent)
+
+        if n_evict:
+            logger.debug("%i entries evicted from %s", n_evict, self)
+
+        return n_evict
+
+
+def evict_cache_dir(cache_dir, max_bytes, keep_recent=3600):
+    """
+    Removes the least recently used entries of a cache directory
+    until its total size is below max_bytes.
+
+    The entries are the subdirectories of cache_dir, and their modification
+    time is their last use. The entries used during the last keep_recent
+    seconds are kept, and the temporary entries (``*.part``)
+    left by interrupted runs are removed.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory of the cache.
+    max_bytes : int
+        The maximum total size of the cached files in bytes.
+    keep_recent : float, optional
+        The entries used during the last keep_recent seconds are never evicted.
+        Default is 3600.
+
+    Returns
+    -------
+    int
+        The number of removed entries.
+    """
+    now = time.time()
+    entries = []
+    size_tot = 0
+
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            mtime = entry.stat().st_mtime
+            if entry.name.endswith(".part"):
+                if now - mtime > keep_recent:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                continue
+            size = 0
+            with os.scandir(entry.path) as it_entry:
+                for f in it_entry:
+                    if f.is_file(follow_symlinks=False):
+                        size += f.stat().st_size
+            entries.append((mtime, size, entry.path))
+            size_tot += size
+
+    n_evict = 0
+
+    # the oldest entries first
+    for mtime, size, path in sorted(entries):
+        if size_tot <= max_bytes:
+            break
+        if now - mtime < keep_recent:
+            logger.debug(
+                "cache %s above its maximum size (%i bytes), "
+                "but all its remaining entries are recent",
+                cache_dir,
+                size_tot,
+            )
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        size_tot -= size
+        n_evict += 1
+
+    return n_evict
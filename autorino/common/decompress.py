@@ -9,10 +9,18 @@ This module, decompress.py, provides functions for decompressing files,
 specifically those that are gzipped or in Hatanaka-compressed RINEX format.
 """
 
+import bz2
+import concurrent.futures
 import gzip
+import importlib.resources
+import importlib.util
+import multiprocessing
 
 import os
 import shutil
+import subprocess
+import threading
+from itertools import repeat
 from pathlib import Path
 
 import hatanaka
@@ -26,6 +34,9 @@ import autorino.cfgenv.env_read as aroenv
 logger = logging.getLogger("autorino")
 logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
 
+# the size of the chunks read by the streaming decompression
+DECMP_CHUNK_SIZE = 1024 * 1024
+
 
 def is_compressed(file_inp):
     """
@@ -98,6 +109,9 @@ def decomp_hatanaka(crx_file_inp, out_dir_inp=None, force=False):
     """
     Decompresses a Hatanaka-compressed RINEX file.
 
+    The file is streamed (see ``decompress_stream``) and the plain RINEX
+    is directly written in the output directory, without intermediate copy.
+
     Parameters
     ----------
     crx_file_inp : str
@@ -117,26 +131,263 @@ def decomp_hatanaka(crx_file_inp, out_dir_inp=None, force=False):
     crx_file_inp2 = Path(crx_file_inp)
 
     if out_dir_inp:
-        out_dir = out_dir_inp
-        crx_file = shutil.copy2(crx_file_inp, out_dir)
-        dell = True
+        out_dir = Path(out_dir_inp)
     else:
-        out_dir = os.path.dirname(crx_file_inp)
-        crx_file = crx_file_inp
-        dell = False
+        out_dir = crx_file_inp2.parent
 
-    rnx_name_potential = os.path.basename(crx_file).split(".")[0] + ".rnx"
-    rnx_file_potential = os.path.join(out_dir, rnx_name_potential)
+    rnx_name = hatanaka.get_decompressed_path(crx_file_inp2).name
+    rnx_file_out = out_dir.joinpath(rnx_name)
 
-    if os.path.isfile(rnx_file_potential) and not force:
-        rnx_file_out = rnx_file_potential
+    if rnx_file_out == crx_file_inp2:
+        # file does not need decompressing
+        pass
+    elif rnx_file_out.is_file() and not force:
+        pass
     else:
-        rnx_file_out = hatanaka.decompress_on_disk(crx_file, delete=dell)
+        # written under a temporary name, then renamed, to never leave a partial file
+        rnx_file_part = out_dir.joinpath(rnx_name + ".part")
+        try:
+            with open(rnx_file_part, "wb") as f_out:
+                decompress_pipe(crx_file_inp, f_out)
+            os.replace(rnx_file_part, rnx_file_out)
+        finally:
+            if rnx_file_part.exists():
+                rnx_file_part.unlink()
         logger.debug("decompress (hatanaka): %s > %s", crx_file_inp2.name, rnx_file_out)
 
     return str(rnx_file_out)
 
 
+def _crx2rnx_exe():
+    """
+    Returns the path of the crx2rnx executable: the one in the PATH,
+    or the one shipped with the hatanaka package. None if not found.
+    """
+    exe = shutil.which("crx2rnx")
+    if exe:
+        return exe
+
+    exe_name = "crx2rnx.exe" if os.name == "nt" else "crx2rnx"
+    try:
+        exe = importlib.resources.files("hatanaka.bin").joinpath(exe_name)
+        if exe.is_file():
+            return str(exe)
+    except (ModuleNotFoundError, TypeError):
+        pass
+    except AttributeError:
+        # Python 3.8: no importlib.resources.files, the executable is
+        # searched in the package's directory
+        spec = importlib.util.find_spec("hatanaka")
+        if spec and spec.origin:
+            exe = os.path.join(os.path.dirname(spec.origin), "bin", exe_name)
+            if os.path.isfile(exe):
+                return exe
+
+    return None
+
+
+def _crx2rnx_pipe(crx_head, crx_fobj, chunk_size, exe):
+    """
+    Generator streaming a Compact RINEX content through a crx2rnx process.
+
+    The content (its already read header ``crx_head``, then the remaining of
+    the binary file object ``crx_fobj``) is written to the stdin of crx2rnx
+    by a feeder thread, and the plain RINEX is yielded from its stdout.
+    """
+    proc = subprocess.Popen(
+        [exe, "-"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stderr_lis = []
+
+    def _feed():
+        try:
+            proc.stdin.write(crx_head)
+            while True:
+                chunk = crx_fobj.read(chunk_size)
+                if not chunk:
+                    break
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, ValueError, OSError):
+            # the process has been stopped, the error is handled below
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    def _drain_stderr():
+        stderr_lis.append(proc.stderr.read())
+
+    threads = [threading.Thread(target=_feed), threading.Thread(target=_drain_stderr)]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        retcode = proc.wait()
+    finally:
+        # also if the consumer stops the iteration before the end
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        for t in threads:
+            t.join()
+        proc.stdout.close()
+        proc.stderr.close()
+
+    stderr = b"".join(stderr_lis).decode("ascii", errors="backslashreplace").strip()
+    # crx2rnx: 0 = OK, 2 = warning
+    if retcode not in (0, 2):
+        raise hatanaka.HatanakaException(stderr)
+    elif stderr:
+        logger.warning("crx2rnx: %s", stderr.replace("\n", " "))
+
+
+def decompress_stream(file_inp, chunk_size=DECMP_CHUNK_SIZE):
+    """
+    Generator of the decompressed content of a file, chunk by chunk,
+    without any temporary file.
+
+    gzip (or bzip2) and Hatanaka decompressions are chained as streams:
+    the gzip layer is read incrementally and piped into a crx2rnx process.
+    The compression types are deduced from the file content (as ``hatanaka`` does),
+    not from the file name. A non-compressed file is simply read.
+
+    The LZW (.Z) and zip compressions, which cannot be streamed,
+    are decompressed in memory with ``hatanaka.decompress``.
+
+    Parameters
+    ----------
+    file_inp : str
+        The input file.
+    chunk_size : int, optional
+        The size in bytes of the read chunks. Default is 1 MiB.
+
+    Yields
+    ------
+    bytes
+        The successive chunks of the decompressed content.
+    """
+    file_inp = str(file_inp)
+
+    with open(file_inp, "rb") as f_raw:
+        magic = f_raw.read(2)
+
+    if magic == b"\x1f\x8b":
+        fobj = gzip.open(file_inp, "rb")
+    elif magic == b"BZ":
+        fobj = bz2.open(file_inp, "rb")
+    elif magic in (b"\x1f\x9d", b"PK"):
+        # LZW or zip, not streamable
+        content = hatanaka.decompress(Path(file_inp))
+        for i in range(0, len(content), chunk_size):
+            yield content[i : i + chunk_size]
+        return
+    else:
+        fobj = open(file_inp, "rb")
+
+    with fobj:
+        head = fobj.read(80)
+        if b"COMPACT RINEX" in head:
+            exe = _crx2rnx_exe()
+            if exe:
+                yield from _crx2rnx_pipe(head, fobj, chunk_size, exe)
+            else:
+                # no executable found, the hatanaka's in-memory decompression is used
+                content = hatanaka.crx2rnx(head + fobj.read())
+                for i in range(0, len(content), chunk_size):
+                    yield content[i : i + chunk_size]
+        else:
+            yield head
+            while True:
+                chunk = fobj.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+def decompress_bytes(file_inp):
+    """
+    Decompresses a file in memory, without any temporary file.
+    See ``decompress_stream`` for the supported compressions.
+
+    Parameters
+    ----------
+    file_inp : str
+        The input file.
+
+    Returns
+    -------
+    bytes
+        The decompressed content.
+    """
+    return b"".join(decompress_stream(file_inp))
+
+
+def decompress_lines(file_inp, encoding="ascii", chunk_size=DECMP_CHUNK_SIZE):
+    """
+    Generator of the decompressed lines of a text file (e.g. a RINEX),
+    without any temporary file.
+    See ``decompress_stream`` for the supported compressions.
+
+    Parameters
+    ----------
+    file_inp : str
+        The input file.
+    encoding : str, optional
+        The encoding of the file. The undecodable characters are ignored.
+        Default is 'ascii'.
+    chunk_size : int, optional
+        The size in bytes of the read chunks. Default is 1 MiB.
+
+    Yields
+    ------
+    str
+        The successive lines, without their end-of-line characters.
+    """
+    rest = b""
+    for chunk in decompress_stream(file_inp, chunk_size=chunk_size):
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r").decode(encoding, errors="ignore")
+    if rest:
+        yield rest.rstrip(b"\r").decode(encoding, errors="ignore")
+
+
+def decompress_pipe(file_inp, fobj_out, chunk_size=DECMP_CHUNK_SIZE):
+    """
+    Writes the decompressed content of a file into a binary file object,
+    e.g. an opened output file or the stdin of a converter's process
+    (``subprocess.Popen(..., stdin=subprocess.PIPE).stdin``).
+    See ``decompress_stream`` for the supported compressions.
+
+    Parameters
+    ----------
+    file_inp : str
+        The input file.
+    fobj_out : file object
+        The binary file object written. It is not closed.
+    chunk_size : int, optional
+        The size in bytes of the read chunks. Default is 1 MiB.
+
+    Returns
+    -------
+    int
+        The number of written bytes.
+    """
+    n_bytes = 0
+    for chunk in decompress_stream(file_inp, chunk_size=chunk_size):
+        fobj_out.write(chunk)
+        n_bytes += len(chunk)
+    return n_bytes
+
+
 def decompress_file(file_inp, out_dir_inp=None, force=False):
     """
     Decompresses a file. The file can be gzipped or in Hatanaka-compressed RINEX format.
@@ -180,3 +431,104 @@ def decompress_file(file_inp, out_dir_inp=None, force=False):
         bool_decomp_out = False
 
     return file_out, bool_decomp_out
+
+
+def process_pool_context():
+    """
+    Returns the multiprocessing context of the pools of processes.
+
+    The pools are created from threaded contexts (converter runner,
+    table log writer, workers of the steps...), and a fork with live
+    threads can deadlock on a lock held by another thread.
+    The workers are thus started by a fork server (a clean, single-threaded
+    process), or spawned where it is not available.
+    The fork server preloads autorino only, not the ``__main__`` module.
+    Nevertheless, the workers import the ``__main__`` module: a script
+    using the pools must protect its code with ``if __name__ == "__main__":``.
+
+    Returns
+    -------
+    multiprocessing.context.BaseContext
+        The multiprocessing context.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        # the default preload ('__main__') runs the script's top level
+        # in the fork server
+        ctx.set_forkserver_preload(["autorino"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _decompress_safe(decmp_fct, file_inp, *args):
+    """
+    internal function for ``decompress_files``.
+    Decompresses a file, a failure does not abort the other files.
+    """
+    try:
+        return decmp_fct(file_inp, *args)
+    except Exception as e:
+        logger.error("unable to decompress %s: %s", file_inp, e)
+        return file_inp, False
+
+
+def decompress_files(files_inp, out_dir_inp=None, force=False, workers=1, cache=None):
+    """
+    Decompresses several files, optionally with a pool of processes.
+
+    The gzip and Hatanaka decompressions are CPU-bound and independent,
+    thus they are distributed over ``workers`` processes.
+
+    Parameters
+    ----------
+    files_inp : list of str
+        The input files to decompress.
+    out_dir_inp : str, optional
+        The output directory where the decompressed files will be stored.
+        If not provided, the decompressed files will be stored in the same directory as the input files.
+    force : bool, optional
+        If True, the files will be decompressed even if decompressed files already exist.
+    workers : int, optional
+        The number of processes. 1 (default) decompresses the files sequentially.
+        With more than one process, a calling script must protect its code
+        with ``if __name__ == "__main__":`` (see ``process_pool_context``).
+    cache : DecmpCache, optional
+        A decompression cache. If given, the files are decompressed
+        through the cache (``DecmpCache.decompress``), and out_dir_inp is ignored.
+        Default is None.
+
+    Returns
+    -------
+    list of tuple
+        For each input file (in the same order), the path to the decompressed file
+        and a boolean, True if the file was decompressed (see ``decompress_file``).
+        A file whose decompression failed is returned as (input file, False).
+    """
+    files_inp = [str(f) for f in files_inp]
+
+    if cache:
+        decmp_fct = cache.decompress
+        decmp_args = (repeat(force),)
+    else:
+        decmp_fct = decompress_file
+        decmp_args = (repeat(out_dir_inp), repeat(force))
+
+    if not workers or workers <= 1 or len(files_inp) <= 1:
+        return list(map(_decompress_safe, repeat(decmp_fct), files_inp, *decmp_args))
+
+    n_workers = min(workers, len(files_inp))
+    logger.debug("decompress %i files with %i processes", len(files_inp), n_workers)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers, mp_context=process_pool_context()
+    ) as executor:
+        decmp_out = list(
+            executor.map(
+                _decompress_safe,
+                repeat(decmp_fct),
+                files_inp,
+                *decmp_args,
+                chunksize=max(1, len(files_inp) // (n_workers * 4)),
+            )
+        )
+
+    return decmp_out
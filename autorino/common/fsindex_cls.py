@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 16 10:12:41 2026
+
+@author: psakic
+
+This module, fsindex_cls.py, provides a class for indexing a file system tree
+once, and resolving several file searches against this index.
+"""
+
+import os
+import re
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+
+class FsIndex:
+    """
+    A class used to represent an index of a file system tree.
+
+    Each directory is scanned only once with ``os.scandir``, and its entries
+    (files and subdirectories) are kept in memory with their cached
+    stat results (size and modification time).
+    The recursive searches (``find``) are then resolved against the index,
+    without walking the file system again.
+
+    It is designed to be built once per run, e.g. when the same archive tree
+    is searched for each epoch of an epoch range.
+    Since the index is not refreshed, the files created after a directory
+    has been scanned are not seen.
+
+    Attributes
+    ----------
+    n_scanned_dirs : int
+        The number of directories actually scanned on the file system.
+    """
+
+    def __init__(self):
+        # dir path => (files dict {name: DirEntry}, list of subdirs paths)
+        self._dirs = dict()
+        # parent dir path => sorted list of all the files paths below it
+        self._trees = dict()
+        self.n_scanned_dirs = 0
+
+    def __repr__(self):
+        return "FsIndex: {} directories scanned".format(self.n_scanned_dirs)
+
+    def scan_dir(self, dir_inp):
+        """
+        Scans a single directory (not recursive) and stores its entries
+        in the index. The file system is read only at the first call.
+
+        The entries are classified as os.walk does (followlinks=False):
+        the symbolic links to directories are neither files
+        nor subdirectories to recurse into.
+
+        Parameters
+        ----------
+        dir_inp : str
+            The directory path.
+
+        Returns
+        -------
+        tuple
+            A dict of the files {name: os.DirEntry},
+            and a list of the subdirectories paths.
+        """
+        dir_inp = os.path.normpath(str(dir_inp))
+        if dir_inp in self._dirs:
+            return self._dirs[dir_inp]
+
+        files_dic = dict()
+        subdirs_lis = []
+        try:
+            with os.scandir(dir_inp) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files_dic[entry.name] = entry
+                    elif not entry.is_symlink():
+                        subdirs_lis.append(entry.path)
+        except OSError as e:
+            logger.debug("unable to scan %s: %s", dir_inp, e)
+
+        self.n_scanned_dirs += 1
+        self._dirs[dir_inp] = (files_dic, subdirs_lis)
+        return files_dic, subdirs_lis
+
+    def tree(self, parent_dir):
+        """
+        Returns all the files paths below a parent directory (recursive).
+
+        Parameters
+        ----------
+        parent_dir : str
+            The parent directory path.
+
+        Returns
+        -------
+        list
+            The sorted list of the files paths.
+        """
+        parent_dir = os.path.normpath(str(parent_dir))
+        if parent_dir in self._trees:
+            return self._trees[parent_dir]
+
+        files_lis = []
+        dirs_stk = [parent_dir]
+        while dirs_stk:
+            dir_cur = dirs_stk.pop()
+            files_dic, subdirs_lis = self.scan_dir(dir_cur)
+            files_lis.extend(entry.path for entry in files_dic.values())
+            dirs_stk.extend(subdirs_lis)
+
+        files_lis = sorted(files_lis)
+        self._trees[parent_dir] = files_lis
+        return files_lis
+
+    def find(self, parent_dir, pattern=".*", match_mode="search"):
+        """
+        Finds recursively the files below a parent directory
+        whose basename matches a regular expression.
+
+        Parameters
+        ----------
+        parent_dir : str
+            The parent directory path.
+        pattern : str, optional
+            The regular expression applied on the files basenames.
+            Default is ".*" (all the files).
+        match_mode : str, optional
+            'search' (``re.search``) or 'match' (``re.match``).
+            Default is 'search'.
+
+        Returns
+        -------
+        list
+            The sorted list of the matching files paths.
+        """
+        files_lis = self.tree(parent_dir)
+        if pattern in (".*", "", None):
+            return list(files_lis)
+
+        rgx = re.compile(pattern)
+        rgx_fct = rgx.match if match_mode == "match" else rgx.search
+        return [f for f in files_lis if rgx_fct(os.path.basename(f))]
+
+    def _entry(self, fpath):
+        """
+        Returns the cached os.DirEntry of a file, None if it is not indexed.
+        """
+        fpath = os.path.normpath(str(fpath))
+        files_dic, _ = self.scan_dir(os.path.dirname(fpath))
+        return files_dic.get(os.path.basename(fpath))
+
+    def isfile(self, fpath):
+        """
+        Checks if a path is an existing file, based on the index.
+
+        Parameters
+        ----------
+        fpath : str
+            The file path.
+
+        Returns
+        -------
+        bool
+            True if the path is a file.
+        """
+        entry = self._entry(fpath)
+        if entry is None:
+            return False
+        try:
+            return entry.is_file()
+        except OSError:
+            return False
+
+    def stat(self, fpath):
+        """
+        Returns the size and the modification time of an indexed file.
+        The stat results are cached by the os.DirEntry objects.
+
+        Parameters
+        ----------
+        fpath : str
+            The file path.
+
+        Returns
+        -------
+        tuple
+            The size in bytes and the modification time (POSIX timestamp),
+            (None, None) if the file is not indexed.
+        """
+        entry = self._entry(fpath)
+        if entry is None:
+            return None, None
+        try:
+            st = entry.stat()
+        except OSError:
+            return None, None
+        return st.st_size, st.st_mtime
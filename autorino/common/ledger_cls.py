@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 16 15:37:02 2026
+
+@author: psakic
+
+This module, ledger_cls.py, provides a class for a persistent ledger
+of the files processed by the steps, stored in a SQLite database.
+"""
+
+import glob
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+
+def sqlite_connect(db_path, timeout=60):
+    """
+    Opens a connection to a SQLite database of autorino
+    (ledger, statistics cache...).
+
+    The rollback journal of SQLite is used per default, since the
+    write-ahead log (WAL) needs a shared memory which does not work
+    on network file systems (NFS...).
+    The WAL, faster for concurrent readers and writers,
+    can be enabled with ``sqlite_wal`` in the 'general' section of the
+    environment file, for databases on local disks only.
+
+    Parameters
+    ----------
+    db_path : str
+        The path of the database file.
+    timeout : float, optional
+        The timeout in seconds to wait for a lock. Default is 60.
+
+    Returns
+    -------
+    sqlite3.Connection
+        The connection.
+    """
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    if aroenv.ARO_ENV_DIC["general"].get("sqlite_wal", False):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    else:
+        # a database previously in WAL mode is switched back
+        conn.execute("PRAGMA journal_mode=DELETE")
+    return conn
+
+
+class TableLedger:
+    """
+    A class used to represent a persistent ledger of the processed files.
+
+    The ledger is a SQLite database, indexed by the input file path
+    (``fpath_inp``). It replaces the reload of all the previous CSV
+    table logs: the rows written with ``StepGnss.write_in_table_log``
+    are also upserted in the ledger, and the previous values of the
+    current table's files are then queried directly.
+
+    For each input file, the ledger keeps:
+    * the site and epochs of its first record,
+    * the values of its last record (ok booleans, output path, sizes, note),
+    * ``ok_prev``: True if it has been processed OK
+      (ok_inp and ok_out) at least once.
+
+    No connection is kept open: the object only stores the database path
+    and can thus be copied or sent to other processes.
+
+    Attributes
+    ----------
+    db_path : str
+        The path of the SQLite database file.
+    """
+
+    # the columns stored in the ledger, besides fpath_inp
+    COLS = [
+        "fname",
+        "site",
+        "epoch_srt",
+        "epoch_end",
+        "ok_inp",
+        "ok_out",
+        "fpath_out",
+        "size_inp",
+        "size_out",
+        "note",
+    ]
+    # the columns whose first recorded value is kept
+    COLS_FIRST = ["site", "epoch_srt", "epoch_end"]
+
+    def __init__(self, db_path, import_table_logs=True):
+        """
+        Initializes the ledger, and creates the database if necessary.
+
+        Parameters
+        ----------
+        db_path : str
+            The path of the SQLite database file.
+        import_table_logs : bool, optional
+            If True and if the database is created, the legacy CSV table logs
+            (``*_table.log``) stored in the same directory are imported.
+            Default is True.
+        """
+        self.db_path = str(db_path)
+
+        is_new = not os.path.isfile(self.db_path)
+        self._create_db()
+
+        if is_new and import_table_logs:
+            self.import_table_logs(os.path.dirname(self.db_path))
+
+    def __repr__(self):
+        return "TableLedger: {}".format(self.db_path)
+
+    def _connect(self):
+        return sqlite_connect(self.db_path)
+
+    def _create_db(self):
+        cols_def = ", ".join(c + " TEXT" for c in self.COLS)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ledger ("
+                "fpath_inp TEXT PRIMARY KEY, "
+                + cols_def
+                + ", ok_prev INTEGER, updated REAL)"
+            )
+        conn.close()
+
+    @staticmethod
+    def _val2sql(val):
+        """
+        Converts a table value into a SQLite-storable value (str or None).
+        """
+        if val is None:
+            return None
+        elif isinstance(val, float) and np.isnan(val):
+            return None
+        elif val is pd.NaT:
+            return None
+        elif isinstance(val, (bool, np.bool_)):
+            return str(bool(val))
+        else:
+            return str(val)
+
+    @staticmethod
+    def _is_true(val):
+        return str(val) in ("True", "1", "1.0")
+
+    def write(self, rows_inp):
+        """
+        Upserts rows in the ledger.
+
+        Parameters
+        ----------
+        rows_inp : pandas.Series or pandas.DataFrame
+            A table row (as a Series) or several rows (as a DataFrame).
+            The rows without ``fpath_inp`` are skipped.
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(rows_inp, pd.Series):
+            rows_df = pd.DataFrame(rows_inp).T
+        else:
+            rows_df = rows_inp
+
+        if "fpath_inp" not in rows_df.columns:
+            return None
+
+        now = time.time()
+        recs = []
+        for _, row in rows_df.iterrows():
+            fpath_inp = self._val2sql(row["fpath_inp"])
+            if not fpath_inp:
+                continue
+            vals = [self._val2sql(row.get(c)) for c in self.COLS]
+            ok_prev = int(
+                self._is_true(row.get("ok_inp")) and self._is_true(row.get("ok_out"))
+            )
+            recs.append([fpath_inp] + vals + [ok_prev, now])
+
+        if not recs:
+            return None
+
+        cols_all = ["fpath_inp"] + self.COLS + ["ok_prev", "updated"]
+        cols_updt = [c for c in self.COLS if c not in self.COLS_FIRST]
+        sql = (
+            "INSERT INTO ledger ("
+            + ", ".join(cols_all)
+            + ") VALUES ("
+            + ", ".join(["?"] * len(cols_all))
+            + ") ON CONFLICT(fpath_inp) DO UPDATE SET "
+            + ", ".join(c + "=excluded." + c for c in cols_updt)
+            + ", ok_prev=MAX(ok_prev, excluded.ok_prev), updated=excluded.updated"
+        )
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(sql, recs)
+        finally:
+            conn.close()
+
+        return None
+
+    def query(self, fpaths_inp, chunk_size=500):
+        """
+        Gets the ledger records of given input files.
+
+        The output DataFrame is compatible with ``StepGnss.filter_prev_tab``
+        and ``StepGnss.get_vals_prev_tab``: its ``ok_inp`` and ``ok_out``
+        columns are True if the file has been processed OK during
+        a previous run, and its site and epochs are the first recorded ones.
+
+        Parameters
+        ----------
+        fpaths_inp : iterable of str
+            The input file paths to look for.
+        chunk_size : int, optional
+            The number of paths per SQL query. Default is 500.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The records found in the ledger (one row per file).
+        """
+        fpaths = list(dict.fromkeys(str(f) for f in fpaths_inp if isinstance(f, str)))
+        cols_out = ["fpath_inp"] + self.COLS + ["ok_prev"]
+
+        recs = []
+        conn = self._connect()
+        try:
+            for i in range(0, len(fpaths), chunk_size):
+                chunk = fpaths[i : i + chunk_size]
+                sql = (
+                    "SELECT "
+                    + ", ".join(cols_out)
+                    + " FROM ledger WHERE fpath_inp IN ("
+                    + ", ".join(["?"] * len(chunk))
+                    + ")"
+                )
+                recs.extend(conn.execute(sql, chunk).fetchall())
+        finally:
+            conn.close()
+
+        df_out = pd.DataFrame(recs, columns=cols_out)
+        ok_prev = df_out["ok_prev"].astype(bool)
+        df_out["ok_inp"] = ok_prev
+        df_out["ok_out"] = ok_prev
+        for c in ("size_inp", "size_out"):
+            df_out[c] = pd.to_numeric(df_out[c], errors="coerce")
+
+        return df_out.drop(columns="ok_prev")
+
+    def import_table_logs(self, tables_dir):
+        """
+        Imports the legacy CSV table logs (``*_table.log``) in the ledger.
+
+        Parameters
+        ----------
+        tables_dir : str
+            The directory where the CSV table logs are stored.
+
+        Returns
+        -------
+        int
+            The number of imported rows.
+        """
+        tables_files = sorted(glob.glob(os.path.join(tables_dir, "*_table.log")))
+        n_rows = 0
+        for t in tables_files:
+            try:
+                tab_df = pd.read_csv(t)
+            except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+                logger.warning("unable to import the table log %s: %s", t, e)
+                continue
+            if tab_df.empty:
+                continue
+            self.write(tab_df)
+            n_rows += len(tab_df)
+
+        if tables_files:
+            logger.info(
+                "%i rows from %i table logs imported in %s",
+                n_rows,
+                len(tables_files),
+                self,
+            )
+
+        return n_rows
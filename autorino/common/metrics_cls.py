@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:48:09 2026
+
+@author: psakic
+
+This module, metrics_cls.py, provides a registry of metrics of the steps,
+exported in the Prometheus/OpenMetrics text format, as a file
+(for the node_exporter's textfile collector) or by a local HTTP endpoint.
+"""
+
+import contextlib
+import copy
+import http.server
+import os
+import re
+import threading
+import time
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+try:
+    import fcntl
+except ImportError:  # not a POSIX system, the textfile is not locked
+    fcntl = None
+
+# the metrics families: name: (type, help)
+METRICS_FAMILIES = {
+    "autorino_files_total": (
+        "counter",
+        "Number of files processed by the steps, by status (ok or failed).",
+    ),
+    "autorino_bytes_total": (
+        "counter",
+        "Number of bytes read (direction=in) or written (direction=out) by the stages.",
+    ),
+    "autorino_stage_duration_seconds": (
+        "histogram",
+        "Wall time of the stages for one file.",
+    ),
+    "autorino_step_duration_seconds": (
+        "histogram",
+        "Wall time of the steps.",
+    ),
+    "autorino_retries_total": (
+        "counter",
+        "Number of retries (e.g. of a download).",
+    ),
+    "autorino_timeouts_total": (
+        "counter",
+        "Number of timeouts (download, converter...).",
+    ),
+    "autorino_step_exit_code": (
+        "gauge",
+        "Exit code of the last run of the step.",
+    ),
+    "autorino_step_last_run_timestamp_seconds": (
+        "gauge",
+        "End time of the last run of the step.",
+    ),
+    "autorino_converter_queue_depth": (
+        "gauge",
+        "Number of converter jobs waiting for a slot in the converter runner.",
+    ),
+    "autorino_converter_jobs_running": (
+        "gauge",
+        "Number of converter jobs running in the converter runner.",
+    ),
+}
+
+# the upper bounds (seconds) of the duration histograms' buckets
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+# a sample of the text format: name{labels} value
+_SAMPLE_REGEX = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)")
+_LABEL_REGEX = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def _labels_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _labels_str(labels_key):
+    if not labels_key:
+        return ""
+    lbl_esc = [
+        '{}="{}"'.format(
+            k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for k, v in labels_key
+    ]
+    return "{" + ",".join(lbl_esc) + "}"
+
+
+def _fmt_val(val):
+    if val == float("inf"):
+        return "+Inf"
+    if isinstance(val, float) and not val.is_integer():
+        return repr(val)
+    return str(int(val))
+
+
+class MetricsRegistry:
+    """
+    A class used to represent a registry of metrics
+    (counters, gauges and histograms with labels).
+
+    The metrics are rendered in the Prometheus text format (version 0.0.4),
+    which is also read by OpenMetrics scrapers.
+    They can be written in a file for the node_exporter's textfile collector
+    (``write_textfile``), and/or served by a local HTTP endpoint (``serve``),
+    for a long-running process (daemon mode).
+
+    Since a run from cron is a new process, the metrics of the previous
+    textfile are reloaded (``load_textfile``), so the counters and the
+    histograms are cumulative over the runs, as expected by Prometheus.
+    Several processes can share a textfile: it is locked (``<textfile>.lock``)
+    and each process adds only its own increments to its current content.
+
+    Attributes
+    ----------
+    textfile : str
+        The path of the textfile, None if not written.
+    buckets : tuple
+        The upper bounds of the histograms' buckets.
+    """
+
+    def __init__(self, textfile=None, families=None, buckets=DURATION_BUCKETS):
+        self.textfile = str(textfile) if textfile else None
+        self.families = dict(families or METRICS_FAMILIES)
+        self.buckets = tuple(sorted(buckets))
+
+        # name: {labels_key: value},
+        # or {labels_key: [cumulative bucket counts..., sum, count]} for the histograms
+        self._values = {name: dict() for name in self.families}
+        # the values already in the textfile, see write_textfile
+        self._values_synced = {name: dict() for name in self.families}
+        # functions called before a rendering, to update the gauges
+        self._collectors = []
+        self._lock = threading.RLock()
+        self._server = None
+
+    def __repr__(self):
+        return "MetricsRegistry: {} families, textfile: {}".format(
+            len(self.families), self.textfile
+        )
+
+    def _check(self, name, typ):
+        if name not in self.families:
+            raise KeyError("unknown metric: {}".format(name))
+        if self.families[name][0] != typ:
+            raise TypeError("{} is not a {}".format(name, typ))
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increments a counter.
+
+        Parameters
+        ----------
+        name : str
+            The counter's name.
+        value : float, optional
+            The increment (must be positive). Default is 1.
+        **labels
+            The labels (e.g. site, step).
+
+        Returns
+        -------
+        None
+        """
+        self._check(name, "counter")
+        if not value:
+            return None
+        key = _labels_key(labels)
+        with self._lock:
+            self._values[name][key] = self._values[name].get(key, 0) + value
+        return None
+
+    def set(self, name, value, **labels):
+        """
+        Sets a gauge.
+
+        Parameters
+        ----------
+        name : str
+            The gauge's name.
+        value : float
+            The value.
+        **labels
+            The labels (e.g. site, step).
+
+        Returns
+        -------
+        None
+        """
+        self._check(name, "gauge")
+        with self._lock:
+            self._values[name][_labels_key(labels)] = value
+        return None
+
+    def observe(self, name, value, **labels):
+        """
+        Adds an observation to a histogram.
+
+        Parameters
+        ----------
+        name : str
+            The histogram's name.
+        value : float
+            The observed value.
+        **labels
+            The labels (e.g. site, step).
+
+        Returns
+        -------
+        None
+        """
+        self._check(name, "histogram")
+        key = _labels_key(labels)
+        with self._lock:
+            hist = self._values[name].setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[i] += 1
+            hist[-2] += value
+            hist[-1] += 1
+        return None
+
+    def add_collector(self, collector_fct):
+        """
+        Adds a function called before each rendering (e.g. to update a gauge).
+        The function is called with the registry as argument.
+
+        Parameters
+        ----------
+        collector_fct : callable
+            The collector function.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._collectors.append(collector_fct)
+        return None
+
+    def render(self):
+        """
+        Renders the metrics in the Prometheus text format.
+
+        Returns
+        -------
+        str
+            The metrics.
+        """
+        for collector_fct in list(self._collectors):
+            try:
+                collector_fct(self)
+            except Exception as e:
+                logger.debug("metrics collector %s failed: %s", collector_fct, e)
+
+        lines = []
+        with self._lock:
+            for name, (typ, hlp) in self.families.items():
+                lines.append("# HELP {} {}".format(name, hlp))
+                lines.append("# TYPE {} {}".format(name, typ))
+                for key, val in sorted(self._values[name].items()):
+                    if typ != "histogram":
+                        lines.append(name + _labels_str(key) + " " + _fmt_val(val))
+                        continue
+                    # the buckets' counts are cumulative, the +Inf one is the count
+                    for bound, n in zip(self.buckets + (float("inf"),), val[:-2] + [val[-1]]):
+                        key_le = key + (("le", _fmt_val(float(bound))),)
+                        lines.append(name + "_bucket" + _labels_str(key_le) + " " + str(n))
+                    lines.append(name + "_sum" + _labels_str(key) + " " + _fmt_val(val[-2]))
+                    lines.append(name + "_count" + _labels_str(key) + " " + str(val[-1]))
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _textfile_lock(path, exclusive=True):
+        """
+        internal context manager, locks a textfile against the other
+        processes (with a '<path>.lock' file, ignored by the node_exporter)
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as flock:
+            fcntl.flock(flock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(flock, fcntl.LOCK_UN)
+
+    def _parse_textfile(self, path):
+        """
+        internal function, reads the samples of a textfile, with the
+        structure of ``_values``
+        """
+        values = {name: dict() for name in self.families}
+        bounds_str = [_fmt_val(float(b)) for b in self.buckets]
+        with open(path) as f:
+            for line in f:
+                m = _SAMPLE_REGEX.match(line)
+                if not m:
+                    continue
+                name, lbl_str, val = m.groups()
+                labels = dict(_LABEL_REGEX.findall(lbl_str or ""))
+                val = float(val)
+
+                if self.families.get(name, ("",))[0] in ("counter", "gauge"):
+                    values[name][_labels_key(labels)] = val
+                    continue
+
+                for suffix in ("_bucket", "_sum", "_count"):
+                    fam = name[: -len(suffix)]
+                    if name.endswith(suffix) and self.families.get(fam, ("",))[0] == "histogram":
+                        break
+                else:
+                    continue
+
+                le = labels.pop("le", None)
+                hist = values[fam].setdefault(
+                    _labels_key(labels), [0] * (len(self.buckets) + 2)
+                )
+                if suffix == "_sum":
+                    hist[-2] = val
+                elif suffix == "_count":
+                    hist[-1] = int(val)
+                elif le in bounds_str:
+                    hist[bounds_str.index(le)] = int(val)
+
+        return values
+
+    def _merge_textfile(self, values_file):
+        """
+        internal function, merges the values of the textfile (written by
+        any process) with the increments of this process since its last write.
+        Must be called with the lock of the textfile.
+        """
+        for name, (typ, _) in self.families.items():
+            vals_cur = self._values[name]
+            vals_syn = self._values_synced[name]
+            vals_new = dict(values_file.get(name, {}))
+            for key, val in vals_cur.items():
+                if typ == "counter":
+                    vals_new[key] = vals_new.get(key, 0) + val - vals_syn.get(key, 0)
+                elif typ == "histogram":
+                    val_syn = vals_syn.get(key, [0] * len(val))
+                    val_new = vals_new.get(key, [0] * len(val))
+                    vals_new[key] = [n + v - s for n, v, s in zip(val_new, val, val_syn)]
+                elif key not in vals_syn or vals_syn[key] != val:
+                    # a gauge set by this process
+                    vals_new[key] = val
+            self._values[name] = vals_new
+        self._values_synced = copy.deepcopy(self._values)
+
+    def write_textfile(self, path=None):
+        """
+        Writes the metrics in a file, for the node_exporter's textfile collector.
+        The file is written then renamed, a scraper never reads a partial file.
+
+        The file is locked during the write, and its current content
+        (e.g. written by another process) is reloaded: only the increments
+        of this process since its last write are added to its counters
+        and histograms.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the file (should end with '.prom').
+            Default is the textfile attribute.
+
+        Returns
+        -------
+        str or None
+            The path of the file, None if no path is defined.
+        """
+        path = path or self.textfile
+        if not path:
+            return None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with self._textfile_lock(path):
+            values_file = self._parse_textfile(path) if os.path.isfile(path) else {}
+            with self._lock:
+                self._merge_textfile(values_file)
+                with open(tmp_path, "w") as f:
+                    f.write(self.render())
+            os.replace(tmp_path, path)
+        return path
+
+    def load_textfile(self, path=None):
+        """
+        Reloads the metrics of a previous textfile:
+        the counters and the histograms are then cumulative over the runs,
+        and the gauges of the steps not run are kept.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the file. Default is the textfile attribute.
+
+        Returns
+        -------
+        int
+            The number of reloaded metrics (labelled values).
+        """
+        path = path or self.textfile
+        if not path or not os.path.isfile(path):
+            return 0
+
+        with self._textfile_lock(path, exclusive=False):
+            values_file = self._parse_textfile(path)
+
+        n_load = 0
+        with self._lock:
+            for name, vals in values_file.items():
+                self._values[name].update(vals)
+                n_load += len(vals)
+            # the reloaded values are already in the textfile
+            self._values_synced = copy.deepcopy(self._values)
+
+        logger.debug("%i metrics reloaded from %s", n_load, path)
+        return n_load
+
+    def serve(self, port, addr="127.0.0.1"):
+        """
+        Serves the metrics by a local HTTP endpoint (``/metrics``),
+        in a background (daemon) thread.
+
+        Parameters
+        ----------
+        port : int
+            The port of the endpoint.
+        addr : str, optional
+            The address of the endpoint, "" or "0.0.0.0" for all the interfaces.
+            Default is "127.0.0.1" (local scrapers only).
+
+        Returns
+        -------
+        http.server.ThreadingHTTPServer
+            The HTTP server.
+        """
+        if self._server:
+            return self._server
+
+        registry = self
+
+        class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                logger.debug("metrics endpoint: " + fmt, *args)
+
+        self._server = http.server.ThreadingHTTPServer((addr, int(port)), _MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="aro_metrics_http", daemon=True
+        ).start()
+        logger.info("metrics served on http://%s:%i/metrics", addr or "0.0.0.0", int(port))
+        return self._server
+
+    def feed_step(self, step):
+        """
+        Feeds the metrics with a step run (see ``StepGnss.write_metrics``):
+        its files, the durations, bytes and events of its stages
+        (see ``StepTimer``), its duration and its exit code.
+
+        Parameters
+        ----------
+        step : StepGnss
+            The step.
+
+        Returns
+        -------
+        None
+        """
+        labels = dict(site=step.site_id, step=step.get_step_type())
+        timer = step.timer
+
+        ### the per-file durations
+        for irow, recs in dict(timer.rows).items():
+            for stage, rec in recs.items():
+                self.observe(
+                    "autorino_stage_duration_seconds",
+                    rec["wall"],
+                    stage=stage,
+                    **labels,
+                )
+
+        ### the bytes and the events, summed per stage
+        for stage, rec in dict(timer.stages).items():
+            for io in ("in", "out"):
+                self.inc(
+                    "autorino_bytes_total",
+                    rec["bytes_" + io],
+                    stage=stage,
+                    direction=io,
+                    **labels,
+                )
+            self.inc("autorino_retries_total", rec.get("retries", 0), **labels)
+            self.inc("autorino_timeouts_total", rec.get("timeouts", 0), **labels)
+
+        ### the processed files (the rows with a stage record)
+        irows_proc = [irow for irow in timer.rows if irow in step.table.index]
+        ok_out = step.table.loc[irows_proc, "ok_out"].eq(True)
+        self.inc("autorino_files_total", int(ok_out.sum()), status="ok", **labels)
+        self.inc("autorino_files_total", int((~ok_out).sum()), status="failed", **labels)
+
+        ### the step
+        if "total" in timer.stages:
+            self.observe(
+                "autorino_step_duration_seconds", timer.stages["total"]["wall"], **labels
+            )
+        if step.exit_code is not None:
+            self.set("autorino_step_exit_code", step.exit_code, **labels)
+        self.set("autorino_step_last_run_timestamp_seconds", time.time(), **labels)
+
+        return None
+
+
+# the registry shared by all the steps, see get_metrics
+_METRICS = None
+_METRICS_LOCK = threading.Lock()
+
+
+def get_metrics(textfile=None, http_port=None, http_addr=None):
+    """
+    Returns the metrics registry shared by all the steps.
+
+    The metrics are enabled by the ``metrics_textfile`` and/or the
+    ``metrics_http_port`` (with ``metrics_http_addr``) values of the 'general' section
+    of the environment file (or by this function's arguments, which override them).
+    The first call creates the registry, reloads the textfile
+    and starts the HTTP endpoint.
+
+    Parameters
+    ----------
+    textfile : str, optional
+        The path of the textfile (e.g. in the node_exporter's textfile directory).
+        Default is None (environment file's value).
+    http_port : int, optional
+        The port of the local HTTP endpoint. Default is None (environment file's value).
+    http_addr : str, optional
+        The address of the local HTTP endpoint.
+        Default is None (environment file's value, "127.0.0.1" if not set).
+
+    Returns
+    -------
+    MetricsRegistry or None
+        The metrics registry, None if the metrics are disabled.
+    """
+    global _METRICS
+    with _METRICS_LOCK:
+        if _METRICS is not None:
+            return _METRICS
+
+        env_gen = aroenv.ARO_ENV_DIC["general"]
+        textfile = textfile or env_gen.get("metrics_textfile")
+        http_port = http_port or env_gen.get("metrics_http_port")
+        http_addr = http_addr or env_gen.get("metrics_http_addr") or "127.0.0.1"
+        if not textfile and not http_port:
+            return None
+
+        _METRICS = MetricsRegistry(textfile=textfile)
+        try:
+            _METRICS.load_textfile()
+        except (OSError, ValueError) as e:
+            logger.warning("unable to reload the metrics of %s: %s", textfile, e)
+        if http_port:
+            try:
+                _METRICS.serve(http_port, addr=http_addr)
+            except OSError as e:
+                logger.error(
+                    "unable to serve the metrics on %s:%s: %s", http_addr, http_port, e
+                )
+
+    return _METRICS
@@ -10,6 +10,7 @@ import copy
 
 import os
 import re
+import sqlite3
 import time
 from pathlib import Path
 from filelock import FileLock, Timeout
@@ -153,6 +154,8 @@ class StepGnss:
         self.tmp_dir_converted = None  # initialized in the next line
         self.tmp_dir_rinexmoded = None  # initialized in the next line
         self.tmp_dir_downloaded = None  # initialized in the next line
+        self.tmp_dir_decmp_cache = None  # initialized in the next line
+        self.tmp_dir_conv_cache = None  # initialized in the next line
         self._init_tmp_dirs_paths()
 
         # generic log must be on request, to avoid nasty effects
@@ -162,6 +165,14 @@ class StepGnss:
         # table log is on request only (for the moment)
         # thus this table_log_path attribute must be initialized as none
         self.table_log_path = None
+        # the persistent ledger of the processed files, set with set_table_log
+        self.table_ledger = None
+        # the buffered writer of the table log, set with set_table_log
+        self.table_log_writer = None
+        # the decompressed files cache, set with get_decmp_cache
+        self.decmp_cache = None
+        # the timing records of the stages, see write_run_report
+        self.timer = arocmn.StepTimer()
 
         #### list to stack temporarily the temporary files before their delete
         self.tmp_rnx_files = []
@@ -268,6 +279,7 @@ class StepGnss:
         * 1-6: various exit codes based on table's inp/out booleans (see exicod_from_tab).
         * 7-: the exit code has been set manually.
           * 7: ping timout error
+          * 8: the step raised an exception (see run_steps)
         """
         if self._exit_code is None:
             self.exicod_from_tab(inplace=True)
@@ -490,6 +502,8 @@ class StepGnss:
         tmp_subdir_conv="030_converted",
         tmp_subdir_rnxmod="040_rinexmoded",
         tmp_subdir_tables="090_tables",
+        tmp_subdir_decmp_cache="025_decmp_cache",
+        tmp_subdir_conv_cache="035_conv_cache",
     ):
         """
         Initializes the temporary directories paths as attribute for the StepGnss object.
@@ -514,6 +528,12 @@ class StepGnss:
             The subdirectory for rinexmoded files. Default is 'rinexmoded'.
         tmp_subdir_tables : str, optional
             The subdirectory for logs. Default is 'logs'.
+        tmp_subdir_decmp_cache : str, optional
+            The subdirectory for the decompressed files cache.
+            Default is '025_decmp_cache'.
+        tmp_subdir_conv_cache : str, optional
+            The subdirectory for the converted files cache.
+            Default is '035_conv_cache'.
 
         Returns
         -------
@@ -525,6 +545,8 @@ class StepGnss:
         self._tmp_dir_converted = os.path.join(self.tmp_dir, tmp_subdir_conv)
         self._tmp_dir_rinexmoded = os.path.join(self.tmp_dir, tmp_subdir_rnxmod)
         self._tmp_dir_tables = os.path.join(self.tmp_dir, tmp_subdir_tables)
+        self._tmp_dir_decmp_cache = os.path.join(self.tmp_dir, tmp_subdir_decmp_cache)
+        self._tmp_dir_conv_cache = os.path.join(self.tmp_dir, tmp_subdir_conv_cache)
 
         # Translation of the paths
         self.tmp_dir_downloaded = self.translate_path(self._tmp_dir_downloaded)
@@ -532,6 +554,8 @@ class StepGnss:
         self.tmp_dir_converted = self.translate_path(self._tmp_dir_converted)
         self.tmp_dir_rinexmoded = self.translate_path(self._tmp_dir_rinexmoded)
         self.tmp_dir_tables = self.translate_path(self._tmp_dir_tables)
+        self.tmp_dir_decmp_cache = self.translate_path(self._tmp_dir_decmp_cache)
+        self.tmp_dir_conv_cache = self.translate_path(self._tmp_dir_conv_cache)
 
         return None
 
@@ -600,6 +624,8 @@ class StepGnss:
 
         # Update the translate_dict attribute of the object
         self.translate_dict = trsltdict
+        # reset the ad hoc site dictionaries (see trslt_dic_siteid)
+        self._trslt_dic_siteid_cache = dict()
 
         return None
 
@@ -637,6 +663,10 @@ class StepGnss:
             self._tmp_dir_rinexmoded, make_dir=True
         )
         self.tmp_dir_tables = self.translate_path(self._tmp_dir_tables, make_dir=True)
+        # the cache dirs are created by the caches themselves
+        # (see get_decmp_cache and ConvertGnss.get_conv_cache)
+        self.tmp_dir_decmp_cache = self.translate_path(self._tmp_dir_decmp_cache)
+        self.tmp_dir_conv_cache = self.translate_path(self._tmp_dir_conv_cache)
 
         return (
             self.tmp_dir_downloaded,
@@ -720,6 +750,56 @@ class StepGnss:
 
         return out_copy
 
+    def copy_mono(self, irow):
+        """
+        Creates a light copy of the current StepGnss object,
+        restricted to a single row of its table.
+
+        This copy is designed for the "on row" methods run concurrently
+        by a pool of workers: the attributes are shared with the current
+        object (shallow copy), but the table and the temporary files lists
+        are its own. The results are merged back with ``merge_mono``.
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+
+        Returns
+        -------
+        StepGnss
+            A shallow copy of the current instance with a one-row table.
+        """
+        out_copy = copy.copy(self)
+        out_copy.table = self.table.loc[[irow]].copy()
+        out_copy.tmp_rnx_files = []
+        out_copy.tmp_decmp_files = []
+
+        return out_copy
+
+    def merge_mono(self, irow, step_mono):
+        """
+        Merges back in the current StepGnss object the row processed by
+        a light copy created with ``copy_mono``.
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+        step_mono : StepGnss
+            The light copy returned by ``copy_mono``.
+
+        Returns
+        -------
+        None
+        """
+        for col in step_mono.table.columns:
+            self.table.loc[irow, col] = step_mono.table.loc[irow, col]
+        self.tmp_rnx_files.extend(step_mono.tmp_rnx_files)
+        self.tmp_decmp_files.extend(step_mono.tmp_decmp_files)
+
+        return None
+
     @staticmethod
     def autorino_vers(self):
         """
@@ -850,21 +930,22 @@ class StepGnss:
             )
             return
 
-        for irow, row in self.table.iterrows():
+        epo_srt_lis = []
+        epo_end_lis = []
+        for fpath in self.table["fpath_inp"]:
             if not use_rnx_filename_only:
-                rnx = rimo_cls.RinexFile(row["fpath_inp"])
+                rnx = rimo_cls.RinexFile(fpath)
                 epo_srt = rnx.start_date
                 epo_end = rnx.end_date
             else:
-                epo_srt, epo_end, _ = rimo_api.dates_from_rinex_filename(
-                    row["fpath_inp"]
-                )
+                epo_srt, epo_end, _ = rimo_api.dates_from_rinex_filename(fpath)
 
-            self.table.loc[irow, "epoch_srt"] = epo_srt
-            self.table.loc[irow, "epoch_end"] = epo_end
+            epo_srt_lis.append(epo_srt)
+            epo_end_lis.append(epo_end)
 
-        self.table["epoch_srt"] = pd.to_datetime(self.table["epoch_srt"])
-        self.table["epoch_end"] = pd.to_datetime(self.table["epoch_end"])
+        # the table is updated at once, column-wise
+        self.table["epoch_srt"] = pd.to_datetime(pd.Series(epo_srt_lis, index=self.table.index))
+        self.table["epoch_end"] = pd.to_datetime(pd.Series(epo_end_lis, index=self.table.index))
 
         # update the timezone
         self.updt_epotab_tz(self.epoch_range.tz)
@@ -1043,8 +1124,20 @@ class StepGnss:
         -------
         trsltdict_out : dict
             The updated translation dictionary.
+
+        Notes
+        -----
+        The dictionaries are memoized per site ID, and reset when the
+        main translation dictionary is regenerated with set_translate_dict.
+        They must not be modified in place.
         """
 
+        trslt_cache = getattr(self, "_trslt_dic_siteid_cache", None)
+        if trslt_cache is None:
+            trslt_cache = self._trslt_dic_siteid_cache = dict()
+        if site_id_inp in trslt_cache:
+            return trslt_cache[site_id_inp]
+
         trsltdict_out = self.translate_dict.copy()
 
         site9_use = arocmn.make_site_id9(site_id_inp)
@@ -1063,6 +1156,8 @@ class StepGnss:
             trsltdict_out[s.upper()] = site9_use.upper()
             trsltdict_out[s.lower()] = site9_use.lower()
 
+        trslt_cache[site_id_inp] = trsltdict_out
+
         return trsltdict_out
 
     def translate_core(
@@ -1197,7 +1292,25 @@ class StepGnss:
                 _logger.removeHandler(handler)
         return None
 
-    def set_table_log(self, out_dir=None, step_suffix=""):
+    def set_table_log(self, out_dir=None, step_suffix="", fmt="csv"):
+        """
+        Initializes the table log, the table ledger and their buffered writer.
+
+        Parameters
+        ----------
+        out_dir : str, optional
+            The directory of the table log. Default is the tmp directory.
+        step_suffix : str, optional
+            A suffix for the table log name. Default is "".
+        fmt : str, optional
+            The format of the table log, 'csv' or 'parquet' (requires pyarrow).
+            Default is 'csv'.
+
+        Returns
+        -------
+        str
+            The path of the table log.
+        """
         if not out_dir:
             out_dir = self.tmp_dir
 
@@ -1206,20 +1319,173 @@ class StepGnss:
         talo_path = os.path.join(out_dir, talo_name)
 
         # initalize with a void table
-        talo_df_void = pd.DataFrame([], columns=self.table.columns)
-        talo_df_void.to_csv(talo_path, mode="w", index=False)
+        if fmt != "parquet":
+            talo_df_void = pd.DataFrame([], columns=self.table.columns)
+            talo_df_void.to_csv(talo_path, mode="w", index=False)
 
         # if self.table_log_path:
         self.table_log_path = talo_path
 
+        # the persistent ledger is stored next to the table logs
+        ledger_path = os.path.join(out_dir, "table_ledger.sqlite")
+        try:
+            self.table_ledger = arocmn.TableLedger(ledger_path)
+        except sqlite3.Error as e:
+            logger.error("unable to set the table ledger %s: %s", ledger_path, e)
+            self.table_ledger = None
+
+        # the rows are buffered and written in batch
+        if self.table_log_writer:
+            self.table_log_writer.close()
+        self.table_log_writer = arocmn.TableLogWriter(
+            talo_path, ledger=self.table_ledger, fmt=fmt
+        )
+
         return talo_path
 
     def write_in_table_log(self, row_in):
-        pd.DataFrame(row_in).T.to_csv(
-            self.table_log_path, mode="a", index=False, header=False
-        )
+        """
+        Writes a table row in the table log and the table ledger.
+
+        The row is buffered by the table log writer (see set_table_log),
+        and actually written in batch. Use flush_table_log to force the writing.
+
+        Parameters
+        ----------
+        row_in : pandas.Series
+            The table row.
+
+        Returns
+        -------
+        None
+        """
+        if self.table_log_writer:
+            self.table_log_writer.append(row_in)
         return None
 
+    def flush_table_log(self):
+        """
+        Writes the buffered rows of the table log writer (see set_table_log).
+        Must be called at the end of a step.
+
+        Returns
+        -------
+        None
+        """
+        if self.table_log_writer:
+            self.table_log_writer.flush()
+        return None
+
+    def write_run_report(self, out_dir=None):
+        """
+        Adds the timing of the stages in the table ('time_<stage>' columns,
+        wall time in seconds) and writes the run report of the step as JSON.
+
+        The report contains the step's description, its exit code,
+        and the wall/CPU time and bytes in/out of the stages
+        (see ``StepTimer``), for the whole step and per row.
+
+        Must be called at the end of a step.
+
+        Parameters
+        ----------
+        out_dir : str, optional
+            The directory of the run report. Default is the tables tmp directory.
+
+        Returns
+        -------
+        str or None
+            The path of the run report, None if it can not be written.
+        """
+        if not out_dir:
+            out_dir = self.tmp_dir_tables if self.tmp_dir_tables else self.tmp_dir
+
+        self.timer.to_table(self.table)
+
+        step_type = self.get_step_type()
+        rpt_dic = dict(
+            autorino_version=autorino.__version__,
+            step=step_type,
+            site_id=self.site_id,
+            epoch_range=str(self.epoch_range),
+            exit_code=self.exit_code,
+            n_rows=len(self.table),
+            n_ok_out=int(self.table["ok_out"].eq(True).sum()),
+        )
+        # the rows are labelled with their file name
+        rpt_dic.update(self.timer.report(row_labels=self.table["fname"].to_dict()))
+
+        rpt_name = "_".join(
+            (utils.get_timestamp(), self.site_id, step_type, "run_report.json")
+        )
+        try:
+            rpt_path = arocmn.write_json_report(rpt_dic, os.path.join(out_dir, rpt_name))
+        except OSError as e:
+            logger.error("unable to write the run report in %s: %s", out_dir, e)
+            return None
+
+        logger.debug("run report written: %s (%s)", rpt_path, self.timer)
+        return rpt_path
+
+    def write_metrics(self):
+        """
+        Feeds the metrics of the step (files, bytes, durations of the stages
+        and of the step, retries, timeouts, exit code, see ``MetricsRegistry.feed_step``)
+        and writes the metrics textfile.
+
+        The metrics are enabled in the environment file
+        (``metrics_textfile`` and/or ``metrics_http_port``).
+
+        Must be called at the end of a step, after the 'total' stage.
+
+        Returns
+        -------
+        MetricsRegistry or None
+            The metrics registry, None if the metrics are disabled.
+        """
+        metrics = arocmn.get_metrics()
+        if not metrics:
+            return None
+
+        metrics.feed_step(self)
+        try:
+            metrics.write_textfile()
+        except OSError as e:
+            logger.error("unable to write the metrics textfile %s: %s", metrics.textfile, e)
+
+        return metrics
+
+    def load_prev_ledger(self):
+        """
+        Loads the previous records of the table's input files
+        from the persistent ledger (see set_table_log).
+
+        The output DataFrame can be used with get_vals_prev_tab and filter_prev_tab.
+        It replaces the reload of all the previous table logs
+        (see arocmn.load_previous_tables).
+
+        Returns
+        -------
+        pandas.DataFrame
+            The previous records of the table's input files,
+            an empty DataFrame if the ledger is not set.
+        """
+        if not self.table_ledger:
+            logger.warning("no table ledger set, unable to load previous records")
+            return pd.DataFrame([])
+
+        try:
+            prv_tbl_df = self.table_ledger.query(self.table["fpath_inp"])
+        except sqlite3.Error as e:
+            logger.error("unable to query %s: %s", self.table_ledger, e)
+            prv_tbl_df = pd.DataFrame([])
+
+        logger.debug(
+            "%i/%i files found in the table ledger", len(prv_tbl_df), len(self.table)
+        )
+
+        return prv_tbl_df
+
     #  _______    _     _                                                                    _
     # |__   __|  | |   | |                                                                  | |
     #    | | __ _| |__ | | ___   _ __ ___   __ _ _ __   __ _  __ _  ___ _ __ ___   ___ _ __ | |_
@@ -1434,14 +1700,26 @@ class StepGnss:
 
         flist_all = []
         epolist_all = []
+        # the same directory/regex can be translated for several epochs
+        # (no epoch-dependent part), it is then searched only once
+        flist_dic = dict()
+        # the input tree is scanned once, and the epochs' searches are
+        # resolved against this index
+        fs_index = arocmn.FsIndex()
 
         for epoch in self.epoch_range.eporng_list():
             inp_dir_epo = self.translate_path(self.inp_dir, epoch_inp=epoch)
             inp_file_regex_epo = self.translate_path(
                 self.inp_file_regex, epoch_inp=epoch
             )
-            flist_epo = arocmn.import_files(inp_dir_epo, inp_regex=inp_file_regex_epo)
-            n_files_epo = len(list(flist_epo))
+            if (inp_dir_epo, inp_file_regex_epo) not in flist_dic:
+                flist_dic[(inp_dir_epo, inp_file_regex_epo)] = list(
+                    arocmn.import_files(
+                        inp_dir_epo, inp_regex=inp_file_regex_epo, fs_index=fs_index
+                    )
+                )
+            flist_epo = flist_dic[(inp_dir_epo, inp_file_regex_epo)]
+            n_files_epo = len(flist_epo)
             flist_all.extend(flist_epo)
             epolist_all.extend([epoch] * n_files_epo)
             logger.debug(
@@ -1452,8 +1730,11 @@ class StepGnss:
             )
 
         self.table["fpath_inp"] = flist_all
-        self.table["fname"] = self.table["fpath_inp"].apply(os.path.basename)
-        self.table["ok_inp"] = self.table["fpath_inp"].apply(os.path.isfile)
+        self.table["fname"] = [os.path.basename(f) for f in flist_all]
+        self.table["ok_inp"] = [
+            fs_index.isfile(f) or os.path.isfile(f) for f in flist_all
+        ]
+        logger.debug(fs_index)
         self.table["site"] = self.site_id
 
         if update_epochs:
@@ -1510,15 +1791,16 @@ class StepGnss:
         #     if prev_col in df_merged:
         #         self.table[col] = df_merged[prev_col].combine_first(self.table[col])
 
-        ## less pythonic, more intuitive
+        ## merge-based lookup: for duplicated col_ref entries in
+        ## the previous table, the first occurrence is used
+        df_prev_uniq = df_prev_tab.drop_duplicates(subset=col_ref, keep="first")
+        df_prev_uniq = df_prev_uniq.set_index(col_ref)
+        mask = self.table[col_ref].isin(df_prev_uniq.index)
+
         for col in get_cols:
-            if col in df_prev_tab.columns:
-                mask1 = self.table[col_ref].isin(df_prev_tab[col_ref])
-                matched = self.table.loc[mask1, col_ref]
-                for idx in matched.index:
-                    mask2 = self.table.at[idx, col_ref] == df_prev_tab[col_ref]
-                    prev_value = df_prev_tab.loc[mask2, col].values[0]
-                    self.table.at[idx, col] = prev_value
+            if col in df_prev_uniq.columns:
+                prev_values = self.table.loc[mask, col_ref].map(df_prev_uniq[col])
+                self.table.loc[mask, col] = prev_values
 
         for epocol in ["epoch_srt", "epoch_end"]:
             if epocol in get_cols:
@@ -1564,10 +1846,16 @@ class StepGnss:
             logger.error(f"{warnmsg} (something went wrong)")
             return []
 
-        loc_paths_list = []
-        for irow, row in self.table.iterrows():
-            loc_path = self.mono_guess_rnx(irow, io=io, shortname=shortname)
-            loc_paths_list.append(loc_path)
+        # vectorized version of mono_guess_rnx: the paths are generated
+        # column-wise and the table is updated at once
+        # the file period is computed once per epoch pair
+        prd_memo = dict()
+        loc_paths_list = [
+            self._rnx_path_guess(epo_srt, epo_end, io, shortname, prd_memo)
+            for epo_srt, epo_end in zip(self.table["epoch_srt"], self.table["epoch_end"])
+        ]
+
+        self.table["fpath_" + io] = loc_paths_list
 
         logger.info("nbr local RINEX files guessed: %s", len(loc_paths_list))
 
@@ -1645,10 +1933,19 @@ class StepGnss:
             logging.error("io must be 'inp' or 'out'")
             raise Exception
 
-        for irow, row in self.table.iterrows():
-            loc_file_out = self.mono_chk_local(irow, io=io)
-            if loc_file_out:
-                local_files_list.append(loc_file_out)
+        # vectorized version of mono_chk_local: a single bulk stat pass
+        fpaths = self.table["fpath_" + io]
+        is_init = fpaths.apply(lambda f: isinstance(f, (str, os.PathLike)))
+        fpaths_abs = fpaths[is_init].apply(os.path.abspath)
+
+        sizes = pd.Series(arocmn.files_sizes(list(fpaths_abs)), index=fpaths_abs.index)
+        ok_bool = sizes > 0
+
+        self.table["ok_" + io] = False
+        self.table.loc[ok_bool.index, "ok_" + io] = ok_bool
+        self.table.loc[sizes.index, "size_" + io] = sizes.where(ok_bool)
+
+        local_files_list = list(fpaths_abs[ok_bool])
 
         return local_files_list
 
@@ -1696,7 +1993,35 @@ class StepGnss:
 
         return invalid_local_files_list
 
-    def decompress(self, table_col="fpath_inp", table_ok_col="ok_inp"):
+    def get_decmp_cache(self):
+        """
+        Returns the decompressed files cache of the step (see ``DecmpCache``).
+
+        The cache is stored in the tmp directory, and is thus shared
+        by all the steps (and their sub-objects) using the same tmp directory.
+        Its maximum size (in GB) is the ``decmp_cache_size`` value of the
+        'general' section of the environment file, 0 disables the cache.
+
+        Returns
+        -------
+        DecmpCache or None
+            The cache, None if disabled.
+        """
+        cache_size = aroenv.ARO_ENV_DIC["general"].get("decmp_cache_size", 0)
+        if not cache_size:
+            return None
+
+        cache_dir = self.translate_path(self._tmp_dir_decmp_cache)
+        if not self.decmp_cache or self.decmp_cache.cache_dir != os.path.abspath(
+            cache_dir
+        ):
+            self.decmp_cache = arocmn.DecmpCache(
+                cache_dir, max_bytes=int(cache_size * 1024**3)
+            )
+
+        return self.decmp_cache
+
+    def decompress(self, table_col="fpath_inp", table_ok_col="ok_inp", workers=1):
         """
         decompress the potential compressed files in the ``table_col`` column
         and its corresponding ``table_ok_col`` boolean column
@@ -1709,6 +2034,19 @@ class StepGnss:
         It will create a new column ``fpath_ori`` (for original)
         to keep the trace of the original file
 
+        Parameters
+        ----------
+        table_col : str, optional
+            The column in the table where the paths of the files are stored. Default is 'fpath_inp'.
+        table_ok_col : str, optional
+            The column in the table where the boolean indicating the existence of the files is stored.
+            Default is 'ok_inp'.
+        workers : int, optional
+            The number of processes decompressing the files concurrently
+            (see ``decompress_pool``). 1 (default) is the sequential mode.
+            With more than one process, a calling script must protect
+            its code with ``if __name__ == "__main__":``.
+
         Returns
         -------
         files_decmp_list
@@ -1717,6 +2055,11 @@ class StepGnss:
             the UNcompressed files i.e. ALL the usables ones
 
         """
+        if workers and workers > 1:
+            return self.decompress_pool(
+                workers, table_col=table_col, table_ok_col=table_ok_col
+            )
+
         files_decmp_list = (
             []
         )  #### the DEcompressed files i.e. the one which are temporary and must be removed
@@ -1734,6 +2077,94 @@ class StepGnss:
 
         return files_decmp_list, files_uncmp_list
 
+    def decompress_pool(self, workers, table_col="fpath_inp", table_ok_col="ok_inp"):
+        """
+        decompress the potential compressed files of the table
+        with a pool of processes.
+
+        The files to decompress are selected as in ``mono_decompress``,
+        decompressed concurrently with ``arocmn.decompress_files``,
+        then the table (including the ``fpath_ori`` column)
+        is updated in the main process.
+        A file used by several rows (e.g. a daily RINEX split in hourly files)
+        is decompressed only once.
+
+        Parameters
+        ----------
+        workers : int
+            The number of processes.
+        table_col : str, optional
+            The column in the table where the paths of the files are stored. Default is 'fpath_inp'.
+        table_ok_col : str, optional
+            The column in the table where the boolean indicating the existence of the files is stored.
+            Default is 'ok_inp'.
+
+        Returns
+        -------
+        files_decmp_list
+            the DEcompressed files i.e. the one which are temporary and must be removed
+        files_uncmp_list
+            the UNcompressed files i.e. ALL the usables ones
+            (same content as for ``decompress``)
+        """
+        if hasattr(self, "tmp_dir_unzipped"):
+            out_dir_use = self.tmp_dir_unzipped
+        else:
+            out_dir_use = self.tmp_dir
+
+        bool_ok = self.table["ok_inp"].astype(bool) & self.table[table_ok_col].astype(
+            bool
+        )
+        bool_comp = self.table[table_col].apply(
+            lambda f: isinstance(f, (str, Path)) and arocmn.is_compressed(f)
+        )
+        idx_wrk = self.table.index[bool_ok & bool_comp]
+
+        # each source file is decompressed once, even if used by several rows
+        files_src = list(dict.fromkeys(self.table.loc[idx_wrk, table_col]))
+
+        decmp_cache = self.get_decmp_cache()
+        with self.timer.stage("decompress") as tim:
+            decmp_out = arocmn.decompress_files(
+                files_src,
+                out_dir_use,
+                workers=workers,
+                cache=decmp_cache,
+            )
+            tim["bytes_in"] = sum(arocmn.file_size(f) or 0 for f in files_src)
+            tim["bytes_out"] = sum(arocmn.file_size(f) or 0 for f, _ in decmp_out)
+        decmp_src_dic = dict(zip(files_src, decmp_out))
+        decmp_dic = {
+            irow: decmp_src_dic[self.table.loc[irow, table_col]] for irow in idx_wrk
+        }
+        if decmp_cache and len(idx_wrk) > 0:
+            # the workers' processes have their own counters, a check is done here
+            decmp_cache.evict()
+
+        if len(idx_wrk) > 0 and "fpath_ori" not in self.table.columns:
+            # a 'fpath_ori' column must be created first
+            self.table["fpath_ori"] = None
+
+        files_decmp_list = []
+        files_uncmp_list = []
+
+        for irow in self.table.index:
+            if irow not in decmp_dic:
+                files_uncmp_list.append(None)
+                continue
+
+            file_decmp, bool_decmp = decmp_dic[irow]
+            self.table.loc[irow, "fpath_ori"] = self.table.loc[irow, table_col]
+            self.table.loc[irow, table_col] = file_decmp
+            self.table.loc[irow, "ok_inp"] = os.path.isfile(file_decmp)
+            self.table.loc[irow, "fname"] = os.path.basename(file_decmp)
+
+            files_uncmp_list.append(file_decmp)
+            if bool_decmp and file_decmp not in files_decmp_list:
+                files_decmp_list.append(file_decmp)
+
+        return files_decmp_list, files_uncmp_list
+
     def decompress_table_batch(self, table_col="fpath_inp", table_ok_col="ok_inp"):
         """
         Decompresses the potential compressed files in the specified column of the table.
@@ -1858,7 +2289,11 @@ class StepGnss:
 
         # TEMP decompressed Files
         tmp_decmp_files_new = []
+        decmp_cache = self.get_decmp_cache()
         for f in self.tmp_decmp_files:
+            # the cached files are removed by the cache's eviction only
+            if decmp_cache and decmp_cache.is_cache_file(f):
+                continue
             # we also test if the file is not an original one!
             if "fpath_ori" not in self.table.columns:
                 logger.warning(
@@ -1889,12 +2324,9 @@ class StepGnss:
         """
         Logs a warning for each row in the table where the specified column is not OK.
         """
-        for irow, row in self.table.iterrows():
-            if not self.table.loc[irow, "ok_" + io]:
-                logger.warning(
-                    "file not ok, (missing?): ",
-                    self.table.loc[irow, "fpath_" + io],
-                )
+        not_ok_bool = np.logical_not(self.table["ok_" + io].astype(bool))
+        for f in self.table.loc[not_ok_bool, "fpath_" + io]:
+            logger.warning("file not ok, (missing?): %s", f)
 
     #  ______ _ _ _              _        _     _
     # |  ____(_) | |            | |      | |   | |
@@ -1924,25 +2356,18 @@ class StepGnss:
         list
             The list of filtered raw files.
         """
-        flist_out = []
-        ok_inp_bool_stk = []
-        nfil = 0
-        for irow, row in self.table.iterrows():
-            f = row["fname"]
-            boolbad = utils.patterns_in_string_checker(f, *keywords_path_excl)
-            if boolbad:
-                self.table.loc[irow, "ok_inp"] = False
-                logger.debug("file filtered, contains an excluded keyword: %s", f)
-                nfil += 1
-            else:
-                if not row.ok_inp:  # ok_inp is already false
-                    ok_inp_bool_stk.append(False)
-                else:
-                    ok_inp_bool_stk.append(True)
-                    flist_out.append(f)
+        bad_bool = self.table["fname"].apply(
+            lambda f: bool(utils.patterns_in_string_checker(f, *keywords_path_excl))
+        )
+        nfil = int(bad_bool.sum())
+        for f in self.table.loc[bad_bool, "fname"]:
+            logger.debug("file filtered, contains an excluded keyword: %s", f)
 
         # final replace of ok init
-        self.table["ok_inp"] = ok_inp_bool_stk
+        self.table["ok_inp"] = np.logical_and(
+            self.table["ok_inp"].astype(bool), np.logical_not(bad_bool)
+        )
+        flist_out = list(self.table.loc[self.table["ok_inp"], "fname"])
 
         logger.info("%6i files filtered, their paths contain bad keywords", nfil)
         return flist_out
@@ -2501,14 +2926,16 @@ class StepGnss:
 
         frnx = self.table.loc[irow, table_col]
 
-        try:
-            frnxmod = rimo_api.rinexmod(
-                frnx, out_dir_use, **rinexmod_options_use
-            )
-        except Exception as e:
-            logger.error("Error for: %s", frnx)
-            logger.exception("Exception raised: %s", e)
-            frnxmod = None
+        with self.timer.stage("rinexmod", irow, fpath_inp=frnx) as tim:
+            try:
+                frnxmod = rimo_api.rinexmod(
+                    frnx, out_dir_use, **rinexmod_options_use
+                )
+            except Exception as e:
+                logger.error("Error for: %s", frnx)
+                logger.exception("Exception raised: %s", e)
+                frnxmod = None
+            tim["bytes_out"] = arocmn.file_size(frnxmod)
 
         if frnxmod:
             ### update table if things go well
@@ -2603,9 +3030,11 @@ class StepGnss:
 
         file_to_mv = self.table.loc[irow, table_col]
         ### vvvvv HERE IS THE MOVE
-        file_moved = arocmn.move_copy_core(
-            file_to_mv, outdir_trsl, copy_only=copy_only, force=force
-        )
+        with self.timer.stage("move", irow, fpath_inp=file_to_mv) as tim:
+            file_moved = arocmn.move_copy_core(
+                file_to_mv, outdir_trsl, copy_only=copy_only, force=force
+            )
+            tim["bytes_out"] = arocmn.file_size(file_moved)
         ### ^^^^^ HERE IS THE MOVE
         self.mono_mv_validat(irow, file_moved=file_moved, table_col=table_col)
 
@@ -2643,9 +3072,11 @@ class StepGnss:
         file_src = self.table.loc[irow, "fpath_inp"]
         file_des = self.table.loc[irow, "fpath_out"]
         ### vvvvv HERE IS THE MOVE
-        file_moved = arocmn.move_copy_core(
-            file_src, file_des, copy_only=copy_only, force=force
-        )
+        with self.timer.stage("move", irow, fpath_inp=file_src) as tim:
+            file_moved = arocmn.move_copy_core(
+                file_src, file_des, copy_only=copy_only, force=force
+            )
+            tim["bytes_out"] = arocmn.file_size(file_moved)
         ### ^^^^^ HERE IS THE MOVE
         self.mono_mv_validat(irow, file_moved=file_moved, table_col="fpath_out")
         return file_moved
@@ -2718,6 +3149,8 @@ class StepGnss:
         -------
         str, bool
             The path of the decompressed file and a boolean indicating whether the file was decompressed.
+            If the decompressed files cache is enabled (see ``get_decmp_cache``),
+            the boolean is False, since the cached file is not a temporary file.
         """
         if not self.table.loc[irow, "ok_inp"]:
             # logger.warning(
@@ -2750,9 +3183,19 @@ class StepGnss:
 
             self.table.loc[irow, "fpath_ori"] = self.table.loc[irow, table_col]
 
-            file_decomp_out, bool_decomp_out = arocmn.decompress_file(
-                self.table.loc[irow, table_col], out_dir_use
-            )
+            decmp_cache = self.get_decmp_cache()
+            with self.timer.stage(
+                "decompress", irow, fpath_inp=self.table.loc[irow, table_col]
+            ) as tim:
+                if decmp_cache:
+                    file_decomp_out, bool_decomp_out = decmp_cache.decompress(
+                        self.table.loc[irow, table_col]
+                    )
+                else:
+                    file_decomp_out, bool_decomp_out = arocmn.decompress_file(
+                        self.table.loc[irow, table_col], out_dir_use
+                    )
+                tim["bytes_out"] = arocmn.file_size(file_decomp_out)
             self.table.loc[irow, table_col] = file_decomp_out
             self.table.loc[irow, "ok_inp"] = os.path.isfile(
                 self.table.loc[irow, table_col]
@@ -2803,25 +3246,97 @@ class StepGnss:
         - The guessed file path is stored in the `fpath_<io>` column of the table.
         """
 
-        # Determine the directory based on the `io` parameter
+        loc_path = self._rnx_path_guess(
+            self.table.loc[irow, "epoch_srt"],
+            self.table.loc[irow, "epoch_end"],
+            io,
+            shortname,
+        )
+
+        # Update the table with the guessed file path
+        self.table.loc[irow, "fpath_" + io] = loc_path
+        logger.debug("local RINEX file guessed: %s", loc_path)
+
+        return loc_path
+
+    def _rnx_path_guess(self, epo_srt, epo_end, io="out", shortname=False, prd_memo=None):
+        """
+        Generates the local RINEX file path for a given epoch range,
+        in the input or output directory, translated with the start epoch.
+
+        Internal helper for mono_guess_rnx and guess_local_rnx.
+
+        Parameters
+        ----------
+        epo_srt : datetime or pandas.Timestamp
+            The start epoch of the file.
+        epo_end : datetime or pandas.Timestamp
+            The end epoch of the file.
+        io : str, optional
+            The directory, input (`inp`) or output (`out`). Default is `out`.
+        shortname : bool, optional
+            If True, generates a short RINEX name. Default is False.
+        prd_memo : dict, optional
+            A memo of the file periods per epoch range, shared by the calls
+            of a loop. Default is None.
+
+        Returns
+        -------
+        str
+            The RINEX file path.
+
+        Raises
+        ------
+        Exception
+            If the `io` parameter is not `inp` or `out`.
+        """
         if io not in ["inp", "out"]:
             logging.error("io must be 'inp' or 'out'")
             raise Exception
 
         loc_dir = str(self.out_dir if io == "out" else self.inp_dir)
 
-        # Retrieve the start and end epochs for the specified row
-        epo_srt = self.table.loc[irow, "epoch_srt"].to_pydatetime()
-        epo_end = self.table.loc[irow, "epoch_end"].to_pydatetime()
-
         # Remove timezone information to ensure compatibility with `rinexmod`
-        epo_srt = epo_srt.replace(tzinfo=None)
-        epo_end = epo_end.replace(tzinfo=None)
+        epo_srt = pd.Timestamp(epo_srt).to_pydatetime().replace(tzinfo=None)
+        epo_end = pd.Timestamp(epo_end).to_pydatetime().replace(tzinfo=None)
 
         # Determine the file period string based on the epoch range
-        prd_str = rimo_api.file_period_from_timedelta(epo_srt, epo_end)[0]
+        if prd_memo is None:
+            prd_memo = dict()
+        if (epo_srt, epo_end) not in prd_memo:
+            prd_memo[(epo_srt, epo_end)] = rimo_api.file_period_from_timedelta(
+                epo_srt, epo_end
+            )[0]
+        prd_str = prd_memo[(epo_srt, epo_end)]
 
         # Generate the RINEX file name using site and session information
+        loc_fname = self._rnx_fname_guess(epo_srt, prd_str, shortname)
+
+        # Construct the full file path and translate it
+        loc_path0 = os.path.join(loc_dir, loc_fname)
+        return self.translate_path(loc_path0, epoch_inp=epo_srt)
+
+    def _rnx_fname_guess(self, epo_srt, prd_str, shortname=False):
+        """
+        Generates the RINEX file name for a given start epoch and file period,
+        using the site and session information.
+
+        Internal helper for _rnx_path_guess.
+
+        Parameters
+        ----------
+        epo_srt : datetime
+            The start epoch of the file (not timezone aware).
+        prd_str : str
+            The file period string (e.g. '01D').
+        shortname : bool, optional
+            If True, generates a short RINEX name. Default is False.
+
+        Returns
+        -------
+        str
+            The RINEX file name.
+        """
         if not shortname:
             loc_fname = conv.statname_dt2rinexname_long(
                 self.site_id9,
@@ -2837,16 +3352,7 @@ class StepGnss:
         else:
             loc_fname = conv.statname_dt2rinexname(self.site_id9[:4], epo_srt, "d.gz")
 
-        # Construct the full file path and translate it
-        loc_path0 = os.path.join(loc_dir, loc_fname)
-        loc_path = self.translate_path(loc_path0, epoch_inp=epo_srt)
-        loc_fname = os.path.basename(loc_path)
-
-        # Update the table with the guessed file path
-        self.table.loc[irow, "fpath_" + io] = loc_path
-        logger.debug("local RINEX file guessed: %s", loc_path)
-
-        return loc_path
+        return loc_fname
 
     def mono_chk_local(self, irow, io="out"):
         """
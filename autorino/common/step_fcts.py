@@ -113,7 +113,7 @@ def dummy_sess_dic():
     return d
 
 
-def import_files(inp_fil, inp_regex=".*"):
+def import_files(inp_fil, inp_regex=".*", fs_index=None):
     """
     Handles multiple types of input lists and returns a python list of the input.
 
@@ -133,6 +133,10 @@ def import_files(inp_fil, inp_regex=".*"):
     inp_regex : str, optional
         The regular expression used to filter the files when 'inp_fil' is a directory path.
         Default is ".*" which matches any file.
+    fs_index : FsIndex, optional
+        A file system index. If provided, a directory path input is resolved
+        against this index rather than walked again.
+        Default is None.
 
     Returns
     -------
@@ -156,7 +160,10 @@ def import_files(inp_fil, inp_regex=".*"):
     # The input is a directory path, the output is the list of files inside the directory
     elif os.path.isdir(inp_fil):
         # Here we find everything ".*", the regex will be filtered bellow
-        flist = utils.find_recursive(inp_fil, ".*", regex=True)
+        if fs_index is not None:
+            flist = fs_index.find(inp_fil, ".*")
+        else:
+            flist = utils.find_recursive(inp_fil, ".*", regex=True)
     else:
         flist = []
         logger.warning("the filelist is empty")
@@ -176,6 +183,9 @@ def load_previous_tables(log_dir):
     and concatenates them into a single pandas DataFrame. If no such files are found,
     it returns an empty DataFrame and logs a warning.
 
+    Legacy function: the previous values of given files are now
+    queried in the TableLedger (see StepGnss.load_prev_ledger).
+
     Parameters
     ----------
     log_dir : str
@@ -196,7 +206,8 @@ def load_previous_tables(log_dir):
         return pd.DataFrame([])
 
     # Read and concatenate non-empty DataFrames from the found files
-    tab_df_stk = [pd.read_csv(t) for t in tables_files if not pd.read_csv(t).empty]
+    tab_df_stk = [pd.read_csv(t) for t in tables_files]
+    tab_df_stk = [t for t in tab_df_stk if not t.empty]
 
     return pd.concat(tab_df_stk, ignore_index=True) if tab_df_stk else pd.DataFrame([])
 
@@ -309,6 +320,33 @@ def is_ok(val_inp):
         return True
 
 
+def files_sizes(fpaths_inp):
+    """
+    Gets the sizes of a list of files with a single bulk pass of ``os.stat``.
+
+    Parameters
+    ----------
+    fpaths_inp : iterable of str
+        The file paths. Non-string values (e.g. NaN) are accepted.
+
+    Returns
+    -------
+    np.ndarray
+        The file sizes in bytes (as floats).
+        NaN for the missing files or the non-string values.
+    """
+    sizes = np.full(len(fpaths_inp), np.nan)
+    for i, f in enumerate(fpaths_inp):
+        if not isinstance(f, (str, os.PathLike)):
+            continue
+        try:
+            sizes[i] = os.stat(f).st_size
+        except OSError:
+            continue
+
+    return sizes
+
+
 def check_lockfile(lockfile_path):
     """
     Checks the lock status of a specified file.
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:26:51 2026
+
+@author: psakic
+
+This module, steptimer_cls.py, provides a class for the timing
+instrumentation of the steps (wall/CPU time and bytes in/out,
+per stage and per row), and an optional profiler of the steps.
+"""
+
+import collections
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+# the events counted in the current thread, see count_event
+_THREAD_EVENTS = threading.local()
+
+
+def count_event(event, n=1):
+    """
+    Counts an event (e.g. 'retries', 'timeouts') in the current thread.
+
+    The events counted during a stage (see ``StepTimer.stage``)
+    are added to the stage's record, since a stage runs in a single thread.
+
+    Parameters
+    ----------
+    event : str
+        The event's name.
+    n : int, optional
+        The number of events. Default is 1.
+
+    Returns
+    -------
+    None
+    """
+    counts = getattr(_THREAD_EVENTS, "counts", None)
+    if counts is None:
+        counts = _THREAD_EVENTS.counts = collections.Counter()
+    counts[event] += n
+    return None
+
+
+def events_snapshot():
+    """
+    Returns a copy of the events counted in the current thread
+    (see ``count_event``).
+    """
+    return collections.Counter(getattr(_THREAD_EVENTS, "counts", None) or {})
+
+
+def events_since(snapshot, consume=False):
+    """
+    Returns the events counted in the current thread since a snapshot
+    (see ``events_snapshot``).
+    If consume is True, these events are removed from the thread's counts,
+    so they are not counted again by an enclosing stage.
+    """
+    events = events_snapshot() - snapshot
+    if consume:
+        _THREAD_EVENTS.counts = collections.Counter(snapshot)
+    return dict(events)
+
+
+def file_size(fpath):
+    """
+    Returns the size of a file in bytes, None if it does not exist.
+
+    Parameters
+    ----------
+    fpath : str
+        The file path.
+
+    Returns
+    -------
+    int or None
+        The size of the file.
+    """
+    try:
+        return os.path.getsize(str(fpath))
+    except (OSError, TypeError):
+        return None
+
+
+class StepTimer:
+    """
+    A class used to represent the timing records of a step.
+
+    A stage (e.g. 'listing', 'download', 'decompress', 'convert',
+    'rinexmod', 'move') is timed with the ``stage`` context manager,
+    for the whole step or for a row of the table.
+    For each stage, the wall time, the CPU time, the bytes in/out
+    and the events (e.g. retries, timeouts, see ``count_event``)
+    are summed, over the step and per row.
+
+    The CPU time is the one of the calling thread: the external processes
+    (converters, Docker containers...) are not included.
+    A stage with a wall time much larger than its CPU time is thus bound
+    by an external process, the network or the disks.
+
+    The records are thread-safe, the timer is shared by the light copies
+    of a step processing its rows concurrently (see ``StepGnss.copy_mono``).
+
+    Attributes
+    ----------
+    stages : dict
+        The records per stage: n (number of calls), wall, cpu (seconds),
+        bytes_in, bytes_out.
+    rows : dict
+        The records per row (index of the table) and per stage.
+    t_start : float
+        The creation time of the timer (epoch time).
+    """
+
+    # the summed quantities of a record
+    KEYS = ("n", "wall", "cpu", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.stages = dict()
+        self.rows = dict()
+        self.t_start = time.time()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "StepTimer: " + ", ".join(
+            "{} {:.3f}s".format(stg, rec["wall"]) for stg, rec in self.stages.items()
+        )
+
+    def __deepcopy__(self, memo):
+        # a (deep) copy of a StepGnss object is a new step, with its own records
+        # NB: the light copies of copy_mono share the timer
+        return StepTimer()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rec_add(rec_dic, key, wall, cpu, bytes_in, bytes_out, events):
+        rec = rec_dic.setdefault(key, dict.fromkeys(StepTimer.KEYS, 0))
+        rec["n"] += 1
+        rec["wall"] += wall
+        rec["cpu"] += cpu
+        rec["bytes_in"] += bytes_in or 0
+        rec["bytes_out"] += bytes_out or 0
+        for event, n in (events or {}).items():
+            rec[event] = rec.get(event, 0) + n
+
+    def add(
+        self,
+        stage,
+        wall,
+        cpu=0.0,
+        bytes_in=None,
+        bytes_out=None,
+        irow=None,
+        events=None,
+    ):
+        """
+        Adds a timing record.
+
+        Parameters
+        ----------
+        stage : str
+            The stage's name.
+        wall : float
+            The wall time in seconds.
+        cpu : float, optional
+            The CPU time in seconds. Default is 0.
+        bytes_in : int, optional
+            The bytes read by the stage. Default is None.
+        bytes_out : int, optional
+            The bytes written by the stage. Default is None.
+        irow : int, optional
+            The index of the row in the table, None for a whole-step record.
+            Default is None.
+        events : dict, optional
+            The events counted during the stage. Default is None.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._rec_add(self.stages, stage, wall, cpu, bytes_in, bytes_out, events)
+            if irow is not None:
+                self._rec_add(
+                    self.rows.setdefault(irow, dict()),
+                    stage,
+                    wall,
+                    cpu,
+                    bytes_in,
+                    bytes_out,
+                    events,
+                )
+        return None
+
+    @contextlib.contextmanager
+    def stage(self, stage, irow=None, fpath_inp=None):
+        """
+        Times a stage (context manager).
+
+        The yielded dict can be completed in the ``with`` block
+        with the bytes_in/bytes_out of the stage.
+
+        Parameters
+        ----------
+        stage : str
+            The stage's name.
+        irow : int, optional
+            The index of the row in the table. Default is None.
+        fpath_inp : str, optional
+            The input file of the stage, its size is the bytes_in.
+            Default is None.
+
+        Yields
+        ------
+        dict
+            The bytes_in/bytes_out of the stage.
+        """
+        rec = dict(bytes_in=file_size(fpath_inp) if fpath_inp else None, bytes_out=None)
+        events_srt = events_snapshot()
+        t_wall = time.perf_counter()
+        t_cpu = time.thread_time()
+        try:
+            yield rec
+        finally:
+            self.add(
+                stage,
+                time.perf_counter() - t_wall,
+                time.thread_time() - t_cpu,
+                rec["bytes_in"],
+                rec["bytes_out"],
+                irow,
+                # an event is recorded by the innermost stage only
+                events_since(events_srt, consume=True),
+            )
+
+    def to_table(self, table):
+        """
+        Adds the wall time of each stage in the table, as 'time_<stage>' columns.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame
+            The table of the step.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The table, updated in place.
+        """
+        with self._lock:
+            rows = {irow: dict(recs) for irow, recs in self.rows.items()}
+        for irow, recs in rows.items():
+            if irow not in table.index:
+                continue
+            for stage, rec in recs.items():
+                col = "time_" + stage
+                if col not in table.columns:
+                    table[col] = float("nan")
+                table.loc[irow, col] = round(rec["wall"], 3)
+        return table
+
+    def report(self, row_labels=None):
+        """
+        Returns the timing records as a JSON-serializable dict.
+
+        Parameters
+        ----------
+        row_labels : dict, optional
+            A label (e.g. the file name) per row index. Default is None.
+
+        Returns
+        -------
+        dict
+            The records: stages (per stage) and rows (per row and per stage),
+            with the throughput in MB/s of each stage (mb_s_in, mb_s_out).
+        """
+        row_labels = row_labels or dict()
+
+        def _rec_out(rec):
+            rec_out = dict(rec)
+            rec_out["wall"] = round(rec["wall"], 6)
+            rec_out["cpu"] = round(rec["cpu"], 6)
+            for io in ("in", "out"):
+                if rec["wall"] > 0 and rec["bytes_" + io]:
+                    rec_out["mb_s_" + io] = round(rec["bytes_" + io] / rec["wall"] / 1e6, 3)
+            return rec_out
+
+        with self._lock:
+            return dict(
+                t_start=self.t_start,
+                stages={stg: _rec_out(rec) for stg, rec in self.stages.items()},
+                rows={
+                    str(irow): dict(
+                        label=row_labels.get(irow),
+                        **{stg: _rec_out(rec) for stg, rec in recs.items()},
+                    )
+                    for irow, recs in self.rows.items()
+                },
+            )
+
+
+def write_json_report(report_dic, out_path):
+    """
+    Writes a run report as JSON.
+
+    Parameters
+    ----------
+    report_dic : dict
+        The report.
+    out_path : str
+        The path of the JSON file.
+
+    Returns
+    -------
+    str
+        The path of the JSON file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report_dic, f, indent=1, default=str)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+@contextlib.contextmanager
+def step_profiler(out_path_prefix, profiler=None):
+    """
+    Profiles a block of code (context manager).
+
+    The profiler is set by ``profiler`` in the 'general' section of the
+    environment file:
+    * "" (default): no profiling,
+    * "cprofile": a cProfile statistics file ``<out_path_prefix>.prof``
+      (to be read with pstats or snakeviz),
+    * "pyinstrument": a pyinstrument HTML report ``<out_path_prefix>.html``
+      (requires pyinstrument, cProfile is used otherwise).
+
+    NB: cProfile only profiles the calling thread, not the workers' threads
+    (pyinstrument does).
+
+    Parameters
+    ----------
+    out_path_prefix : str
+        The path of the profile report, without extension.
+    profiler : str, optional
+        The profiler, overrides the environment file's value. Default is None.
+
+    Yields
+    ------
+    None
+    """
+    if profiler is None:
+        profiler = aroenv.ARO_ENV_DIC["general"].get("profiler", "")
+    profiler = str(profiler or "").lower()
+
+    if not profiler:
+        yield None
+        return
+
+    if profiler == "pyinstrument":
+        try:
+            import pyinstrument
+        except ImportError:
+            logger.warning("pyinstrument not installed, cProfile is used")
+            profiler = "cprofile"
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path_prefix)), exist_ok=True)
+
+    if profiler == "pyinstrument":
+        prof = pyinstrument.Profiler()
+        prof.start()
+        try:
+            yield None
+        finally:
+            prof.stop()
+            out_path = out_path_prefix + ".html"
+            with open(out_path, "w") as f:
+                f.write(prof.output_html())
+            logger.info("profile report written: %s", out_path)
+    else:
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield None
+        finally:
+            prof.disable()
+            out_path = out_path_prefix + ".prof"
+            prof.dump_stats(out_path)
+            logger.info("profile report written: %s", out_path)
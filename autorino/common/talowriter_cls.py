@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:41:26 2026
+
+@author: psakic
+
+This module, talowriter_cls.py, provides a class for a buffered writer
+of the table logs (and of the table ledger).
+"""
+
+import atexit
+import functools
+import signal
+import threading
+import time
+import weakref
+
+import pandas as pd
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+# the active writers, flushed at exit or on a termination signal
+_ACTIVE_WRITERS = weakref.WeakSet()
+_EXIT_HOOKS_SET = False
+# a signal received during a flush, handled at the end of the flush
+_PENDING_SIGNAL = None
+
+
+def _flush_all_writers():
+    for writer in list(_ACTIVE_WRITERS):
+        try:
+            writer.flush()
+        except Exception as e:
+            logger.error("unable to flush %s: %s", writer, e)
+
+
+def _flushing_in_thread():
+    """
+    Returns True if a writer is being flushed by the current thread.
+    """
+    ident = threading.get_ident()
+    return any(w._flush_owner == ident for w in list(_ACTIVE_WRITERS))
+
+
+def _signal_handler(sig, frame, prev_handler):
+    """
+    Flushes the active writers, then calls the previous signal handler,
+    or exits with the code 128 + sig (the atexit hooks are then run,
+    e.g. the stop of the persistent Docker containers).
+
+    If the signal interrupts a flush of the same thread, the buffer is not
+    written twice: the signal is handled at the end of this flush.
+    """
+    global _PENDING_SIGNAL
+    if _flushing_in_thread():
+        _PENDING_SIGNAL = (sig, frame, prev_handler)
+        return None
+
+    _flush_all_writers()
+    if callable(prev_handler):
+        prev_handler(sig, frame)
+    else:
+        raise SystemExit(128 + sig)
+    return None
+
+
+def _handle_pending_signal():
+    global _PENDING_SIGNAL
+    if _PENDING_SIGNAL is None or _flushing_in_thread():
+        return None
+    sig, frame, prev_handler = _PENDING_SIGNAL
+    _PENDING_SIGNAL = None
+    _signal_handler(sig, frame, prev_handler)
+    return None
+
+
+def _set_exit_hooks():
+    """
+    Installs (once) the hooks flushing the active writers at the
+    interpreter exit and on SIGTERM/SIGHUP.
+    The previous signal handlers are called after the flush.
+    An ignored signal (e.g. SIGHUP under nohup) is left ignored.
+    """
+    global _EXIT_HOOKS_SET
+    if _EXIT_HOOKS_SET:
+        return None
+
+    atexit.register(_flush_all_writers)
+
+    for signum in (signal.SIGTERM, signal.SIGHUP):
+        try:
+            prev_handler = signal.getsignal(signum)
+            if prev_handler == signal.SIG_IGN:
+                continue
+            signal.signal(
+                signum,
+                functools.partial(_signal_handler, prev_handler=prev_handler),
+            )
+        except (ValueError, OSError):
+            # signal handlers can be set in the main thread only
+            pass
+
+    _EXIT_HOOKS_SET = True
+    return None
+
+
+class TableLogWriter:
+    """
+    A class used to represent a buffered writer of a table log.
+
+    The rows are stored in memory and written in batch (a single append
+    of the table log, and a single transaction in the table ledger) when:
+    * the number of buffered rows reaches max_rows,
+    * the oldest buffered row is older than max_delay seconds
+      (checked when a row is appended: there is no background timer,
+      the last rows of a step are written by its final flush),
+    * the writer is flushed or closed (at the end of a step),
+    * the interpreter exits (also after an exception),
+      or a SIGTERM/SIGHUP signal is received.
+
+    The writer is thread-safe, and is shared by the copies
+    of the StepGnss object.
+
+    Attributes
+    ----------
+    path : str
+        The path of the table log.
+    ledger : TableLedger or None
+        The table ledger also fed with the rows.
+    max_rows : int
+        The maximum number of buffered rows.
+    max_delay : float
+        The maximum delay in seconds before the buffered rows are written,
+        checked when a row is appended.
+    fmt : str
+        The format of the table log, 'csv' (default) or 'parquet'.
+        The 'parquet' format requires pyarrow, and writes one part file
+        per flush (``<path>.<n>.parquet``).
+    """
+
+    def __init__(self, path, ledger=None, max_rows=100, max_delay=30, fmt="csv"):
+        self.path = str(path)
+        self.ledger = ledger
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.fmt = fmt
+
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._t_first = None
+        self._n_parts = 0
+        # the thread flushing the writer, against a re-entrant flush
+        self._flush_owner = None
+
+        if self.fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                logger.warning("pyarrow not installed, table log written as CSV")
+                self.fmt = "csv"
+
+        _ACTIVE_WRITERS.add(self)
+        _set_exit_hooks()
+
+    def __repr__(self):
+        return "TableLogWriter: {} ({} buffered rows)".format(
+            self.path, len(self._buffer)
+        )
+
+    def __deepcopy__(self, memo):
+        # the writer is shared by the copies of the StepGnss object
+        return self
+
+    def __getstate__(self):
+        # a pickled writer (e.g. sent to another process) is flushed before
+        self.flush()
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_buffer"] = []
+        state["_flush_owner"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+        _ACTIVE_WRITERS.add(self)
+        _set_exit_hooks()
+
+    def append(self, row_in):
+        """
+        Buffers a table row, and writes the buffer if a threshold is reached.
+
+        Parameters
+        ----------
+        row_in : pandas.Series
+            The table row.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._buffer.append(pd.Series(row_in).copy())
+            if self._t_first is None:
+                self._t_first = time.time()
+
+            if (
+                len(self._buffer) >= self.max_rows
+                or time.time() - self._t_first >= self.max_delay
+            ):
+                self.flush()
+
+        return None
+
+    def flush(self):
+        """
+        Writes the buffered rows in the table log and in the table ledger.
+
+        Returns
+        -------
+        int
+            The number of written rows.
+        """
+        with self._lock:
+            # a re-entrant call (e.g. a signal handler interrupting
+            # this flush in the same thread) would write the buffer twice
+            if not self._buffer or self._flush_owner is not None:
+                return 0
+
+            self._flush_owner = threading.get_ident()
+            try:
+                rows_df = pd.DataFrame(self._buffer)
+                n_rows = len(rows_df)
+
+                if self.fmt == "parquet":
+                    part_path = "{}.{:04d}.parquet".format(self.path, self._n_parts)
+                    rows_df.astype(str).to_parquet(part_path, index=False)
+                    self._n_parts += 1
+                else:
+                    rows_df.to_csv(self.path, mode="a", index=False, header=False)
+
+                if self.ledger:
+                    try:
+                        self.ledger.write(rows_df)
+                    except Exception as e:
+                        logger.error("unable to write in %s: %s", self.ledger, e)
+
+                self._buffer = []
+                self._t_first = None
+            finally:
+                self._flush_owner = None
+
+        # a termination signal received during the flush
+        _handle_pending_signal()
+
+        return n_rows
+
+    def close(self):
+        """
+        Flushes the buffered rows, and unregisters the writer from the exit hooks.
+
+        Returns
+        -------
+        None
+        """
+        self.flush()
+        _ACTIVE_WRITERS.discard(self)
+        return None
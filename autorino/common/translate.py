@@ -6,6 +6,8 @@ Created on Thu Jan 25 19:20:22 2024
 @author: psakic
 """
 
+import collections
+import functools
 import os
 import re
 
@@ -39,18 +41,152 @@ def translator(path_inp, translator_dict=None, epoch_inp=None):
     The function first translates any environment variables in the path. If epoch information is provided, it is used
     to translate any strftime aliases in the path. If a translator dictionary is provided, it is used to translate
     any keywords in the path.
+
+    The path template is compiled once into tokens (see _compile_template),
+    and the rendered paths are memoized w.r.t. the template, the epoch and
+    the values of the keywords used in the template (see _render_template).
+    The legacy (uncompiled) internal functions are kept below.
     """
 
-    path_translated = str(path_inp)
-    ### translate the environnement variables
-    path_translated = _translator_env_variables(path_translated)
-    ### translate the epochs
-    if epoch_inp:
-        path_translated = _translator_epoch(path_translated, epoch_inp)
-    ### translate the keywords
+    path_str = str(path_inp)
+    tmpl = _compile_template(path_str)
+
+    ### no alias at all, nothing to translate (fast lane)
+    if not tmpl.keywords and not tmpl.has_env and not (epoch_inp and tmpl.has_time):
+        return path_str
+
+    ### the keywords values used in the template, as a hashable key for the cache
     if translator_dict:
-        path_translated = _translator_keywords(path_translated, translator_dict)
-    return path_translated
+        kw_values = tuple(
+            (k, str(translator_dict[k])) for k in tmpl.keywords if k in translator_dict
+        )
+    else:
+        kw_values = tuple()
+
+    return _render_template(path_str, epoch_inp if epoch_inp else None, kw_values)
+
+
+def translator_cache_clear():
+    """
+    Clears the caches of the compiled and rendered path templates.
+
+    Useful if the environment variables have been modified,
+    since their values are cached with the rendered paths.
+
+    Returns
+    -------
+    None
+    """
+    _compile_template.cache_clear()
+    _render_template.cache_clear()
+    return None
+
+
+##### Compiled templates
+
+# a token is a tuple (type, value), type is one of:
+# * "lit": literal text, with potential strftime aliases
+# * "env": environment variable alias <$VAR>
+# * "hrc": <HOURCHAR> or <hourchar> alias
+# * "kw": autorino keyword alias <KEYWORD>
+_TOKEN_REGEX = re.compile(r"(<[^<>]*>)")
+
+_Template = collections.namedtuple(
+    "_Template", ["tokens", "keywords", "has_env", "has_time"]
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_template(path_inp):
+    """
+    Compiles a path template into a list of tokens.
+
+    The template is parsed once, and the tokens are then rendered
+    for each epoch/keywords set (see _render_template).
+
+    Parameters
+    ----------
+    path_inp : str
+        The input path template.
+
+    Returns
+    -------
+    _Template
+        A named tuple with the tokens, the keywords used in the template,
+        and booleans if the template contains environment variables
+        and time (strftime or hourchar) aliases.
+    """
+    tokens = []
+    keywords = []
+    for chunk in _TOKEN_REGEX.split(path_inp):
+        if not chunk:
+            continue
+        elif not _TOKEN_REGEX.fullmatch(chunk):
+            tokens.append(("lit", chunk))
+        elif chunk.startswith("<$"):
+            tokens.append(("env", chunk[2:-1]))
+        elif chunk in ("<HOURCHAR>", "<hourchar>"):
+            tokens.append(("hrc", chunk))
+        else:
+            tokens.append(("kw", chunk[1:-1]))
+            keywords.append(chunk[1:-1])
+
+    has_env = any(t[0] == "env" for t in tokens)
+    has_time = "%" in path_inp or any(t[0] == "hrc" for t in tokens)
+
+    return _Template(tuple(tokens), tuple(dict.fromkeys(keywords)), has_env, has_time)
+
+
+@functools.lru_cache(maxsize=65536)
+def _render_template(path_inp, epoch_inp, kw_values):
+    """
+    Renders a compiled path template for given epoch and keywords values.
+
+    The results are memoized (LRU cache) w.r.t. the template,
+    the epoch and the keywords values (thus the site).
+
+    Parameters
+    ----------
+    path_inp : str
+        The input path template.
+    epoch_inp : datetime or None
+        The epoch used for the strftime and hourchar aliases.
+    kw_values : tuple
+        The (keyword, value) pairs used for the keywords aliases.
+
+    Returns
+    -------
+    str
+        The translated path.
+    """
+    tmpl = _compile_template(path_inp)
+    kw_dic = dict(kw_values)
+
+    def _strftime(txt):
+        if epoch_inp and "%" in txt:
+            return epoch_inp.strftime(txt)
+        else:
+            return txt
+
+    out = []
+    for typ, val in tmpl.tokens:
+        if typ == "lit":
+            out.append(_strftime(val))
+        elif typ == "env":
+            # unknown environment variables remain unchanged
+            out.append(_strftime(os.environ.get(val, "<$" + val + ">")))
+        elif typ == "hrc" and epoch_inp:
+            hourchar = utils.alphabet(epoch_inp.hour)
+            out.append(hourchar.upper() if val == "<HOURCHAR>" else hourchar.lower())
+        elif typ == "hrc":
+            out.append(val)
+        elif val in kw_dic:
+            out.append(kw_dic[val])
+        else:
+            # unknown keywords remain unchanged
+            out.append(_strftime("<" + val + ">"))
+
+    return "".join(out)
 
 
 ##### Internal functions
@@ -2,4 +2,7 @@ from .cnv_fcts import *
 from .cnv_cls import *
 from .cnv_cmd_build import *
 from .cnv_cmd_run import *
+from .cnv_runner_cls import *
+from .cnv_docker_cls import *
+from .cnv_cache_cls import *
 from .cnv_regex import *
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:12:54 2026
+
+@author: psakic
+
+This module, cnv_cache_cls.py, provides a class for a cache of the
+converted (intermediate) RINEX files, keyed by the raw file content
+and by the converter.
+"""
+
+import collections
+import functools
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import autorino.common as arocmn
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+# the size of the chunks read to hash the raw files (1 MiB)
+HASH_CHUNK_SIZE = 1024**2
+# the maximum number of memoized digests (least recently used first dropped)
+HASH_MEMO_SIZE = 10000
+
+
+@functools.lru_cache(maxsize=None)
+def converter_version(converter_name):
+    """
+    Returns a version identifier of a converter.
+
+    The converters have no common way to print their version:
+    the identifier is built from the path, the size and the modification time
+    of the converter's binary (or from the ID of its Docker image for trm2rinex),
+    so an updated converter gives a new identifier.
+    The result is memoized for the process lifetime.
+
+    Parameters
+    ----------
+    converter_name : str
+        The converter's name (a key of ``conv_software_paths``
+        in the environment file).
+
+    Returns
+    -------
+    str
+        The version identifier of the converter.
+    """
+    bin_path = aroenv.ARO_ENV_DIC["conv_software_paths"].get(converter_name, "")
+
+    if converter_name == "trm2rinex":
+        try:
+            import docker
+
+            return docker.from_env().images.get(bin_path).id
+        except Exception as e:
+            logger.debug("unable to get the image ID of %s: %s", bin_path, e)
+            return bin_path
+
+    bin_path_full = shutil.which(bin_path) if bin_path else None
+    if not bin_path_full:
+        return bin_path
+
+    st = os.stat(bin_path_full)
+    return "|".join((os.path.realpath(bin_path_full), str(st.st_size), str(st.st_mtime_ns)))
+
+
+class ConvCache:
+    """
+    A class used to represent a cache of the converted RINEX files.
+
+    The converted file of a raw file is stored with its usual name in a
+    subdirectory named after a key (``<cache_dir>/<key>/<converted file>``).
+    The key is built from:
+    * the content of the raw file (SHA-1 digest) and its name
+      (the converted file's name derives from it),
+    * the converter's name and version (see ``converter_version``),
+    * the conversion options (e.g. the custom regular expressions).
+
+    A forced conversion (e.g. after a sitelog update) of an unchanged raw file
+    thus reuses the cached converted file, and only the rinexmod and
+    the final move are done again.
+
+    The cache size is limited by a least-recently-used eviction
+    (see ``autorino.common.evict_cache_dir``).
+
+    Attributes
+    ----------
+    cache_dir : str
+        The directory of the cache.
+    max_bytes : int
+        The maximum total size of the cached files in bytes.
+    keep_recent : float
+        The entries used during the last keep_recent seconds are never evicted.
+    n_hits : int
+        The number of cache hits.
+    n_miss : int
+        The number of cache misses.
+    """
+
+    def __init__(self, cache_dir, max_bytes=50 * 1024**3, keep_recent=3600):
+        self.cache_dir = os.path.abspath(str(cache_dir))
+        self.max_bytes = max_bytes
+        self.keep_recent = keep_recent
+        self.n_hits = 0
+        self.n_miss = 0
+        self._bytes_added = 0
+        # the content digests of the raw files (LRU), see content_hash
+        self._hash_memo = collections.OrderedDict()
+        self._hash_lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __repr__(self):
+        return "ConvCache: {} ({} hits, {} misses)".format(
+            self.cache_dir, self.n_hits, self.n_miss
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_hash_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._hash_lock = threading.Lock()
+
+    def content_hash(self, raw_fpath):
+        """
+        Returns the SHA-1 digest of the content of a raw file.
+        The digest is memoized w.r.t. the path, size and modification time
+        of the file, so a file is read only once.
+        The memo keeps the HASH_MEMO_SIZE most recently used digests,
+        so it stays bounded in a long-running process (daemon mode).
+
+        Parameters
+        ----------
+        raw_fpath : str
+            The raw file.
+
+        Returns
+        -------
+        str
+            The hexadecimal SHA-1 digest.
+        """
+        st = os.stat(raw_fpath)
+        memo_key = (os.path.realpath(raw_fpath), st.st_size, st.st_mtime_ns)
+        with self._hash_lock:
+            if memo_key in self._hash_memo:
+                self._hash_memo.move_to_end(memo_key)
+                return self._hash_memo[memo_key]
+
+        sha = hashlib.sha1()
+        with open(raw_fpath, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._hash_lock:
+            self._hash_memo[memo_key] = digest
+            while len(self._hash_memo) > HASH_MEMO_SIZE:
+                self._hash_memo.popitem(last=False)
+        return digest
+
+    def key(self, raw_fpath, converter_name, options=None):
+        """
+        Returns the key of a conversion.
+
+        Parameters
+        ----------
+        raw_fpath : str
+            The raw file.
+        converter_name : str
+            The converter's name.
+        options : optional
+            The conversion options, any object with a stable ``repr``.
+            Default is None.
+
+        Returns
+        -------
+        str
+            The key (hexadecimal SHA-1 digest).
+        """
+        key_str = "|".join(
+            (
+                self.content_hash(raw_fpath),
+                os.path.basename(raw_fpath),
+                str(converter_name),
+                converter_version(converter_name),
+                repr(options),
+            )
+        )
+        return hashlib.sha1(key_str.encode()).hexdigest()
+
+    def is_cache_file(self, file_inp):
+        """
+        Checks if a path is stored in the cache.
+
+        Parameters
+        ----------
+        file_inp : str
+            The file path.
+
+        Returns
+        -------
+        bool
+            True if the file is in the cache directory.
+        """
+        if not file_inp:
+            return False
+        return os.path.abspath(str(file_inp)).startswith(self.cache_dir + os.sep)
+
+    def get(self, raw_fpath, converter_name, out_dir, options=None):
+        """
+        Gets the cached converted file of a raw file,
+        and copies it in out_dir.
+
+        Parameters
+        ----------
+        raw_fpath : str
+            The raw file.
+        converter_name : str
+            The converter's name.
+        out_dir : str
+            The directory where the converted file is copied.
+        options : optional
+            The conversion options. Default is None.
+
+        Returns
+        -------
+        str or None
+            The path of the copied converted file, None if not cached.
+        """
+        entry_dir = os.path.join(
+            self.cache_dir, self.key(raw_fpath, converter_name, options)
+        )
+        try:
+            names = os.listdir(entry_dir)
+        except FileNotFoundError:
+            self.n_miss += 1
+            return None
+
+        if len(names) != 1:
+            self.n_miss += 1
+            return None
+
+        # the modification time of the entry is the last use
+        os.utime(entry_dir)
+        os.makedirs(out_dir, exist_ok=True)
+        # a copy, so the cached file is not altered by the next steps
+        conv_fpath = shutil.copy2(
+            os.path.join(entry_dir, names[0]), os.path.join(out_dir, names[0])
+        )
+        self.n_hits += 1
+        logger.info(
+            "✓ conversion skipped, converted file found in cache: %s",
+            os.path.basename(conv_fpath),
+        )
+        return conv_fpath
+
+    def put(self, raw_fpath, converter_name, conv_fpath, options=None):
+        """
+        Stores a converted file in the cache.
+
+        Parameters
+        ----------
+        raw_fpath : str
+            The raw file.
+        converter_name : str
+            The converter's name.
+        conv_fpath : str
+            The converted file (it is copied in the cache).
+        options : optional
+            The conversion options. Default is None.
+
+        Returns
+        -------
+        str
+            The path of the cached file.
+        """
+        key = self.key(raw_fpath, converter_name, options)
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        # copied in a temporary entry, then renamed: another process
+        # storing the same file at the same time can not see a partial entry
+        tmp_entry = tempfile.mkdtemp(prefix=key + ".", suffix=".part", dir=self.cache_dir)
+        try:
+            shutil.copy2(conv_fpath, tmp_entry)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.rename(tmp_entry, entry_dir)
+            except OSError:
+                # stored meanwhile by another process
+                pass
+        finally:
+            if os.path.isdir(tmp_entry):
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+
+        file_cached = os.path.join(entry_dir, os.path.basename(conv_fpath))
+        self._bytes_added += os.path.getsize(conv_fpath)
+        if self._bytes_added > 0.05 * self.max_bytes:
+            self.evict()
+
+        return file_cached
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the total size
+        of the cache is below max_bytes.
+
+        Returns
+        -------
+        int
+            The number of removed entries.
+        """
+        self._bytes_added = 0
+        n_evict = arocmn.evict_cache_dir(self.cache_dir, self.max_bytes, self.keep_recent)
+
+        if n_evict:
+            logger.debug("%i entries evicted from %s", n_evict, self)
+
+        return n_evict
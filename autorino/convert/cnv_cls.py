@@ -6,6 +6,10 @@ Created on Fri Apr  7 12:07:18 2023
 @author: psakic
 """
 
+import concurrent.futures
+import math
+import os
+import time
 from pathlib import Path
 
 import numpy as np
@@ -118,6 +122,9 @@ class ConvertGnss(arocmn.StepGnss):
             metadata=metadata,
         )
 
+        # the converted files cache, set with get_conv_cache
+        self.conv_cache = None
+
     ###############################################
 
     def convert(
@@ -129,6 +136,9 @@ class ConvertGnss(arocmn.StepGnss):
         filter_prev_tables=False,
         conv_regex_custom_main=None,
         conv_regex_custom_annex=None,
+        workers=1,
+        decompress_workers=1,
+        batch_size=1,
     ):
         """
         "total action" method
@@ -156,7 +166,7 @@ class ConvertGnss(arocmn.StepGnss):
             Default is 'auto'.
         filter_prev_tables : bool, optional
             If True, filters and skip previously converted files
-            with tables stored in the tmp tables directory.
+            with the table ledger stored in the tmp tables directory.
             Default is False.
         conv_regex_custom_main : str, optional
             A custom regular expression to catch the main converted file.
@@ -166,6 +176,25 @@ class ConvertGnss(arocmn.StepGnss):
             A custom regular expression to catch naming the annex converted file.
             If not specified, no custom regex is used.
             Default is None.
+        workers : int, optional
+            The number of rows processed concurrently
+            (conversion, rinexmod and final move).
+            Each row is processed in its own temporary subdirectory.
+            Default is 1 (sequential processing).
+        decompress_workers : int, optional
+            The number of processes decompressing the input files concurrently
+            before the conversion. If more than 1, the calling script needs
+            a ``if __name__ == "__main__":`` guard (see ``decompress_files``).
+            Default is 1 (sequential decompression).
+        batch_size : int, optional
+            The maximum number of files converted by a single
+            converter process (see ``convert_batch``), for the converters
+            accepting several input files (sbf2rin, mdb2rinex),
+            the other ones being called once per file.
+            Useful for directories of numerous small files,
+            where the process spawn overhead is larger than the conversion itself.
+            With workers > 1, up to workers batches are run concurrently.
+            Default is 1 (one converter process per file).
 
         Returns
         -------
@@ -215,8 +244,8 @@ class ConvertGnss(arocmn.StepGnss):
             self.force("convert")
 
         if filter_prev_tables:
-            logger.debug(f"Loading filter previous tables in: {self.tmp_dir_tables:}")
-            prv_tbl_df = arocmn.load_previous_tables(self.tmp_dir_tables)
+            logger.debug(f"Loading filter previous tables in: {self.table_ledger}")
+            prv_tbl_df = self.load_prev_ledger()
             # Filter previous tables stored in log_dir
             if len(prv_tbl_df) > 0:
                 self.get_vals_prev_tab(prv_tbl_df)
@@ -224,7 +253,7 @@ class ConvertGnss(arocmn.StepGnss):
             # switch ok_inp to False if the output files are already there
             self.filter_ok_out()
 
-        self.tmp_decmp_files, _ = self.decompress()
+        self.tmp_decmp_files, _ = self.decompress(workers=decompress_workers)
 
         # get a table with only the good files (ok_inp == True)
         # table_init_ok must be used only for the following statistics!
@@ -247,87 +276,329 @@ class ConvertGnss(arocmn.StepGnss):
             self.print_table()
 
         ######################### START THE LOOP ##############################
-        for irow, row in self.table.iterrows():
-            fraw = Path(self.table.loc[irow, "fpath_inp"])
-            ext = fraw.suffix.lower()
+        chain_kwargs = dict(
+            site4_list=site4_list,
+            converter=converter,
+            rinexmod_options=rinexmod_options,
+            conv_regex_custom_main=conv_regex_custom_main,
+            conv_regex_custom_annex=conv_regex_custom_annex,
+            force=force,
+        )
 
-            if not self.mono_ok_check(irow, "conversion"):
-                continue
+        try:
+            if batch_size and batch_size > 1:
+                self.convert_batch(batch_size, workers, **chain_kwargs)
+            elif workers and workers > 1:
+                self.convert_workers_pool(workers, **chain_kwargs)
+            else:
+                for irow, row in self.table.iterrows():
+                    frnxtmp = self.mono_convert_chain(irow, **chain_kwargs)
+                    self.tmp_rnx_files.append(frnxtmp)  # list for final remove
+        finally:
+            # the buffered table log rows are written, even if something went wrong
+            self.flush_table_log()
 
-            logger.info(">>>> input raw file for conversion: %s", fraw.name)
+        # ++++ remove temporary files
+        self.remov_tmp_files()
+        if workers and workers > 1:
+            # the rows' tmp subdirs are removed if empty
+            for tmp_dir in (self.tmp_dir_converted, self.tmp_dir_rinexmoded):
+                for d in Path(tmp_dir).glob("row_*"):
+                    if d.is_dir() and not any(d.iterdir()):
+                        d.rmdir()
 
-            ###########################################################################
-            # change the site_id here is a very bad idea, it f*cks the outdir 240605
-            # (the outdir has not the country code anymore)
-            #
-            # but, because of the new IGS update (9 char in sitlog)
-            # it should not be a pb anymore
+        # close the log file
+        self.close_logfile()
 
-            # +++ since the site code from fraw can be poorly formatted
-            # we search it w.r.t. the sites from the metadata
-            # we update the table row and the translate_dic (necessary for the output dir)
-            self.mono_site_upd(irow, site4_list)
-            # set self.site_id for the output dir translation & rinexmod options
-            self.site_id = self.table.loc[irow, "site"]
+        return None
 
-            self.set_translate_dict()
-            ###########################################################################
-            # +++ CONVERTER SELECTION
+    def convert_workers_pool(self, workers, **chain_kwargs):
+        """
+        Runs the conversion chain of the table's rows with a pool of workers.
 
-            if converter != "auto":
-                converter_name_use = converter  # converter is forced
-            else:
-                # ++ do a first converter selection by identifying odd files
-                converter_name_use = arocnv.slct_conv_odd_f(fraw)
-                # NB: converter selection for regular files is done in
-                # autorino.conv_cmd_run._convert_select
+        Each row is processed by a light copy of the ConvertGnss object
+        (see ``copy_mono``), with its own temporary subdirectories
+        (converted & rinexmoded), so the workers do not share any
+        intermediate file nor the translation dictionary.
+        The conversion itself is done by external converters
+        (subprocesses), thus threads are enough to use several cores.
 
-            logger.info("extension/converter: %s/%s", ext, converter_name_use)
+        Once all the rows are processed, the one-row tables are merged back
+        in the main table following the original index order.
 
-            if not converter_name_use:
-                logger.info("file skipped, no converter found: %s", fraw)
-                self.table.loc[irow, "note"] = "no converter found"
-                self.table.loc[irow, "ok_inp"] = False
-                self.write_in_table_log(self.table.loc[irow])
-
-            ## prepare the custom regex function if any
-            # if not, conv_regex_fct_use is None and the default regexs
-            # from autorino.convert.converter_run are set later
-            conv_regex_fct_use = arocnv.prep_rgx_custom(conv_regex_custom_main, conv_regex_custom_annex)
-
-            # ++ a function to stop the docker containers running for too long
-            # (for trimble conversion)
-            arocnv.stop_old_docker()
+        Parameters
+        ----------
+        workers : int
+            The number of rows processed concurrently.
+        **chain_kwargs
+            Keyword arguments passed to ``mono_convert_chain``.
 
-            #############################################################
-            # +++++ CONVERSION
-            frnxtmp = self.mono_convert(
-                irow, self.tmp_dir_converted,
-                converter_inp=converter_name_use,
-                conv_regex_fct_inp=conv_regex_fct_use
+        Returns
+        -------
+        None
+        """
+        logger.info("conversion with a pool of %i workers", workers)
+
+        def _row_worker(irow):
+            stp_row = self.copy_mono(irow)
+
+            row_subdir = "row_" + str(irow)
+            stp_row.tmp_dir_converted = os.path.join(self.tmp_dir_converted, row_subdir)
+            stp_row.tmp_dir_rinexmoded = os.path.join(
+                self.tmp_dir_rinexmoded, row_subdir
             )
+            for d in (stp_row.tmp_dir_converted, stp_row.tmp_dir_rinexmoded):
+                os.makedirs(d, exist_ok=True)
+
+            frnxtmp = stp_row.mono_convert_chain(irow, **chain_kwargs)
+            return stp_row, frnxtmp
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures_dic = {
+                irow: executor.submit(_row_worker, irow) for irow in self.table.index
+            }
+
+        ### deterministic merge, following the table's index order
+        for irow, fut in futures_dic.items():
+            try:
+                stp_row, frnxtmp = fut.result()
+            except Exception as e:
+                logger.error("Error for: %s", self.table.loc[irow, "fpath_inp"])
+                logger.exception("Exception raised: %s", e)
+                self.table.loc[irow, "ok_out"] = False
+                continue
+
+            self.merge_mono(irow, stp_row)
             self.tmp_rnx_files.append(frnxtmp)  # list for final remove
 
-            #############################################################
-            # +++++ RINEXMOD
-            rinexmod_options_use = self.updt_rnxmodopts(
-                rinexmod_options, irow, debug_print=False
+        return None
+
+    def convert_batch(
+        self,
+        batch_size,
+        workers=1,
+        site4_list=None,
+        converter="auto",
+        rinexmod_options=None,
+        conv_regex_custom_main=None,
+        conv_regex_custom_annex=None,
+        force=False,
+    ):
+        """
+        Runs the conversion chain of the table's rows by batches.
+
+        The rows are prepared (site update and converter selection)
+        and grouped by converter. The groups of a converter accepting
+        several input files (see ``CONVERTERS_MULTI_INPUT``) are converted
+        by batches of batch_size files at most, with a single call of the
+        converter per batch (see ``converter_run_batch``). The converted
+        files are mapped back to their rows.
+
+        The other rows, and the rows of a batch without an identified
+        converted file, are converted one by one, concurrently with the
+        batches. The rows are finally rinexmoded and moved, row by row.
+
+        Parameters
+        ----------
+        batch_size : int
+            The maximum number of files per batch.
+            The batches are smaller if needed to keep all the workers busy.
+        workers : int, optional
+            The number of batches or rows converted concurrently. Default is 1.
+        site4_list : list, optional
+            A list of sites from which the site of the raw file is searched.
+        converter : str, optional
+            The converter to be used for the conversion.
+            Default is 'auto'.
+        rinexmod_options : dict, optional
+            A dictionary containing options for the rinexmod process.
+        conv_regex_custom_main : str, optional
+            A custom regular expression to catch the main converted file.
+            If given (with the annex one), the rows are converted one by one.
+        conv_regex_custom_annex : str, optional
+            A custom regular expression to catch the annex converted files.
+        force : bool, optional
+            Force the final move if the output file already exists.
+            Default is False.
+
+        Returns
+        -------
+        None
+        """
+        conv_regex_fct_use = arocnv.prep_rgx_custom(
+            conv_regex_custom_main, conv_regex_custom_annex
+        )
+        conv_cache_opts = (conv_regex_custom_main, conv_regex_custom_annex)
+        frnxtmp_dic = dict()
+        workers = max(1, workers or 1)
+        if site4_list is None:
+            site4_list = []
+
+        ### preparation of the rows, and grouping by converter
+        irows_prep = []
+        groups_dic = dict()
+        for irow in self.table.index:
+            if not self.mono_ok_check(irow, "conversion"):
+                continue
+            irows_prep.append(irow)
+
+            converter_name_use = self.mono_convert_prep(irow, site4_list, converter)
+            if not converter_name_use:
+                continue
+
+            # the rows found in the converted files cache are not converted again
+            frnxtmp = self.mono_conv_cache_get(
+                irow, converter_name_use, self.tmp_dir_converted, conv_cache_opts
             )
+            if frnxtmp:
+                self.mono_convert_upd(irow, frnxtmp)
+                frnxtmp_dic[irow] = frnxtmp
+                continue
 
-            self.mono_rinexmod(
-                irow, self.tmp_dir_rinexmoded,
-                rinexmod_options=rinexmod_options_use
+            fraw = self.table.loc[irow, "fpath_inp"]
+            conv_key = (
+                arocnv.converter_name_select(converter_name_use, fraw),
+                converter_name_use,
             )
-            #############################################################
+            groups_dic.setdefault(conv_key, []).append(irow)
+
+        ### the batches
+        batches = []
+        irows_mono = []
+        for (conv_name, converter_name_use), irows in groups_dic.items():
+            # a custom regex can not map the converted files back to their rows
+            if conv_name not in arocnv.CONVERTERS_MULTI_INPUT or conv_regex_fct_use:
+                irows_mono.extend([(irow, converter_name_use) for irow in irows])
+                continue
+            # the batches are not larger than needed to keep all the workers busy
+            batch_size_use = min(batch_size, math.ceil(len(irows) / workers))
+            for i in range(0, len(irows), batch_size_use):
+                batches.append((converter_name_use, irows[i : i + batch_size_use]))
 
-            # +++++ FINAL MOVE
-            self.mono_mv_final(irow, force=force)
+        logger.info(
+            "conversion of %i files in %i batches (%i files per batch max.), "
+            "%i files converted one by one",
+            sum(len(b[1]) for b in batches),
+            len(batches),
+            batch_size,
+            len(irows_mono),
+        )
 
-        # ++++ remove temporary files
-        self.remov_tmp_files()
+        def _batch_worker(converter_name_use, irows, fpaths_inp):
+            # NB: the table is modified meanwhile by the main thread,
+            # it must not be read here
+            events_srt = arocmn.events_snapshot()
+            t_wall = time.perf_counter()
+            batch_out = arocnv.converter_run_batch(
+                fpaths_inp,
+                self.tmp_dir_converted,
+                converter=converter_name_use,
+            )
+            # the batch's wall time is shared evenly by its converted rows
+            # (the other ones are timed when converted alone),
+            # its events (e.g. a timeout) are recorded with its first row
+            irows_ok = [irow for irow, f in zip(irows, batch_out[0]) if f]
+            wall_row = (time.perf_counter() - t_wall) / max(1, len(irows_ok))
+            events = arocmn.events_since(events_srt)
+            for i, (irow, fpath_inp, frnxtmp) in enumerate(
+                zip(irows, fpaths_inp, batch_out[0])
+            ):
+                if not frnxtmp and not (i == 0 and events):
+                    continue
+                self.timer.add(
+                    "convert",
+                    wall_row if frnxtmp else 0.0,
+                    bytes_in=arocmn.file_size(fpath_inp) if frnxtmp else 0,
+                    bytes_out=arocmn.file_size(frnxtmp),
+                    irow=irow,
+                    events=events if i == 0 else None,
+                )
+            return batch_out
+
+        def _row_worker(stp_row, irow, converter_name_use):
+            # the row is converted by its own light copy of the step
+            docker_pool = arocnv.get_docker_pool(
+                "trm2rinex", aroenv.ARO_ENV_DIC["conv_software_paths"]["trm2rinex"]
+            )
+            if not docker_pool or docker_pool.disabled:
+                arocnv.stop_old_docker()
+            return stp_row.mono_convert(
+                irow,
+                self.tmp_dir_converted,
+                converter_inp=converter_name_use,
+                conv_regex_fct_inp=conv_regex_fct_use,
+                conv_cache_opts=conv_cache_opts,
+            )
 
-        # close the log file
-        self.close_logfile()
+        ### the batches only get their input files (and the thread-safe timer),
+        ### the rows converted one by one get a light copy of the step (see copy_mono),
+        ### not the table, they can run concurrently
+        futures_row = dict()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+
+            def _submit_row(irow, converter_name_use):
+                stp_row = self.copy_mono(irow)
+                futures_row[irow] = (
+                    stp_row,
+                    executor.submit(_row_worker, stp_row, irow, converter_name_use),
+                )
+
+            futures_batch = []
+            for converter_name_use, irows in batches:
+                fpaths_inp = list(self.table.loc[irows, "fpath_inp"])
+                futures_batch.append(
+                    (
+                        converter_name_use,
+                        irows,
+                        executor.submit(
+                            _batch_worker, converter_name_use, irows, fpaths_inp
+                        ),
+                    )
+                )
+
+            for irow, converter_name_use in irows_mono:
+                _submit_row(irow, converter_name_use)
+
+            for converter_name_use, irows, fut in futures_batch:
+                try:
+                    frnxtmp_lis, _ = fut.result()
+                except Exception as e:
+                    logger.error("Error for the batch starting with: %s",
+                                 self.table.loc[irows[0], "fpath_inp"])
+                    logger.exception("Exception raised: %s", e)
+                    frnxtmp_lis = [""] * len(irows)
+
+                for irow, frnxtmp in zip(irows, frnxtmp_lis):
+                    if not frnxtmp:
+                        # not converted by the batch, converted alone
+                        _submit_row(irow, converter_name_use)
+                        continue
+                    self.mono_conv_cache_put(
+                        irow, converter_name_use, frnxtmp, conv_cache_opts
+                    )
+                    self.mono_convert_upd(irow, frnxtmp)
+                    frnxtmp_dic[irow] = frnxtmp
+
+        ### deterministic merge of the rows converted one by one
+        for irow, (stp_row, fut) in futures_row.items():
+            try:
+                frnxtmp_dic[irow] = fut.result()
+            except Exception as e:
+                logger.error("Error for: %s", self.table.loc[irow, "fpath_inp"])
+                logger.exception("Exception raised: %s", e)
+                self.mono_convert_upd(irow, None)
+                continue
+            self.merge_mono(irow, stp_row)
+
+        ### rinexmod and final move, row by row
+        for irow in irows_prep:
+            try:
+                self.mono_convert_post(irow, rinexmod_options, force=force)
+            except Exception as e:
+                logger.error("Error for: %s", self.table.loc[irow, "fpath_inp"])
+                logger.exception("Exception raised: %s", e)
+                self.table.loc[irow, "ok_out"] = False
+            self.tmp_rnx_files.append(frnxtmp_dic.get(irow))  # list for final remove
 
         return None
 
@@ -339,8 +610,194 @@ class ConvertGnss(arocmn.StepGnss):
     # /_/    \_\___|\__|_|\___/|_| |_|___/  \___/|_| |_| |_|  \___/ \_/\_/ |___/
     #
 
+    def mono_convert_chain(
+        self,
+        irow,
+        site4_list,
+        converter="auto",
+        rinexmod_options=None,
+        conv_regex_custom_main=None,
+        conv_regex_custom_annex=None,
+        force=False,
+    ):
+        """
+        "on row" method
+
+        Runs the full conversion chain for a row of the table:
+        site update, converter selection, conversion, rinexmod and final move.
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table to be converted.
+        site4_list : list
+            A list of sites from which the site of the raw file is searched.
+        converter : str, optional
+            The converter to be used for the conversion.
+            Default is 'auto'.
+        rinexmod_options : dict, optional
+            A dictionary containing options for the rinexmod process.
+        conv_regex_custom_main : str, optional
+            A custom regular expression to catch the main converted file.
+        conv_regex_custom_annex : str, optional
+            A custom regular expression to catch the annex converted files.
+        force : bool, optional
+            Force the final move if the output file already exists.
+            Default is False.
+
+        Returns
+        -------
+        str or None
+            The path of the temporary converted file (for the final remove).
+        """
+        if not self.mono_ok_check(irow, "conversion"):
+            return None
+
+        converter_name_use = self.mono_convert_prep(irow, site4_list, converter)
+
+        ## prepare the custom regex function if any
+        # if not, conv_regex_fct_use is None and the default regexs
+        # from autorino.convert.converter_run are set later
+        conv_regex_fct_use = arocnv.prep_rgx_custom(conv_regex_custom_main, conv_regex_custom_annex)
+
+        # ++ a function to stop the docker containers running for too long
+        # (for trimble conversion with one container per file,
+        # the persistent containers have their own health-checked lifecycle)
+        docker_pool = arocnv.get_docker_pool(
+            "trm2rinex", aroenv.ARO_ENV_DIC["conv_software_paths"]["trm2rinex"]
+        )
+        if not docker_pool or docker_pool.disabled:
+            arocnv.stop_old_docker()
+
+        #############################################################
+        # +++++ CONVERSION
+        frnxtmp = self.mono_convert(
+            irow, self.tmp_dir_converted,
+            converter_inp=converter_name_use,
+            conv_regex_fct_inp=conv_regex_fct_use,
+            conv_cache_opts=(conv_regex_custom_main, conv_regex_custom_annex),
+        )
+
+        # +++++ RINEXMOD & FINAL MOVE
+        self.mono_convert_post(irow, rinexmod_options, force=force)
+
+        return frnxtmp
+
+    def mono_convert_prep(self, irow, site4_list, converter="auto"):
+        """
+        "on row" method
+
+        Prepares the conversion of a row of the table:
+        site update and converter selection.
+        The row is skipped (ok_inp = False) if no converter is found.
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table to be converted.
+        site4_list : list
+            A list of sites from which the site of the raw file is searched.
+        converter : str, optional
+            The converter to be used for the conversion.
+            Default is 'auto'.
+
+        Returns
+        -------
+        str or None
+            The name of the converter to be used, None if no converter is found.
+        """
+        fraw = Path(self.table.loc[irow, "fpath_inp"])
+        ext = fraw.suffix.lower()
+
+        logger.info(">>>> input raw file for conversion: %s", fraw.name)
+
+        ###########################################################################
+        # change the site_id here is a very bad idea, it f*cks the outdir 240605
+        # (the outdir has not the country code anymore)
+        #
+        # but, because of the new IGS update (9 char in sitlog)
+        # it should not be a pb anymore
+
+        # +++ since the site code from fraw can be poorly formatted
+        # we search it w.r.t. the sites from the metadata
+        # we update the table row and the translate_dic (necessary for the output dir)
+        self.mono_site_upd(irow, site4_list)
+        # set self.site_id for the output dir translation & rinexmod options
+        self.site_id = self.table.loc[irow, "site"]
+
+        self.set_translate_dict()
+        ###########################################################################
+        # +++ CONVERTER SELECTION
+
+        if converter != "auto":
+            converter_name_use = converter  # converter is forced
+        else:
+            # ++ do a first converter selection by identifying odd files
+            converter_name_use = arocnv.slct_conv_odd_f(fraw)
+            # NB: converter selection for regular files is done in
+            # autorino.conv_cmd_run._convert_select
+
+        logger.info("extension/converter: %s/%s", ext, converter_name_use)
+
+        if not converter_name_use:
+            logger.info("file skipped, no converter found: %s", fraw)
+            self.table.loc[irow, "note"] = "no converter found"
+            self.table.loc[irow, "ok_inp"] = False
+            self.write_in_table_log(self.table.loc[irow])
+
+        return converter_name_use
+
+    def mono_convert_post(self, irow, rinexmod_options=None, force=False):
+        """
+        "on row" method
+
+        Finalizes the conversion of a row of the table:
+        rinexmod and final move of the converted file.
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+        rinexmod_options : dict, optional
+            A dictionary containing options for the rinexmod process.
+        force : bool, optional
+            Force the final move if the output file already exists.
+            Default is False.
+
+        Returns
+        -------
+        None
+        """
+        # set self.site_id for the output dir translation & rinexmod options
+        # (the rows of a batch are finalized after all the conversions)
+        self.site_id = self.table.loc[irow, "site"]
+        self.set_translate_dict()
+
+        #############################################################
+        # +++++ RINEXMOD
+        rinexmod_options_use = self.updt_rnxmodopts(
+            rinexmod_options, irow, debug_print=False
+        )
+
+        self.mono_rinexmod(
+            irow, self.tmp_dir_rinexmoded,
+            rinexmod_options=rinexmod_options_use
+        )
+        #############################################################
+
+        # +++++ FINAL MOVE
+        self.mono_mv_final(irow, force=force)
+
+        return None
+
     def mono_convert(
-        self, irow, out_dir=None, converter_inp="auto", table_col="fpath_inp", conv_regex_fct_inp=None
+        self,
+        irow,
+        out_dir=None,
+        converter_inp="auto",
+        table_col="fpath_inp",
+        conv_regex_fct_inp=None,
+        conv_cache_opts=None,
     ):
         """
         "on row" method
@@ -370,6 +827,11 @@ class ConvertGnss(arocmn.StepGnss):
         conv_regex_fct_inp : function, optional
             A custom function returning regexs to catch
             the main and annex converted file names.
+        conv_cache_opts : optional
+            The conversion options identifying the conversion in the
+            converted files cache (see ``get_conv_cache``),
+            e.g. the custom regular expressions.
+            None to not use the cache. Default is None.
 
         Returns
         -------
@@ -388,18 +850,161 @@ class ConvertGnss(arocmn.StepGnss):
         else:
             out_dir_use = self.tmp_dir
 
-        try:
-            frnxtmp, _ = arocnv.converter_run(
-                self.table.loc[irow, table_col],
-                out_dir_use,
-                converter=converter_inp,
-                conv_regex_fct= conv_regex_fct_inp
+        if conv_cache_opts is not None:
+            frnxtmp = self.mono_conv_cache_get(
+                irow, converter_inp, out_dir_use, conv_cache_opts, table_col
+            )
+            if frnxtmp:
+                self.mono_convert_upd(irow, frnxtmp)
+                return frnxtmp
+
+        with self.timer.stage(
+            "convert", irow, fpath_inp=self.table.loc[irow, table_col]
+        ) as tim:
+            try:
+                frnxtmp, _ = arocnv.converter_run(
+                    self.table.loc[irow, table_col],
+                    out_dir_use,
+                    converter=converter_inp,
+                    conv_regex_fct= conv_regex_fct_inp
+                )
+            except Exception as e:
+                logger.error("Error for: %s", self.table.loc[irow, table_col])
+                logger.error("Exception raised: %s", e)
+                frnxtmp = None
+            tim["bytes_out"] = arocmn.file_size(frnxtmp)
+
+        if frnxtmp and conv_cache_opts is not None:
+            self.mono_conv_cache_put(
+                irow, converter_inp, frnxtmp, conv_cache_opts, table_col
+            )
+
+        self.mono_convert_upd(irow, frnxtmp)
+        return frnxtmp
+
+    def get_conv_cache(self):
+        """
+        Returns the converted files cache of the step (see ``ConvCache``).
+
+        The cache is stored in the tmp directory, and is thus shared
+        by all the conversion steps using the same tmp directory.
+        Its maximum size (in GB) is the ``conv_cache_size`` value of the
+        'general' section of the environment file, 0 disables the cache.
+
+        Returns
+        -------
+        ConvCache or None
+            The cache, None if disabled.
+        """
+        cache_size = aroenv.ARO_ENV_DIC["general"].get("conv_cache_size", 0)
+        if not cache_size:
+            return None
+
+        cache_dir = self.translate_path(self._tmp_dir_conv_cache)
+        if not self.conv_cache or self.conv_cache.cache_dir != os.path.abspath(
+            cache_dir
+        ):
+            self.conv_cache = arocnv.ConvCache(
+                cache_dir, max_bytes=int(cache_size * 1024**3)
             )
-        except Exception as e:
-            logger.error("Error for: %s", self.table.loc[irow, table_col])
-            logger.error("Exception raised: %s", e)
-            frnxtmp = None
 
+        return self.conv_cache
+
+    def mono_conv_cache_get(
+        self, irow, converter_inp, out_dir, conv_cache_opts=None, table_col="fpath_inp"
+    ):
+        """
+        "on row" method
+
+        Gets the converted file of a row from the converted files cache,
+        if the cache is enabled (see ``get_conv_cache``).
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+        converter_inp : str
+            The converter to be used for the conversion (or 'auto').
+        out_dir : str
+            The directory where the cached converted file is copied.
+        conv_cache_opts : optional
+            The conversion options identifying the conversion. Default is None.
+        table_col : str, optional
+            The column of the raw file. Default is 'fpath_inp'.
+
+        Returns
+        -------
+        str or None
+            The path of the copied converted file, None if not cached.
+        """
+        conv_cache = self.get_conv_cache()
+        if not conv_cache:
+            return None
+
+        fraw = self.table.loc[irow, table_col]
+        converter_name = arocnv.converter_name_select(converter_inp, fraw)
+        try:
+            return conv_cache.get(fraw, converter_name, out_dir, conv_cache_opts)
+        except OSError as e:
+            logger.warning("unable to read the converted files cache for %s: %s", fraw, e)
+            return None
+
+    def mono_conv_cache_put(
+        self, irow, converter_inp, frnxtmp, conv_cache_opts=None, table_col="fpath_inp"
+    ):
+        """
+        "on row" method
+
+        Stores the converted file of a row in the converted files cache,
+        if the cache is enabled (see ``get_conv_cache``).
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+        converter_inp : str
+            The converter used for the conversion (or 'auto').
+        frnxtmp : str
+            The path of the converted file.
+        conv_cache_opts : optional
+            The conversion options identifying the conversion. Default is None.
+        table_col : str, optional
+            The column of the raw file. Default is 'fpath_inp'.
+
+        Returns
+        -------
+        None
+        """
+        conv_cache = self.get_conv_cache()
+        if not conv_cache:
+            return None
+
+        fraw = self.table.loc[irow, table_col]
+        converter_name = arocnv.converter_name_select(converter_inp, fraw)
+        try:
+            conv_cache.put(fraw, converter_name, frnxtmp, conv_cache_opts)
+        except OSError as e:
+            logger.warning("unable to write in the converted files cache %s: %s", fraw, e)
+
+        return None
+
+    def mono_convert_upd(self, irow, frnxtmp):
+        """
+        "on row" method
+
+        Updates a row of the table with the result of its conversion.
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+        frnxtmp : str or None
+            The path of the converted file, empty or None if the conversion failed.
+
+        Returns
+        -------
+        None
+        """
         if frnxtmp:
             ### update table if things go well
             self.table.loc[irow, "ok_out"] = True
@@ -410,7 +1015,7 @@ class ConvertGnss(arocmn.StepGnss):
         else:
             ### update table if things go wrong
             self.table.loc[irow, "ok_out"] = False
-        return frnxtmp
+        return None
 
     def mono_site_upd(self, irow, metadata_or_sites_list_inp, force=False):
         """
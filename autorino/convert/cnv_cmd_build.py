@@ -26,6 +26,7 @@ cmd_str : string
 """
 
 # Import star style
+import shlex
 from pathlib import Path
 
 # from pathlib3x import Path
@@ -278,6 +279,95 @@ def cmd_build_trm2rinex(
     return cmd_use, cmd_list, cmd_str
 
 
+def cmd_build_trm2rinex_exec(
+    inp_raw_fpath,
+    out_dir,
+    bin_options_custom=[],
+    bin_kwoptions_custom=dict(),
+    worker=None,
+):
+    """
+    Build a command to launch trm2rinex, the Trimble converter,
+    in a persistent Docker container (see ``DockerWorker``),
+    with ``docker exec`` rather than ``docker run``.
+
+    The raw file is linked (or copied) in the worker's exchange directory,
+    converted, and the converted files are moved to out_dir.
+
+    It has the same behavior as all the `cmd_build` functions
+
+    Parameters
+    ----------
+    inp_raw_fpath : str or Path
+        the path of the input Raw GNSS file.
+    out_dir : str or Path
+        the path of the output directory.
+    bin_options_custom : list, optional
+        a list for custom option arguments. The default is [].
+    bin_kwoptions_custom : dict, optional
+        a dictionary for custom keywords arguments. The default is dict().
+    worker : DockerWorker
+        the persistent container (leased to this conversion only).
+
+    Returns
+    -------
+    cmd_use : list of string
+        the command as a mono-string in list (singleton).
+        Ready to be used by subprocess.run
+    cmd_list : list of strings
+        the command as a list of strings, splited for each element.
+    cmd_str : string
+        the command as a concatenated string.
+    """
+
+    #### Convert the paths as Path objects
+    inp_raw_fpath = Path(inp_raw_fpath)
+    out_dir = Path(out_dir)
+
+    inp_xchg = Path(worker.xchg_inp).joinpath(inp_raw_fpath.name)
+    out_xchg = Path(worker.xchg_out)
+
+    cmd_trm2rinex_list = [
+        "inp/" + inp_raw_fpath.name,
+        "-n",
+        # "-d", # doppler disabled, because can cause non standard values for RINEX format
+        "-s",
+        "-v",
+        "3.04",
+        "-p",
+        "out/",
+    ]
+
+    cmd_opt_list, _ = _options_list2str(bin_options_custom)
+    cmd_kwopt_list, _ = _kw_options_dict2str(bin_kwoptions_custom)
+
+    cmd_exec_list = (
+        ["docker", "exec", "-w", "/", worker.name]
+        + worker.entrypoint
+        + cmd_trm2rinex_list
+        + cmd_opt_list
+        + cmd_kwopt_list
+    )
+    cmd_exec_list = [shlex.quote(str(e)) for e in cmd_exec_list]
+
+    cmd_list = (
+        # link (or copy) the raw file in the exchange directory
+        ["(", "ln", "-f", shlex.quote(str(inp_raw_fpath)), shlex.quote(str(inp_xchg))]
+        + ["2>/dev/null", "||", "cp", "-f", shlex.quote(str(inp_raw_fpath))]
+        + [shlex.quote(str(inp_xchg)), ")", "&&"]
+        + cmd_exec_list
+        # keep the converter's exit code, and move its outputs
+        + [";", "rc=$?", ";"]
+        + ["find", shlex.quote(str(out_xchg)), "-mindepth", "1", "-maxdepth", "1"]
+        + ["-exec", "mv", "-f", "{}", shlex.quote(str(out_dir)), "\\;", ";"]
+        + ["rm", "-f", shlex.quote(str(inp_xchg)), ";", "exit", "$rc"]
+    )
+    cmd_str = " ".join(cmd_list)
+    cmd_use = [cmd_str]
+
+    return cmd_use, cmd_list, cmd_str
+
+
 def cmd_build_t0xconvert(
     inp_raw_fpath,
     out_dir,
@@ -468,6 +558,71 @@ def cmd_build_mdb2rinex(
     return cmd_use, cmd_list, cmd_str
 
 
+def cmd_build_mdb2rinex_multi(
+    inp_raw_fpaths,
+    out_dir,
+    bin_options_custom=[],
+    bin_kwoptions_custom=dict(),
+    bin_path=aro_env_soft_path["mdb2rinex"],
+):
+    """
+    Build a command to launch mdb2rinex, the Leica converter,
+    on several input files at once (see ``converter_run_batch``)
+
+    It has the same behavior as all the `cmd_build` functions,
+    but takes a list of input files
+
+    Parameters
+    ----------
+    inp_raw_fpaths : list of str or Path
+        the paths of the input Raw GNSS files.
+        Their converted RINEXs must have different names
+        (i.e. different sites or days).
+    out_dir : str or Path
+        the path of the output directory.
+    bin_options_custom : list, optional
+        a list for custom option arguments. The default is [].
+    bin_kwoptions_custom : dict, optional
+        a dictionary for custom keywords arguments. The default is dict().
+    bin_path : str, optional
+        the path the executed binary.
+        The default is "mdb2rinex".
+
+    Returns
+    -------
+    cmd_use : list of string
+        the command as a mono-string in list (singleton).
+        Ready to be used by subprocess.run
+    cmd_list : list of strings
+        the command as a list of strings, splited for each element.
+    cmd_str : string
+        the command as a concatenated string.
+
+    Note
+    ----
+    See ``cmd_build_mdb2rinex`` for the usage of `mdb2rinex`
+    """
+
+    # Convert the paths as Path objects
+    inp_raw_fpaths = [Path(f) for f in inp_raw_fpaths]
+    out_dir = Path(out_dir)
+
+    cmd_opt_list, _ = _options_list2str(bin_options_custom)
+    cmd_kwopt_list, _ = _kw_options_dict2str(bin_kwoptions_custom)
+
+    cmd_list = (
+        [bin_path, "--out", out_dir, "--files"]
+        + inp_raw_fpaths
+        + cmd_opt_list
+        + cmd_kwopt_list
+    )
+    cmd_list = [str(e) for e in cmd_list]
+    cmd_str = " ".join(cmd_list)
+    cmd_use = [cmd_str]
+
+    return cmd_use, cmd_list, cmd_str
+
+
 def cmd_build_sbf2rin(
     inp_raw_fpath,
     out_dir,
@@ -640,6 +795,75 @@ def cmd_build_sbf2rin(
     return cmd_use, cmd_list, cmd_str
 
 
+def cmd_build_sbf2rin_multi(
+    inp_raw_fpaths,
+    out_dir,
+    bin_options_custom=[],
+    bin_kwoptions_custom=dict(),
+    bin_path=aro_env_soft_path["sbf2rin"],
+):
+    """
+    Build a command to launch sbf2rin, the Septentrio converter,
+    on several input files at once (see ``converter_run_batch``)
+
+    It has the same behavior as all the `cmd_build` functions,
+    but takes a list of input files
+
+    Parameters
+    ----------
+    inp_raw_fpaths : list of str or Path
+        the paths of the input Raw GNSS files, without whitespaces
+        (they are the delimiter of sbf2rin's file list).
+        Their converted RINEXs must have different names
+        (i.e. different sites or days).
+    out_dir : str or Path
+        the path of the output directory.
+        sbf2rin does not accept a forced output name for several files,
+        thus the command must be run in out_dir,
+        the input files being in out_dir too.
+    bin_options_custom : list, optional
+        a list for custom option arguments. The default is [].
+    bin_kwoptions_custom : dict, optional
+        a dictionary for custom keywords arguments. The default is dict().
+    bin_path : str, optional
+        the path the executed binary.
+        The default is "sbf2rin".
+
+    Returns
+    -------
+    cmd_use : list of string
+        the command as a mono-string in list (singleton).
+        Ready to be used by subprocess.run
+    cmd_list : list of strings
+        the command as a list of strings, splited for each element.
+    cmd_str : string
+        the command as a concatenated string.
+
+    Note
+    ----
+    See ``cmd_build_sbf2rin`` for the usage of `sbf2rin`.
+    The converted files have the standard short names,
+    see ``conv_regex_sbf2rin``.
+    """
+
+    cmd_opt_list, _ = _options_list2str(bin_options_custom)
+    cmd_kwopt_list, _ = _kw_options_dict2str(bin_kwoptions_custom)
+
+    # the input files are given as a single whitespace-delimited argument
+    inp_raw_str = shlex.quote(" ".join(str(f) for f in inp_raw_fpaths))
+
+    cmd_list = (
+        [bin_path, "-f", inp_raw_str, "-s"]
+        + cmd_opt_list
+        + cmd_kwopt_list
+    )
+    cmd_list = [str(e) for e in cmd_list]
+    cmd_str = " ".join(cmd_list)
+    cmd_use = [cmd_str]
+
+    return cmd_use, cmd_list, cmd_str
+
+
 def cmd_build_runpkr00(
     inp_raw_fpath,
     out_dir,
@@ -6,14 +6,18 @@ Created on Tue Feb 21 16:23:06 2023
 @author: psakic
 """
 
+import contextlib
 import datetime as dt
 import os
 import re
+import shlex
+import shutil
 import subprocess
+import tempfile
 from pathlib import Path
-from subprocess import PIPE
 from typing import Union, List
 
+import autorino.common as arocmn
 import autorino.convert as arocnv
 from geodezyx import utils, conv
 
@@ -218,9 +222,99 @@ def _convert_select(converter_inp, inp_raw_fpath=None):
     )
 
 
+def converter_name_select(converter_inp, inp_raw_fpath=None):
+    """
+    Returns the name of the converter which will be used
+    by ``converter_run`` for a RAW file.
+
+    Parameters
+    ----------
+    converter_inp : str
+        name of the converter, or 'auto'.
+        see ``converter_run`` help for more details
+    inp_raw_fpath : Path, optional
+        RAW file path. The default is None.
+
+    Returns
+    -------
+    str
+        the converter's name, None if no converter is found.
+    """
+    try:
+        return _convert_select(converter_inp, inp_raw_fpath)[0]
+    except Exception:
+        return None
+
+
+def _convert_select_force(
+    converter_inp,
+    inp_raw_fpath,
+    cmd_build_fct=None,
+    conv_regex_fct=None,
+    bin_options=[],
+    bin_kwoptions=dict(),
+):
+    """
+    internal function for ``converter_run`` and ``converter_run_batch``.
+    Selects the converter with ``_convert_select``, then forces
+    the given cmd_build/conv_regex functions and options, if any.
+
+    Returns
+    -------
+    converter_name : str
+        converter's name.
+    cmd_build_fct_use : function
+        interface function with the converter to perform the conversion.
+    conv_regex_fct_use : function
+        interface function to find the converted file with a regular expression.
+    bin_options_use : list
+        options for the conversion program.
+    bin_kwoptions_use : dict
+        keyword options for the conversion program.
+    """
+    (
+        converter_name,
+        brand,
+        cmd_build_fct_use,
+        conv_regex_fct_use,
+        bin_options_use,
+        bin_kwoptions_use,
+    ) = _convert_select(converter_inp, inp_raw_fpath)
+
+    #### Force the arocnv.cmd_build_fct, if any
+    if cmd_build_fct:
+        cmd_build_fct_use = cmd_build_fct
+
+    #### Force the arocnv.conv_regex_fct, if any
+    if conv_regex_fct:
+        conv_regex_fct_use = conv_regex_fct
+
+    #### Force the bin_options if any
+    if bin_options:
+        bin_options_use = bin_options
+
+    #### Force the bin_kwoptions if any
+    if bin_kwoptions:
+        bin_kwoptions_use = bin_kwoptions
+
+    return (
+        converter_name,
+        cmd_build_fct_use,
+        conv_regex_fct_use,
+        bin_options_use,
+        bin_kwoptions_use,
+    )
+
+
 # set current user as constant
 USER, GROUP = arocnv.get_current_user_grp()
 
+# the converters accepting several input files in a single call,
+# which can be batched by converter_run_batch
+# (convbin takes a single input file, gfzrnx splices its input files,
+# the others are called once per file)
+CONVERTERS_MULTI_INPUT = ("sbf2rin", "mdb2rinex")
+
 
 def converter_run(
     inp_raw_fpath: Union[Path, str, List[Path], List[str]],
@@ -233,6 +327,7 @@ def converter_run(
     remove_converted_annex_files=True,
     cmd_build_fct=None,
     conv_regex_fct=None,
+    private_out_dir=True,
 ):
     """
     Generic function to run an external RAW > RINEX conversion program.
@@ -287,6 +382,16 @@ def converter_run(
         the RINEX created during the conversion.
         See `cmd_regex` module for more details.
         The default is None.
+    private_out_dir : bool, optional
+        If True, the converter writes in its own private temporary
+        subdirectory of out_dir: all the files found there are outputs
+        of this conversion, so they are found without scanning out_dir
+        (and without mixing with the outputs of concurrent conversions).
+        The main (and annex) converted files are then moved to out_dir,
+        and the subdirectory is removed.
+        If False, the legacy behavior is used: out_dir is scanned for the
+        files matching the regex and created within the last seconds.
+        The default is True.
 
     Raises
     ------
@@ -330,55 +435,116 @@ def converter_run(
     # *. but we thus we just keep the 1st list elt as the representent
     # of the full list (we assue it homogeneous)
 
-    out_conv_sel = _convert_select(converter, raw_fpath)
     (
         converter_name,
-        brand,
         cmd_build_fct_use,
         conv_regex_fct_use,
         bin_options_use,
         bin_kwoptions_use,
-    ) = out_conv_sel
-
-    #### Force the arocnv.cmd_build_fct, if any
-    if cmd_build_fct:
-        cmd_build_fct_use = cmd_build_fct
-
-    #### Force the arocnv.conv_regex_fct, if any
-    if conv_regex_fct:
-        conv_regex_fct_use = conv_regex_fct
+    ) = _convert_select_force(
+        converter, raw_fpath, cmd_build_fct, conv_regex_fct, bin_options, bin_kwoptions
+    )
 
-    #### Force the bin_options if any
-    if bin_options:
-        bin_options_use = bin_options
+    #### the private output directory of the conversion
+    if private_out_dir:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_dir_conv = Path(tempfile.mkdtemp(prefix=".conv_", dir=out_dir))
+    else:
+        out_dir_conv = out_dir
 
-    #### Force the bin_kwoptions if any
-    if bin_kwoptions:
-        bin_kwoptions_use = bin_kwoptions
+    try:
+        out_fpath, process_converter = _converter_run_core(
+            raw_fpath,
+            raw_fpath_mono,
+            out_dir,
+            out_dir_conv,
+            converter_name,
+            cmd_build_fct_use,
+            conv_regex_fct_use,
+            bin_options_use,
+            bin_kwoptions_use,
+            timeout,
+            remove_converted_annex_files,
+        )
+    finally:
+        if private_out_dir:
+            shutil.rmtree(out_dir_conv, ignore_errors=True)
+
+    return out_fpath, process_converter
+
+
+def _converter_run_core(
+    raw_fpath,
+    raw_fpath_mono,
+    out_dir,
+    out_dir_conv,
+    converter_name,
+    cmd_build_fct_use,
+    conv_regex_fct_use,
+    bin_options_use,
+    bin_kwoptions_use,
+    timeout,
+    remove_converted_annex_files,
+):
+    """
+    internal function for ``converter_run``.
+    Builds and runs the conversion command, writing in out_dir_conv,
+    then gets the converted files, and moves them in out_dir
+    if out_dir_conv is a private directory.
 
-    #### build the command
-    cmd_use, cmd_list, cmd_str = cmd_build_fct_use(
-        raw_fpath, out_dir, bin_options_use, bin_kwoptions_use
-    )
-    ##### BIN PATH !!!!! XXXXX
+    Returns
+    -------
+    out_fpath
+        the path of the converted RINEX.
+    process_converter
+        The subprocess object which ran the conversion (for debug purposes).
+    """
+    private_out_dir = out_dir_conv != out_dir
 
-    logger.debug("conversion command: %s", cmd_str)
+    #### persistent Docker containers for trm2rinex (see DockerWorkerPool)
+    docker_pool = None
+    if cmd_build_fct_use is arocnv.cmd_build_trm2rinex:
+        docker_pool = arocnv.get_docker_pool(
+            converter_name, aroenv.ARO_ENV_DIC["conv_software_paths"]["trm2rinex"]
+        )
 
-    ############# run the external conversion programm #############
     timeout_reached = False
     start = dt.datetime.now()
-    try:
-        process_converter = subprocess.run(
-            cmd_use,
-            executable="/bin/bash",
-            shell=True,
-            stdout=PIPE,
-            stderr=PIPE,
-            timeout=timeout,
-        )
-    except subprocess.TimeoutExpired:
-        process_converter = None
-        timeout_reached = True
+
+    # the persistent container is leased to this conversion only
+    with docker_pool.lease() if docker_pool else contextlib.nullcontext() as worker:
+        #### build the command
+        if worker:
+            cmd_use, cmd_list, cmd_str = arocnv.cmd_build_trm2rinex_exec(
+                raw_fpath, out_dir_conv, bin_options_use, bin_kwoptions_use, worker
+            )
+        else:
+            cmd_use, cmd_list, cmd_str = cmd_build_fct_use(
+                raw_fpath, out_dir_conv, bin_options_use, bin_kwoptions_use
+            )
+        ##### BIN PATH !!!!! XXXXX
+
+        logger.debug("conversion command: %s", cmd_str)
+
+        ############# run the external conversion programm #############
+        # cmd_use is the command as a mono-string in list (singleton)
+        if isinstance(cmd_use, (list, tuple)):
+            cmd_shell = " ".join(str(e) for e in cmd_use)
+        else:
+            cmd_shell = str(cmd_use)
+
+        try:
+            # the shared runner bounds the number of simultaneous converter processes
+            process_converter = arocnv.get_converter_runner().run(
+                cmd_shell, converter_name=converter_name, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            process_converter = None
+            timeout_reached = True
+            arocmn.count_event("timeouts")
+            if worker:
+                # the conversion may still run in the container: it is recycled
+                worker.stop()
 
     end = dt.datetime.now()
     exec_time = (end - start).seconds + (end - start).microseconds * 10**-6
@@ -408,9 +574,18 @@ def converter_run(
     )
 
     #### find the converted file matching the regex
-    conv_files_main, conv_files_annex = find_conv_files(
-        out_dir, conv_regex_main, conv_regex_annex
-    )
+    if private_out_dir:
+        # all the files of the private directory come from this conversion
+        conv_files_main, conv_files_annex = find_conv_files(
+            out_dir_conv, conv_regex_main, conv_regex_annex, n_sec=None
+        )
+        conv_files_main = [_move_conv_file(f, out_dir) for f in conv_files_main]
+        if not remove_converted_annex_files:
+            conv_files_annex = [_move_conv_file(f, out_dir) for f in conv_files_annex]
+    else:
+        conv_files_main, conv_files_annex = find_conv_files(
+            out_dir, conv_regex_main, conv_regex_annex
+        )
 
     if not conv_files_main:
         out_fpath = ""
@@ -436,6 +611,293 @@ def converter_run(
     return str(out_fpath), process_converter
 
 
+def _multi_input_select(converter_name):
+    """
+    internal function for ``converter_run_batch``.
+    Returns the multi-input command builder and the regex function
+    of a converter of ``CONVERTERS_MULTI_INPUT``.
+
+    Returns
+    -------
+    cmd_build_fct : function
+        interface function with the converter to convert several files at once.
+    conv_regex_fct : function
+        interface function to find the converted file of each input file.
+    """
+    if converter_name == "sbf2rin":
+        return arocnv.cmd_build_sbf2rin_multi, arocnv.conv_regex_sbf2rin
+    elif converter_name == "mdb2rinex":
+        return arocnv.cmd_build_mdb2rinex_multi, arocnv.conv_regex_mdb2rnx
+    else:
+        raise ValueError(
+            "{} does not accept several input files".format(converter_name)
+        )
+
+
+def converter_run_batch(
+    inp_raw_fpaths: Union[List[Path], List[str]],
+    out_dir: Union[Path, str],
+    converter="auto",
+    timeout=180,
+    bin_options=[],
+    bin_kwoptions=dict(),
+    remove_converted_annex_files=True,
+    conv_regex_fct=None,
+):
+    """
+    Runs an external RAW > RINEX conversion program on a batch of files,
+    with a single call of the converter for all the files.
+
+    Only the converters accepting several input files
+    (see ``CONVERTERS_MULTI_INPUT``) can be batched:
+    use ``converter_run`` for the other ones.
+
+    The input files are linked in a private directory, where the converter
+    is run once with all of them as inputs. The converted files are then
+    mapped back to their input file with the regular expressions of the
+    converted file names (see ``cmd_regex`` module).
+    Since the converters name their outputs after the site and the day,
+    the input files whose converted files would have the same name
+    (e.g. hourly files of the same site and day) are converted
+    in different calls.
+
+    A file without converted file, or whose converted file can not be
+    identified without ambiguity, gets an empty string:
+    it must be converted alone with ``converter_run``.
+
+    Parameters
+    ----------
+    inp_raw_fpaths : list of Path or str
+        the paths of the input RAW files.
+    out_dir : Union[Path,str]
+        destination directory of the converted RINEXs.
+    converter : str, optional
+        name of the converter used.
+        see ``converter_run`` help for more details.
+        The default is 'auto'.
+    timeout : int, optional
+        timeout in second for the conversion of one file.
+        The timeout of a call is timeout times its number of files.
+        The default is 180.
+    bin_options : list, optional
+        options for the conversion program. The default is [].
+    bin_kwoptions : dict, optional
+        keyword options for the conversion program. The default is dict().
+    remove_converted_annex_files : bool, optional
+        remove or not the 'annex' converted files.
+        The default is True.
+    conv_regex_fct : function, optional
+        A custom function which build the regular expression to find
+        the RINEX created during the conversion. The default is None.
+
+    Returns
+    -------
+    out_fpaths : list of str
+        the paths of the converted RINEXs, in the order of inp_raw_fpaths.
+        An empty string if the file was not converted by the batch.
+    process_converter
+        The subprocess object which ran the last call (for debug purposes).
+        None if no call was done, or if its timeout is reached.
+    """
+    out_dir = Path(out_dir)
+    raw_fpaths = [Path(f) for f in inp_raw_fpaths]
+    out_fpaths = [""] * len(raw_fpaths)
+    process_converter = None
+
+    if not raw_fpaths:
+        return out_fpaths, process_converter
+
+    logger.info("%i input files for a batch conversion", len(raw_fpaths))
+
+    #### dispatch the files in calls, without two identical converted files names
+    # (nor two identical input names) in the same call
+    calls = []
+    for i, raw_fpath in enumerate(raw_fpaths):
+        if not raw_fpath.is_file():
+            logger.error("input file not found: %s", raw_fpath)
+            continue
+        if re.search(r"\s", raw_fpath.name):
+            logger.warning("whitespace in the name, not batched: %s", raw_fpath)
+            continue
+
+        try:
+            converter_name, _, _, bin_options_use, bin_kwoptions_use = (
+                _convert_select_force(
+                    converter, raw_fpath, None, None, bin_options, bin_kwoptions
+                )
+            )
+            cmd_build_fct_use, conv_regex_fct_use = _multi_input_select(
+                converter_name
+            )
+            if conv_regex_fct:
+                conv_regex_fct_use = conv_regex_fct
+            conv_regex_main, conv_regex_annex = conv_regex_fct_use(raw_fpath)
+        except Exception as e:
+            logger.warning("file not batched: %s (%s)", raw_fpath, e)
+            continue
+
+        call_key = (converter_name, cmd_build_fct_use)
+        for call in calls:
+            if (
+                call["key"] == call_key
+                and conv_regex_main.pattern not in call["patterns"]
+                and raw_fpath.name not in call["names"]
+            ):
+                break
+        else:
+            call = dict(
+                key=call_key,
+                bin_options=bin_options_use,
+                bin_kwoptions=bin_kwoptions_use,
+                patterns=set(),
+                names=set(),
+                files=[],
+            )
+            calls.append(call)
+        call["patterns"].add(conv_regex_main.pattern)
+        call["names"].add(raw_fpath.name)
+        call["files"].append((i, conv_regex_main, conv_regex_annex))
+
+    if not calls:
+        return out_fpaths, process_converter
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_dir_batch = Path(tempfile.mkdtemp(prefix=".conv_batch_", dir=out_dir))
+
+    try:
+        for icall, call in enumerate(calls):
+            process_converter = _converter_run_batch_call(
+                call, icall, raw_fpaths, out_fpaths, out_dir, out_dir_batch,
+                timeout, remove_converted_annex_files,
+            )
+    finally:
+        # the annex files, if any, are removed with the batch directory
+        shutil.rmtree(out_dir_batch, ignore_errors=True)
+
+    logger.info(
+        "✓ batch conversion done, %i/%i files converted in %i call(s)",
+        sum(bool(f) for f in out_fpaths),
+        len(raw_fpaths),
+        len(calls),
+    )
+
+    return out_fpaths, process_converter
+
+
+def _converter_run_batch_call(
+    call,
+    icall,
+    raw_fpaths,
+    out_fpaths,
+    out_dir,
+    out_dir_batch,
+    timeout,
+    remove_converted_annex_files,
+):
+    """
+    internal function for ``converter_run_batch``.
+    Runs one call of a multi-input converter in its own subdirectory
+    of out_dir_batch, then moves the converted files in out_dir,
+    and sets them in out_fpaths (modified in place).
+
+    Returns
+    -------
+    process_converter
+        The subprocess object which ran the call (for debug purposes).
+        None if the timeout is reached.
+    """
+    converter_name, cmd_build_fct_use = call["key"]
+    out_dir_call = out_dir_batch / str(icall)
+    out_dir_call.mkdir()
+
+    #### the input files are linked in the call's directory
+    inp_links = []
+    for i, _, _ in call["files"]:
+        inp_link = out_dir_call / raw_fpaths[i].name
+        os.symlink(raw_fpaths[i].resolve(), inp_link)
+        inp_links.append(inp_link)
+
+    cmd_use, cmd_list, cmd_str = cmd_build_fct_use(
+        [f.name for f in inp_links],
+        out_dir_call,
+        call["bin_options"],
+        call["bin_kwoptions"],
+    )
+    logger.debug("conversion command: %s", cmd_str)
+
+    ############# run the external conversion programm #############
+    # (cd is a shell builtin, the converter is the only process)
+    timeout_call = timeout * len(inp_links)
+    cmd_shell = "cd {} && {}".format(shlex.quote(str(out_dir_call)), cmd_str)
+    start = dt.datetime.now()
+    try:
+        process_converter = arocnv.get_converter_runner().run(
+            cmd_shell, converter_name=converter_name, timeout=timeout_call
+        )
+    except subprocess.TimeoutExpired:
+        process_converter = None
+        arocmn.count_event("timeouts")
+        logger.error(
+            "Timeout reached for the batch (%s seconds), its %i files will be "
+            "converted alone",
+            timeout_call,
+            len(inp_links),
+        )
+        # the converted files may be incomplete, they are not used
+        return process_converter
+
+    exec_time = (dt.datetime.now() - start).total_seconds()
+    if process_converter.returncode != 0:
+        logger.error("Error while converting the batch (return code %i)",
+                     process_converter.returncode)
+        logger.error("Converter's error message:")
+        logger.error(process_converter.stderr.strip())
+    else:
+        logger.debug("Conversion done (%7.4f sec.). Converter's output:", exec_time)
+        logger.debug(process_converter.stdout.strip())
+
+    # only the converted files remain in the call's directory
+    for inp_link in inp_links:
+        inp_link.unlink()
+
+    #### map the converted files back to their input file
+    for i, conv_regex_main, conv_regex_annex in call["files"]:
+        conv_files_main, conv_files_annex = find_conv_files(
+            out_dir_call, conv_regex_main, conv_regex_annex, n_sec=None
+        )
+        if not conv_files_main:
+            logger.warning(
+                "✗ converted file not found in the batch for %s", raw_fpaths[i].name
+            )
+            continue
+
+        # the converted files of different calls can have the same name
+        # (e.g. hourly files), they are prefixed with their input file name
+        prefix = raw_fpaths[i].name + "."
+        out_fpath = Path(_move_conv_file(conv_files_main[0], out_dir, prefix))
+        arocnv.change_owner(out_fpath, USER, GROUP)
+        out_fpaths[i] = str(out_fpath)
+
+        if not remove_converted_annex_files:
+            for f in conv_files_annex:
+                if os.path.isfile(f):
+                    _move_conv_file(f, out_dir, prefix)
+
+    return process_converter
+
+
+def _move_conv_file(conv_file, out_dir, prefix=""):
+    """
+    internal function for ``converter_run`` and ``converter_run_batch``.
+    Moves a converted file from the private output directory to out_dir.
+    A prefix can be added to its name (e.g. the input file name,
+    for the converted files named after the site and day only).
+    """
+    conv_file_out = os.path.join(out_dir, prefix + os.path.basename(conv_file))
+    os.replace(conv_file, conv_file_out)
+    return conv_file_out
+
+
 #############################################################################
 ### Low level functions
 
@@ -460,6 +922,7 @@ def find_conv_files(directory, pattern_main, pattern_annex, n_sec=20):
         The regular expression pattern that the annex files should match.
     n_sec : int, optional
         The number of seconds in the past to consider for file creation.
+        None to consider all the files (e.g. for a private output directory).
          Default is 20.
 
     Returns
@@ -470,20 +933,25 @@ def find_conv_files(directory, pattern_main, pattern_annex, n_sec=20):
         The list of annex files that were found.
     """
     now = dt.datetime.now()
-    delta = dt.timedelta(seconds=n_sec)
     files_main = []
     files_annex = []
     files_main_time = []
     files_annex_time = []
-    for file in os.listdir(directory):
-        filepath = os.path.join(directory, file)
-        if os.path.isfile(filepath):
-            created_time = dt.datetime.fromtimestamp(os.path.getctime(filepath))
-            if now - created_time < delta and re.match(pattern_main, file):
-                files_main.append(filepath)
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            file = entry.name
+            created_time = dt.datetime.fromtimestamp(entry.stat().st_ctime)
+            if n_sec is not None and now - created_time >= dt.timedelta(
+                seconds=n_sec
+            ):
+                continue
+            if re.match(pattern_main, file):
+                files_main.append(entry.path)
                 files_main_time.append(created_time)
-            elif now - created_time < delta and re.match(pattern_annex, file):
-                files_annex.append(filepath)
+            elif re.match(pattern_annex, file):
+                files_annex.append(entry.path)
                 files_annex_time.append(created_time)
             else:
                 pass
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 18:47:12 2026
+
+@author: psakic
+
+This module, cnv_docker_cls.py, provides classes for long-lived Docker
+containers running a converter (typically trm2rinex), driven with
+``docker exec`` and reused across the conversions.
+"""
+
+import atexit
+import contextlib
+import datetime as dt
+import os
+import queue
+import socket
+import stat
+import tempfile
+import threading
+import time
+
+import dateutil.parser
+import docker
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+# the labels of the persistent containers: the persistent flag,
+# the owner process (PID and host) and the maximum age (see is_orphan_container)
+DOCKER_PERSISTENT_LABEL = "autorino.persistent"
+DOCKER_OWNER_PID_LABEL = "autorino.owner_pid"
+DOCKER_OWNER_HOST_LABEL = "autorino.owner_host"
+DOCKER_MAX_AGE_LABEL = "autorino.max_age"
+# the delay in seconds after the maximum age before a container is reaped,
+# for a conversion started just before the maximum age
+DOCKER_REAP_GRACE = 3600
+
+
+def _private_dir(path):
+    """
+    Creates a directory private to the current user (mode 0o700),
+    or checks an existing one: a real directory (not a symlink),
+    owned by the current user, then made private.
+
+    Parameters
+    ----------
+    path : str
+        The directory path.
+
+    Returns
+    -------
+    str
+        The directory path.
+
+    Raises
+    ------
+    PermissionError
+        If the existing path is a symlink, not a directory,
+        or is owned by another user.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError("not a directory (or a symlink): {}".format(path))
+    if st.st_uid != os.getuid():
+        raise PermissionError("directory owned by another user: {}".format(path))
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # the process exists, but belongs to another user
+        return True
+    return True
+
+
+def is_orphan_container(container, elapsed_time):
+    """
+    Checks if a persistent converter container (see ``DockerWorker``)
+    must be reaped: its owner process is dead (a run killed by SIGKILL,
+    the OOM killer...), or it is older than its maximum age
+    (plus DOCKER_REAP_GRACE): its owner would not use it anymore.
+
+    The owner is checked only if it runs on the same host.
+
+    Parameters
+    ----------
+    container : docker.models.containers.Container
+        The container.
+    elapsed_time : float
+        The running time of the container in seconds.
+
+    Returns
+    -------
+    str or None
+        The reason to reap the container, None if it must be kept.
+    """
+    labels = container.labels or {}
+
+    owner_host = labels.get(DOCKER_OWNER_HOST_LABEL)
+    owner_pid = labels.get(DOCKER_OWNER_PID_LABEL)
+    if owner_host == socket.gethostname() and owner_pid and owner_pid.isdigit():
+        if not _pid_alive(int(owner_pid)):
+            return "owner process {} dead".format(owner_pid)
+    elif not owner_pid:
+        # a container of an older version, without owner
+        return "no owner"
+
+    try:
+        max_age = float(labels.get(DOCKER_MAX_AGE_LABEL))
+    except (TypeError, ValueError):
+        max_age = 6 * 3600
+    if elapsed_time > max_age + DOCKER_REAP_GRACE:
+        return "older than its maximum age ({} s)".format(int(max_age))
+
+    return None
+
+
+def reap_orphan_containers(client=None):
+    """
+    Removes the orphan persistent converter containers
+    (see ``is_orphan_container``), e.g. left by a killed run.
+
+    Parameters
+    ----------
+    client : docker.DockerClient, optional
+        The Docker client. Default is None (a new client from the environment).
+
+    Returns
+    -------
+    list
+        The names of the removed containers.
+    """
+    reaped = []
+    try:
+        client = client or docker.from_env()
+        containers = client.containers.list(
+            filters={"label": DOCKER_PERSISTENT_LABEL}
+        )
+    except docker.errors.DockerException as e:
+        logger.debug("unable to list the persistent containers: %s", e)
+        return reaped
+
+    now = dt.datetime.now(dt.timezone.utc)
+    for container in containers:
+        try:
+            started_at = dateutil.parser.parse(container.attrs["State"]["StartedAt"])
+            reap_reason = is_orphan_container(
+                container, (now - started_at).total_seconds()
+            )
+            if not reap_reason:
+                continue
+            container.remove(force=True)
+            reaped.append(container.name)
+            logger.warning(
+                "orphan persistent container removed: %s (%s)",
+                container.name,
+                reap_reason,
+            )
+        except docker.errors.DockerException as e:
+            logger.debug("unable to reap %s: %s", container.name, e)
+
+    return reaped
+
+
+class DockerWorker:
+    """
+    A class used to represent a long-lived Docker container of a converter.
+
+    The container is started once with an idle command and the
+    converter's image. Its ``/inp`` and ``/out`` directories are bound
+    to an exchange directory on the host (``<xchg_dir>/inp`` and
+    ``<xchg_dir>/out``), so the converter is called with ``docker exec``
+    exactly as it is with ``docker run`` (relative ``inp/``, ``out/`` paths).
+
+    A worker runs one conversion at a time (see ``DockerWorkerPool``).
+    Its health (the container is running) is checked at most every
+    health_period seconds, and the container is recycled after
+    max_jobs conversions or max_age seconds, or when a conversion times out.
+
+    Attributes
+    ----------
+    image : str
+        The Docker image of the converter.
+    name : str
+        The name of the container.
+    xchg_dir : str
+        The exchange directory on the host, private to the current user
+        (the container runs with its uid/gid).
+    entrypoint : list
+        The image's entrypoint, i.e. the converter's command called with docker exec.
+    """
+
+    def __init__(
+        self, image, name, xchg_dir, health_period=60, max_jobs=1000, max_age=6 * 3600
+    ):
+        self.image = image
+        self.name = name
+        self.xchg_dir = str(xchg_dir)
+        self.health_period = health_period
+        self.max_jobs = max_jobs
+        self.max_age = max_age
+
+        self.entrypoint = []
+        self.n_jobs = 0
+        self._container = None
+        self._t_start = None
+        self._t_health = None
+
+    def __repr__(self):
+        return "DockerWorker: {} ({}, {} jobs)".format(
+            self.name, self.image, self.n_jobs
+        )
+
+    @property
+    def xchg_inp(self):
+        return os.path.join(self.xchg_dir, "inp")
+
+    @property
+    def xchg_out(self):
+        return os.path.join(self.xchg_dir, "out")
+
+    def start(self):
+        """
+        Starts the container (the previous one, if any, is removed).
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        docker.errors.DockerException
+            If the container can not be started.
+        """
+        self.stop()
+
+        # the exchange directories are private: the container runs
+        # with the current user's uid/gid (see below)
+        try:
+            xchg_root = os.path.dirname(self.xchg_dir)
+            for d in (xchg_root, self.xchg_dir, self.xchg_inp, self.xchg_out):
+                _private_dir(d)
+        except OSError as e:
+            raise docker.errors.DockerException(
+                "unusable exchange directory {}: {}".format(self.xchg_dir, e)
+            ) from e
+
+        client = docker.from_env()
+        img_attrs = client.images.get(self.image).attrs
+        self.entrypoint = list(img_attrs["Config"].get("Entrypoint") or [])
+        if not self.entrypoint:
+            raise docker.errors.DockerException(
+                "no entrypoint in the image {}".format(self.image)
+            )
+
+        self._container = client.containers.run(
+            self.image,
+            entrypoint=["sh", "-c", "while :; do sleep 3600; done"],
+            name=self.name,
+            detach=True,
+            remove=True,
+            # the converter writes in the exchange directories as the current user;
+            # this user is unknown in the image, thus a writable HOME is given
+            user="{}:{}".format(os.getuid(), os.getgid()),
+            environment={"HOME": "/tmp"},
+            labels={
+                DOCKER_PERSISTENT_LABEL: "true",
+                DOCKER_OWNER_PID_LABEL: str(os.getpid()),
+                DOCKER_OWNER_HOST_LABEL: socket.gethostname(),
+                DOCKER_MAX_AGE_LABEL: str(int(self.max_age)),
+            },
+            volumes={
+                self.xchg_inp: {"bind": "/inp", "mode": "rw"},
+                self.xchg_out: {"bind": "/out", "mode": "rw"},
+            },
+        )
+        self.n_jobs = 0
+        self._t_start = time.time()
+        self._t_health = None
+        logger.debug("persistent container started: %s", self)
+
+        if not self.is_healthy(force=True):
+            raise docker.errors.DockerException(
+                "container {} not running after its start".format(self.name)
+            )
+
+        return None
+
+    def stop(self):
+        """
+        Removes the container, if any.
+
+        Returns
+        -------
+        None
+        """
+        if self._container is None:
+            return None
+        try:
+            self._container.remove(force=True)
+            logger.debug("persistent container removed: %s", self)
+        except docker.errors.DockerException as e:
+            logger.debug("unable to remove %s: %s", self, e)
+        self._container = None
+        return None
+
+    def is_healthy(self, force=False):
+        """
+        Checks if the container is running.
+        The check is actually done at most every health_period seconds.
+
+        Parameters
+        ----------
+        force : bool, optional
+            If True, the check is done anyway. Default is False.
+
+        Returns
+        -------
+        bool
+            True if the container is running.
+        """
+        if self._container is None:
+            return False
+
+        now = time.time()
+        if not force and self._t_health and now - self._t_health < self.health_period:
+            return True
+
+        try:
+            self._container.reload()
+            running = self._container.status == "running"
+        except docker.errors.DockerException:
+            running = False
+
+        self._t_health = now if running else None
+        return running
+
+    def ensure(self):
+        """
+        (Re)starts the container if it is not healthy, or too old.
+
+        Returns
+        -------
+        None
+        """
+        too_old = self._t_start and (
+            self.n_jobs >= self.max_jobs or time.time() - self._t_start > self.max_age
+        )
+        if too_old or not self.is_healthy():
+            self.start()
+        return None
+
+
+class DockerWorkerPool:
+    """
+    A class used to represent a pool of ``DockerWorker`` of the same image.
+
+    The workers are started lazily, up to size workers,
+    and each worker is leased to one conversion at a time.
+
+    If a container can not be started, the pool is disabled
+    (the legacy ``docker run`` is used) for a backoff delay,
+    doubled at each new failure up to max_backoff.
+
+    Attributes
+    ----------
+    image : str
+        The Docker image of the converter.
+    size : int
+        The maximum number of workers (i.e. of simultaneous conversions).
+    xchg_root : str
+        The parent directory of the workers' exchange directories.
+        It must be owned by the current user, and is made private (mode 0o700).
+    backoff : float
+        The initial delay in seconds before a new try after a start failure.
+    max_backoff : float
+        The maximum delay in seconds before a new try.
+    """
+
+    def __init__(self, image, size=2, xchg_root=None, backoff=60, max_backoff=3600):
+        self.image = image
+        self.size = max(1, int(size))
+        if not xchg_root:
+            xchg_root = os.path.join(
+                tempfile.gettempdir(), "autorino_docker_{}".format(os.getuid())
+            )
+        self.xchg_root = str(xchg_root)
+
+        self._workers = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._backoff_cur = backoff
+        self._disabled_until = None
+
+        atexit.register(self.stop_all)
+
+    def __repr__(self):
+        return "DockerWorkerPool: {} ({}/{} workers)".format(
+            self.image, len(self._workers), self.size
+        )
+
+    @property
+    def disabled(self):
+        """
+        True if the pool is disabled, i.e. during the backoff delay
+        following a start failure.
+        """
+        return self._disabled_until is not None and time.time() < self._disabled_until
+
+    def _new_worker(self):
+        safe_img = "".join(c if c.isalnum() else "_" for c in self.image)
+        name = "aro_{}_{}_{}".format(safe_img, os.getpid(), len(self._workers))
+        worker = DockerWorker(self.image, name, os.path.join(self.xchg_root, name))
+        self._workers.append(worker)
+        return worker
+
+    @contextlib.contextmanager
+    def lease(self):
+        """
+        Leases a healthy worker (blocks until a worker is available).
+
+        Yields
+        ------
+        DockerWorker or None
+            The worker, None if the persistent containers can not be used
+            (the legacy ``docker run`` must then be used).
+        """
+        if self.disabled:
+            yield None
+            return
+
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                worker = self._new_worker() if len(self._workers) < self.size else None
+            if worker is None:
+                worker = self._idle.get()
+
+        try:
+            worker.ensure()
+        except docker.errors.DockerException as e:
+            logger.warning(
+                "unable to start a persistent container for %s, "
+                "one container per file is used for %i s: %s",
+                self.image,
+                self._backoff_cur,
+                e,
+            )
+            with self._lock:
+                self._disabled_until = time.time() + self._backoff_cur
+                self._backoff_cur = min(2 * self._backoff_cur, self.max_backoff)
+            self._idle.put(worker)
+            yield None
+            return
+
+        with self._lock:
+            self._disabled_until = None
+            self._backoff_cur = self.backoff
+
+        try:
+            yield worker
+        finally:
+            worker.n_jobs += 1
+            self._idle.put(worker)
+
+    def stop_all(self):
+        """
+        Removes the containers of all the workers.
+
+        Returns
+        -------
+        None
+        """
+        for worker in self._workers:
+            worker.stop()
+        return None
+
+
+# the pools shared by all the steps, see get_docker_pool
+_DOCKER_POOLS = dict()
+_DOCKER_POOLS_LOCK = threading.Lock()
+
+
+def get_docker_pool(converter_name, image):
+    """
+    Returns the pool of persistent containers of a converter,
+    shared by all the steps.
+    None if the persistent containers are disabled
+    (``docker_persistent: False`` in the 'general' section of the environment file).
+
+    The pool size is the converter's value in ``converter_max_jobs_per_converter``
+    (environment file), 2 per default.
+
+    Parameters
+    ----------
+    converter_name : str
+        The converter's name (e.g. 'trm2rinex').
+    image : str
+        The converter's Docker image.
+
+    Returns
+    -------
+    DockerWorkerPool or None
+        The pool of persistent containers.
+    """
+    env_gen = aroenv.ARO_ENV_DIC["general"]
+    if not env_gen.get("docker_persistent", True):
+        return None
+
+    with _DOCKER_POOLS_LOCK:
+        if image not in _DOCKER_POOLS:
+            # the containers left by the killed runs are reaped first
+            reap_orphan_containers()
+            caps = env_gen.get("converter_max_jobs_per_converter") or {}
+            _DOCKER_POOLS[image] = DockerWorkerPool(
+                image,
+                size=caps.get(converter_name, 2),
+                xchg_root=env_gen.get("docker_xchg_dir"),
+            )
+    return _DOCKER_POOLS[image]
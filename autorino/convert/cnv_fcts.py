@@ -179,6 +179,9 @@ def stop_old_docker(max_running_time=120):
     This function is useful for stopping long-running trm2rinex Docker containers.
     It iterates over all running Docker containers and stops any that have been
     running for longer than the specified maximum running time.
+    The persistent converter containers (see ``DockerWorker``) are stopped
+    only if they are orphans: their owner process is dead, or they are older
+    than their maximum age (see ``reap_orphan_containers``).
 
     Parameters
     ----------
@@ -205,9 +208,15 @@ def stop_old_docker(max_running_time=120):
     except docker.errors.DockerException:
         logger.warning("Permission denied for Docker")
         return None
+    # the orphan persistent containers are reaped
+    arocnv.reap_orphan_containers(client)
+
     containers = client.containers.list()
 
     for container in containers:
+        # the persistent containers have their own lifecycle (see DockerWorker)
+        if container.labels.get(arocnv.DOCKER_PERSISTENT_LABEL):
+            continue
         # Calculate the time elapsed since the container was started
         started_at = container.attrs["State"]["StartedAt"]
         started_at = dateutil.parser.parse(started_at)
@@ -379,6 +379,48 @@ def conv_regex_mdb2rnx(f):
     return conv_regex_main, conv_regex_annex
 
 
+def conv_regex_sbf2rin(f):
+    """
+    Generate the regular expressions of the main and annex converted files
+    outputed by sbf2rin (Septentrio) with its standard short naming convention
+    (i.e. without a forced output name, see ``cmd_build_sbf2rin_multi``)
+
+    It has the same behavior as all the `conv_regex` functions
+    See note below
+
+    Parameters
+    ----------
+    f : str or Path
+        the input Raw filename or path
+        (the filename will be extracted in the function).
+
+    Returns
+    -------
+    conv_regex_main & conv_regex_annex : Complied Regex Objects
+        The regular expressions.
+
+    Note
+    ----
+    general behavior of the `conv_regex` functions:
+    main = the regex for the main file i.e. the Observation RINEX
+    annex = the regex for the ALL outputed files (Observation RINEX included)
+    the main with be processed before the annex,
+    thus annex regex will finally not include the main one
+    """
+
+    # abcd0010.24_ (raw)
+    # abcd0010.24O
+    # abcd0010.24P
+    f = Path(Path(f).name)  ### keep the filename only
+    regex_doy_site = r"(\w{4})([0-9]{3})"
+
+    site = re.match(regex_doy_site, f.name).group(1)
+    doy = re.match(regex_doy_site, f.name).group(2)
+    conv_regex_main = re.compile(site + doy + r".\.[0-9]{2}o$", re.IGNORECASE)
+    conv_regex_annex = re.compile(site + doy + r".\.[0-9]{2}\w$", re.IGNORECASE)
+    return conv_regex_main, conv_regex_annex
+
+
 def conv_regex_convbin(f):
     """
     Generate the regular expressions of the mainand annex converted files
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:22:47 2026
+
+@author: psakic
+
+This module, cnv_runner_cls.py, provides an asyncio-based runner
+of the external converter processes, with a bounded concurrency.
+"""
+
+import asyncio
+import collections
+import contextlib
+import os
+import signal
+import subprocess
+import threading
+
+import autorino.common as arocmn
+
+#### Import the logger
+import logging
+import autorino.cfgenv.env_read as aroenv
+
+logger = logging.getLogger("autorino")
+logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
+
+
+class ConverterRunner:
+    """
+    A class used to represent a runner of external converter processes.
+
+    The commands (as built by the ``cmd_build`` functions) are executed
+    by an asyncio event loop running in a background thread.
+    The jobs can thus be submitted from any thread (e.g. the workers
+    of ``ConvertGnss.convert``, or ``SpliceGnss``/``SplitGnss`` rows),
+    and their concurrency is bounded globally and per converter
+    (e.g. fewer ``trm2rinex`` Docker containers than ``mdb2rinex`` processes).
+
+    The stdout/stderr of the processes are streamed line by line into the logger.
+    Each process is started in its own session: when the timeout is reached,
+    its whole process group (the shell and its children) is killed.
+
+    Attributes
+    ----------
+    max_jobs : int
+        The maximum number of converter processes running at the same time.
+    max_jobs_converter : dict
+        The maximum number of processes per converter name
+        (e.g. ``{"trm2rinex": 2}``). Converters not in this dict
+        are only bounded by max_jobs.
+    kill_grace : float
+        The delay in seconds between the SIGTERM and the SIGKILL
+        sent to a process group when the timeout is reached.
+    """
+
+    def __init__(self, max_jobs=8, max_jobs_converter=None, kill_grace=5):
+        self.max_jobs = max_jobs
+        self.max_jobs_converter = dict(max_jobs_converter or {})
+        self.kill_grace = kill_grace
+
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # the semaphores are created in the loop's thread
+        self._sema_glob = None
+        self._sema_conv = dict()
+        # the number of waiting/running jobs per converter
+        self.n_pending = collections.Counter()
+        self.n_running = collections.Counter()
+
+    def __repr__(self):
+        return "ConverterRunner: {} jobs max., per converter: {}".format(
+            self.max_jobs, self.max_jobs_converter
+        )
+
+    def _start_loop(self):
+        """
+        Starts the event loop in a background (daemon) thread, if necessary.
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return self._loop
+
+            self._loop = asyncio.new_event_loop()
+            self._sema_glob = None
+            self._sema_conv = dict()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="aro_converter_runner", daemon=True
+            )
+            self._thread.start()
+
+        return self._loop
+
+    def _semaphores(self, converter_name):
+        """
+        Returns the global semaphore and the converter's one (None if no cap).
+        Must be called in the loop's thread.
+        """
+        if self._sema_glob is None:
+            self._sema_glob = asyncio.Semaphore(self.max_jobs)
+
+        if converter_name not in self._sema_conv:
+            cap = self.max_jobs_converter.get(converter_name)
+            self._sema_conv[converter_name] = asyncio.Semaphore(cap) if cap else None
+
+        return self._sema_glob, self._sema_conv[converter_name]
+
+    async def _run_job(self, cmd, converter_name, timeout):
+        sema_glob, sema_conv = self._semaphores(converter_name)
+        # the counters are only modified in the loop's thread
+        self.n_pending[converter_name] += 1
+        started = False
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                # the converter's cap is acquired first,
+                # so a waiting job does not hold a global slot
+                if sema_conv:
+                    await stack.enter_async_context(sema_conv)
+                await stack.enter_async_context(sema_glob)
+                self.n_pending[converter_name] -= 1
+                self.n_running[converter_name] += 1
+                started = True
+                return await self._exec(cmd, converter_name, timeout)
+        finally:
+            if started:
+                self.n_running[converter_name] -= 1
+            else:
+                self.n_pending[converter_name] -= 1
+
+    def collect_metrics(self, metrics):
+        """
+        Updates the queue depth and the running jobs gauges
+        of a metrics registry, per converter (see ``MetricsRegistry.add_collector``).
+
+        Parameters
+        ----------
+        metrics : MetricsRegistry
+            The metrics registry.
+
+        Returns
+        -------
+        None
+        """
+        for conv in set(self.n_pending) | set(self.n_running):
+            conv_lbl = conv or "unknown"
+            metrics.set("autorino_converter_queue_depth", self.n_pending[conv], converter=conv_lbl)
+            metrics.set("autorino_converter_jobs_running", self.n_running[conv], converter=conv_lbl)
+        return None
+
+    async def _exec(self, cmd, converter_name, timeout):
+        proc = await asyncio.create_subprocess_shell(
+            cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            executable="/bin/bash",
+            start_new_session=True,
+            limit=2**20,
+        )
+
+        out_lis, err_lis = [], []
+
+        async def _stream(reader, lines_lis, label):
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                lines_lis.append(line)
+                logger.debug(
+                    "%s (%s) %s: %s",
+                    converter_name,
+                    proc.pid,
+                    label,
+                    line.decode(errors="replace").rstrip(),
+                )
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    _stream(proc.stdout, out_lis, "stdout"),
+                    _stream(proc.stderr, err_lis, "stderr"),
+                    proc.wait(),
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            await self._kill(proc)
+            raise subprocess.TimeoutExpired(
+                cmd, timeout, output=b"".join(out_lis), stderr=b"".join(err_lis)
+            )
+
+        return subprocess.CompletedProcess(
+            cmd, proc.returncode, stdout=b"".join(out_lis), stderr=b"".join(err_lis)
+        )
+
+    async def _kill(self, proc):
+        """
+        Kills the process group of a process: SIGTERM, then SIGKILL after kill_grace.
+        """
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                break
+            try:
+                await asyncio.wait_for(proc.wait(), self.kill_grace)
+                break
+            except asyncio.TimeoutError:
+                continue
+
+        logger.warning("converter process group %s killed (timeout)", proc.pid)
+
+    def submit(self, cmd, converter_name="", timeout=180):
+        """
+        Submits a converter command, without waiting for its end.
+
+        Parameters
+        ----------
+        cmd : str
+            The command, executed by /bin/bash.
+        converter_name : str, optional
+            The converter's name, for its concurrency cap. Default is "".
+        timeout : float, optional
+            The timeout in seconds. Default is 180.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future of the job. Its result is a ``subprocess.CompletedProcess``
+            (stdout/stderr as bytes), or it raises ``subprocess.TimeoutExpired``.
+        """
+        loop = self._start_loop()
+        return asyncio.run_coroutine_threadsafe(
+            self._run_job(cmd, converter_name, timeout), loop
+        )
+
+    def run(self, cmd, converter_name="", timeout=180):
+        """
+        Runs a converter command and waits for its end.
+        Drop-in replacement for ``subprocess.run(cmd, shell=True, ...)``.
+
+        Parameters
+        ----------
+        cmd : str
+            The command, executed by /bin/bash.
+        converter_name : str, optional
+            The converter's name, for its concurrency cap. Default is "".
+        timeout : float, optional
+            The timeout in seconds. Default is 180.
+
+        Returns
+        -------
+        subprocess.CompletedProcess
+            The completed process (stdout/stderr as bytes).
+
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            If the timeout is reached (the process group is killed).
+        """
+        return self.submit(cmd, converter_name, timeout).result()
+
+
+# the runner shared by all the steps, see get_converter_runner
+_CONVERTER_RUNNER = None
+_CONVERTER_RUNNER_LOCK = threading.Lock()
+
+
+def get_converter_runner():
+    """
+    Returns the converter runner shared by all the steps.
+
+    Its concurrency is set by the ``converter_max_jobs`` and
+    ``converter_max_jobs_per_converter`` values of the 'general' section
+    of the environment file.
+    If the metrics are enabled (see ``autorino.common.get_metrics``),
+    its queue depth and running jobs are exported.
+
+    Returns
+    -------
+    ConverterRunner
+        The shared converter runner.
+    """
+    global _CONVERTER_RUNNER
+    with _CONVERTER_RUNNER_LOCK:
+        if _CONVERTER_RUNNER is None:
+            env_gen = aroenv.ARO_ENV_DIC["general"]
+            _CONVERTER_RUNNER = ConverterRunner(
+                max_jobs=env_gen.get("converter_max_jobs", 8),
+                max_jobs_converter=env_gen.get("converter_max_jobs_per_converter"),
+            )
+            # the queue depth is exported with the metrics, if enabled
+            metrics = arocmn.get_metrics()
+            if metrics:
+                metrics.add_collector(_CONVERTER_RUNNER.collect_metrics)
+    return _CONVERTER_RUNNER
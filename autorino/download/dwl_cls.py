@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import concurrent.futures
 import os
+import queue
 import re
 import shutil
 
@@ -245,7 +247,7 @@ class DownloadGnss(arocmn.StepGnss):
         rmot_dir_list = sorted(list(set(rmot_dir_list)))
         return rmot_dir_list
 
-    def ask_remote_raw(self):
+    def ask_remote_raw(self, listing_cache=False, listing_cache_ttl=0):
         """
         Retrieve the list of remote files from the server.
 
@@ -253,6 +255,18 @@ class DownloadGnss(arocmn.StepGnss):
         in those directories based on the protocol specified in the access
         information.
 
+        Parameters
+        ----------
+        listing_cache : bool, optional
+            If True, the remote listings are stored in an on-disk cache
+            (in the tmp tables directory). Directories whose epochs are
+            closed are then never listed again.
+            Default is False.
+        listing_cache_ttl : int, optional
+            The time-to-live in seconds of the cached listings for
+            the directories with open epochs (i.e. current ones).
+            Default is 0 (open directories are always listed).
+
         Returns
         -------
         list
@@ -262,6 +276,12 @@ class DownloadGnss(arocmn.StepGnss):
         # guess the remote directories
         self.guess_remote_dirs()
 
+        if listing_cache:
+            cache_path = os.path.join(self.tmp_dir_tables, "remote_listing_cache.json")
+            cache_dic = arodwl.load_listing_cache(cache_path)
+        else:
+            cache_path, cache_dic = None, None
+
         rmot_fil_all_lis = []
         rmot_fil_epo_lis = []
         epo_lis = []
@@ -271,32 +291,28 @@ class DownloadGnss(arocmn.StepGnss):
         else:
             logger.debug("no filter regex will be applied to remote files")
 
-        # step 1: iterate over the input table and list the remote files (table is updated in step 2)
+        # step 1: list once each unique remote directory
+        # (several epochs can share the same directory, e.g. hourly files in daily dirs)
+        rmot_dir_grp = self.table.groupby("fpath_inp", sort=False)["epoch_end"].max()
+        rmot_dir_lis_dic = dict()
+        for rmot_dir_use, epoch_end_dir in rmot_dir_grp.items():
+            rmot_dir_lis_dic[rmot_dir_use] = self.list_remote_dir(
+                rmot_dir_use,
+                epoch_end=epoch_end_dir,
+                cache_dic=cache_dic,
+                cache_ttl=listing_cache_ttl,
+            )
+        logger.debug(
+            "%i unique remote directories listed for %i epochs",
+            len(rmot_dir_lis_dic),
+            len(self.table),
+        )
+
+        # step 2: filter the listings per epoch, in memory (table is updated in step 3)
+        new_rows_stk = []
         for irow, row in self.table.iterrows():
             epoch = row["epoch_srt"]
-            rmot_dir_use = row["fpath_inp"]
-
-            if self.access["protocol"] == "http":
-                logger.warning(
-                    "HTTP protocol doesn't support well file listing. Nasty effects may occur."
-                )
-                rmot_fil_epo_bulk_lis = arodwl.list_remote_http(
-                    self.access["hostname"], rmot_dir_use
-                )
-            elif self.access["protocol"] == "ftp":
-                rmot_fil_epo_bulk_lis = arodwl.list_remote_ftp(
-                    self.access["hostname"],
-                    rmot_dir_use,
-                    self.access["login"],
-                    self.access["password"],
-                    ftp_obj_inp=self.ftp_obj,
-                )
-
-            else:
-                logger.error("wrong protocol. Only 'http' and 'ftp' are supported.")
-                raise Exception
-
-            rmot_fil_epo_bulk_lis = list(rmot_fil_epo_bulk_lis)
+            rmot_fil_epo_bulk_lis = rmot_dir_lis_dic[row["fpath_inp"]]
 
             ### match the right input structure, if a regex input is provided
             if self.inp_file_regex:
@@ -335,8 +351,6 @@ class DownloadGnss(arocmn.StepGnss):
             #    self.access["protocol"] + "://" + f for f in rmot_fil_epo_lis
             # ]
 
-            ## step 2: the table is updated with the files found
-            new_rows_stk = []
             for rmot_fil in rmot_fil_epo_lis:
                 new_row = row.copy()
                 new_row["fname"] = os.path.basename(rmot_fil)
@@ -345,17 +359,84 @@ class DownloadGnss(arocmn.StepGnss):
                 new_row["ok_inp"] = True
                 new_rows_stk.append(new_row)
 
+        ## step 3: the table is updated with the files found, in a single concat
+        if new_rows_stk:
             self.table = pd.concat(
                 [self.table, pd.DataFrame(new_rows_stk)], ignore_index=True
             )
 
-        # step 3: remove the guessed directories
+        # step 4: remove the guessed directories
         self.table = self.table[self.table["note"] != "dir_guessed"]
         self.table.reset_index(drop=True, inplace=True)
 
+        if listing_cache:
+            arodwl.save_listing_cache(cache_path, cache_dic)
+
         logger.info("nbr remote files found on rec: %s", len(rmot_fil_all_lis))
         return rmot_fil_all_lis
 
+    def list_remote_dir(self, rmot_dir, epoch_end=None, cache_dic=None, cache_ttl=0):
+        """
+        List the files of a remote directory,
+        using the listing cache if provided.
+
+        Parameters
+        ----------
+        rmot_dir : str
+            The remote directory to list.
+        epoch_end : pd.Timestamp, optional
+            The latest end epoch of the data stored in the remote directory.
+            Used to determine if the cached listing is immutable.
+        cache_dic : dict, optional
+            The listing cache dictionary (see arodwl.load_listing_cache).
+            If None, the cache is not used. Default is None.
+        cache_ttl : int, optional
+            The time-to-live in seconds of the cached listings
+            of the open directories. Default is 0.
+
+        Returns
+        -------
+        list
+            A list of remote file paths.
+        """
+        hostname = self.access["hostname"]
+
+        if cache_dic is not None:
+            rmot_fil_lis = arodwl.get_listing_cache(
+                cache_dic,
+                hostname,
+                rmot_dir,
+                epoch_end=epoch_end if not pd.isna(epoch_end) else None,
+                ttl=cache_ttl,
+            )
+            if rmot_fil_lis is not None:
+                logger.debug("remote listing from cache: %s", rmot_dir)
+                return list(rmot_fil_lis)
+
+        if self.access["protocol"] == "http":
+            logger.warning(
+                "HTTP protocol doesn't support well file listing. Nasty effects may occur."
+            )
+            rmot_fil_lis = arodwl.list_remote_http(hostname, rmot_dir)
+        elif self.access["protocol"] == "ftp":
+            rmot_fil_lis = arodwl.list_remote_ftp(
+                hostname,
+                rmot_dir,
+                self.access["login"],
+                self.access["password"],
+                ftp_obj_inp=self.ftp_obj,
+            )
+        else:
+            logger.error("wrong protocol. Only 'http' and 'ftp' are supported.")
+            raise Exception
+
+        rmot_fil_lis = list(rmot_fil_lis)
+
+        if cache_dic is not None:
+            arodwl.set_listing_cache(cache_dic, hostname, rmot_dir, rmot_fil_lis)
+
+        return rmot_fil_lis
+
     def ask_local_raw(self):
         """
         Guess the paths and name of the local raw files based on the
@@ -442,6 +523,8 @@ class DownloadGnss(arocmn.StepGnss):
         ping_max_try=4,
         ping_timeout=20,
         ping_disable=False,
+        listing_cache=False,
+        listing_cache_ttl=0,
     ):
         """
         Frontend method to download files from a GNSS receiver
@@ -470,6 +553,13 @@ class DownloadGnss(arocmn.StepGnss):
             Timeout in seconds for pinging the remote server. Default is 20.
         ping_disable : bool, optional
             If True, skips the pinging of the remote server. Default is False.
+        listing_cache : bool, optional
+            If True, uses an on-disk cache for the remote listings ('ask' method only).
+            Directories with closed epochs are then never listed again.
+            Default is False.
+        listing_cache_ttl : int, optional
+            Time-to-live in seconds of the cached listings for directories
+            with open epochs. Default is 0 (always listed).
 
         Returns
         -------
@@ -500,20 +590,23 @@ class DownloadGnss(arocmn.StepGnss):
         if self.access["protocol"] == "ftp":
             self.set_ftp_obj(timeout=timeout, max_try=max_try, sleep_time=sleep_time)
 
-        # Guess remote raw file paths
-        if remote_find_method == "guess":
-            self.guess_remot_raw()
-            self.guess_local_raw()
-        # Ask remote raw file paths (works for FTP only!
-        elif remote_find_method == "ask":
-            self.ask_remote_raw()
-            self.ask_local_raw()
-        else:
-            logger.error(
-                "Wrong remote_find_method: %s ('ask' or 'guess' only are allowed)",
-                remote_find_method,
-            )
-            raise Exception
+        with self.timer.stage("listing"):
+            # Guess remote raw file paths
+            if remote_find_method == "guess":
+                self.guess_remot_raw()
+                self.guess_local_raw()
+            # Ask remote raw file paths (works for FTP only!
+            elif remote_find_method == "ask":
+                self.ask_remote_raw(
+                    listing_cache=listing_cache, listing_cache_ttl=listing_cache_ttl
+                )
+                self.ask_local_raw()
+            else:
+                logger.error(
+                    "Wrong remote_find_method: %s ('ask' or 'guess' only are allowed)",
+                    remote_find_method,
+                )
+                raise Exception
 
         # Check local files and update table
         self.check_local_files()
@@ -583,9 +676,23 @@ class DownloadGnss(arocmn.StepGnss):
         This `fetch_remote_files` method is for the download stricly speaking.
         Ìn operation, use the `download` method which does a broader
         preliminary actions.
+
+        If the `max_connections` key of the `access` dictionary is greater
+        than 1, the files are fetched concurrently, with a pool of
+        `max_connections` FTP connections (see `fetch_remote_files_pool`).
         """
         download_files_list = []
 
+        n_conn = int(self.access.get("max_connections", 1) or 1)
+        if n_conn > 1:
+            return self.fetch_remote_files_pool(
+                n_conn,
+                force=force,
+                timeout=timeout,
+                max_try=max_try,
+                sleep_time=sleep_time,
+            )
+
         for irow, row in self.table.iterrows():
             file_dl_out = self.mono_fetch(
                 irow,
@@ -599,6 +706,118 @@ class DownloadGnss(arocmn.StepGnss):
 
         return download_files_list
 
+    def fetch_remote_files_pool(
+        self, max_connections, force=False, timeout=60, max_try=4, sleep_time=5
+    ):
+        """
+        Download concurrently the files identified in the table
+        with a bounded pool of remote connections.
+
+        For the FTP protocol, each connection of the pool is an independent
+        FTP object, with its own login. A worker borrows a connection,
+        fetches one row with `mono_fetch` (and its usual retry logic),
+        and gives the connection back to the pool.
+        Each row is processed on a light copy of the DownloadGnss object
+        (see `copy_mono`), and merged back in the table in the index order.
+
+        Parameters
+        ----------
+        max_connections : int
+            The maximum number of simultaneous connections to the remote server.
+        force : bool, optional
+            Redundant with the `force` method, kept for consistency with `mono_fetch`.
+        timeout : int, optional
+            Timeout in seconds for the download operations. Default is 60.
+        max_try : int, optional
+            Maximum number of retry attempts for the download operations. Default is 4.
+        sleep_time : int, optional
+            Sleep time in seconds between retry attempts. Default is 5.
+
+        Returns
+        -------
+        list
+            The list of the downloaded files.
+        """
+        download_files_list = []
+
+        n_todo = int(self.table["ok_inp"].sum())
+        n_conn = max(1, min(max_connections, n_todo))
+
+        # +++++ the connections pool
+        conn_pool = queue.Queue()
+        if self.access["protocol"] == "ftp":
+            for _ in range(n_conn):
+                ftp_obj = arodwl.ftp_create_obj(
+                    hostname_inp=self.access["hostname"],
+                    username=self.access["login"],
+                    password=self.access["password"],
+                    timeout=timeout,
+                    max_try=max_try,
+                    sleep_time=sleep_time,
+                )
+                if ftp_obj:
+                    conn_pool.put(ftp_obj)
+            if conn_pool.empty():
+                logger.error(
+                    "unable to open any FTP connection to %s", self.access["hostname"]
+                )
+                conn_pool.put(self.ftp_obj)
+        else:
+            # for HTTP, no persistent object, only a bound on the simultaneous requests
+            for _ in range(n_conn):
+                conn_pool.put(None)
+
+        n_conn = conn_pool.qsize()
+        logger.info(
+            "fetch with a pool of %i connections to %s",
+            n_conn,
+            self.access["hostname"],
+        )
+
+        def _row_worker(irow):
+            stp_row = self.copy_mono(irow)
+            ftp_obj = conn_pool.get()
+            try:
+                file_dl_out = stp_row.mono_fetch(
+                    irow,
+                    force=force,
+                    timeout=timeout,
+                    max_try=max_try,
+                    sleep_time=sleep_time,
+                    ftp_obj_inp=ftp_obj,
+                )
+            finally:
+                conn_pool.put(ftp_obj)
+            return stp_row, file_dl_out
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=n_conn) as executor:
+            futures_dic = {
+                irow: executor.submit(_row_worker, irow) for irow in self.table.index
+            }
+
+        # +++++ merge the results in the table, in the index order
+        for irow, fut in futures_dic.items():
+            try:
+                stp_row, file_dl_out = fut.result()
+            except Exception as e:
+                logger.error("fetch error for %s: %s", self.table.loc[irow, "fname"], e)
+                self.table.loc[irow, "ok_out"] = False
+                continue
+            self.merge_mono(irow, stp_row)
+            if file_dl_out:
+                download_files_list.append(file_dl_out)
+
+        # +++++ close the connections of the pool
+        while not conn_pool.empty():
+            ftp_obj = conn_pool.get()
+            if ftp_obj and ftp_obj is not self.ftp_obj:
+                try:
+                    ftp_obj.quit()
+                except Exception as e:
+                    logger.debug("FTP connection closing failed: %s", e)
+
+        return download_files_list
+
     #               _   _                   _ _                           _ _    __                                 __
     #     /\       | | (_)                 ( | )                         ( | )  / /                                 \ \
     #    /  \   ___| |_ _  ___  _ __  ___   V V_ __ ___   ___  _ __   ___ V V  | | ___  _ __    _ __ _____      _____| |
@@ -607,7 +826,9 @@ class DownloadGnss(arocmn.StepGnss):
     # /_/    \_\___|\__|_|\___/|_| |_|___/    |_| |_| |_|\___/|_| |_|\___/     | |\___/|_| |_| |_|  \___/ \_/\_/ |___/ |
     #                                                                           \_\                                 /_/
 
-    def mono_fetch(self, irow, force=False, timeout=60, max_try=4, sleep_time=5):
+    def mono_fetch(
+        self, irow, force=False, timeout=60, max_try=4, sleep_time=5, ftp_obj_inp=None
+    ):
 
         if not self.mono_ok_check(irow, "fetch"):
             return None
@@ -627,49 +848,52 @@ class DownloadGnss(arocmn.StepGnss):
         tmpdir_use = self.tmp_dir_downloaded
 
         # +++++ create the directory if it does not exist
-        if not os.path.exists(outdir_use):
-            os.makedirs(outdir_use)
+        # the rows can be fetched concurrently, see fetch_remote_files
+        os.makedirs(outdir_use, exist_ok=True)
 
         # +++++ download the file
-        file_dl_tmp = None
-        file_dl_out = None
-        if not self.access["protocol"] in ("ftp", "http"):
-            logger.critical("wrong protocol %s", self.access["protocol"])
-            raise Exception
-        elif self.access["protocol"] == "http":
-            try:
-                file_dl_tmp = arodwl.download_http(
-                    url=self.table.loc[irow, "fpath_inp"],
-                    output_dir=tmpdir_use,
-                    timeout=timeout,
-                    max_try=max_try,
-                    sleep_time=sleep_time,
-                )
-                dl_ok = True
-            except Exception as e:
-                logger.error("HTTP download error: %s", str(e))
-                dl_ok = False
+        with self.timer.stage("download", irow) as tim:
+            file_dl_tmp = None
+            file_dl_out = None
+            if not self.access["protocol"] in ("ftp", "http"):
+                logger.critical("wrong protocol %s", self.access["protocol"])
+                raise Exception
+            elif self.access["protocol"] == "http":
+                try:
+                    file_dl_tmp = arodwl.download_http(
+                        url=self.table.loc[irow, "fpath_inp"],
+                        output_dir=tmpdir_use,
+                        timeout=timeout,
+                        max_try=max_try,
+                        sleep_time=sleep_time,
+                    )
+                    dl_ok = True
+                except Exception as e:
+                    logger.error("HTTP download error: %s", str(e))
+                    dl_ok = False
 
-        elif self.access["protocol"] == "ftp":
-            try:
-                file_dl_tmp = arodwl.download_ftp(
-                    self.table.loc[irow, "fpath_inp"],
-                    tmpdir_use,
-                    username=self.access["login"],
-                    password=self.access["password"],
-                    timeout=timeout,
-                    max_try=max_try,
-                    sleep_time=sleep_time,
-                    ftp_obj_inp=self.ftp_obj,
-                )
-                dl_ok = True
-            except Exception as e:
-                logger.error("FTP download error: %s", str(e))
+            elif self.access["protocol"] == "ftp":
+                try:
+                    file_dl_tmp = arodwl.download_ftp(
+                        self.table.loc[irow, "fpath_inp"],
+                        tmpdir_use,
+                        username=self.access["login"],
+                        password=self.access["password"],
+                        timeout=timeout,
+                        max_try=max_try,
+                        sleep_time=sleep_time,
+                        ftp_obj_inp=ftp_obj_inp if ftp_obj_inp else self.ftp_obj,
+                    )
+                    dl_ok = True
+                except Exception as e:
+                    logger.error("FTP download error: %s", str(e))
+                    dl_ok = False
+
+            else:  # ++ this case should never happen since there is a protocol test at the begining
                 dl_ok = False
+                pass
 
-        else:  # ++ this case should never happen since there is a protocol test at the begining
-            dl_ok = False
-            pass
+            tim["bytes_out"] = arocmn.file_size(file_dl_tmp)
 
         # +++++ check the downloaded file size
         if dl_ok:
@@ -8,6 +8,7 @@ Created on Mon Mar 27 09:16:34 2023
 
 import ftplib
 import io
+import json
 
 import os
 
@@ -26,6 +27,7 @@ import tqdm
 #### Import the logger
 import logging
 import autorino.cfgenv.env_read as aroenv
+import autorino.common as arocmn
 
 logger = logging.getLogger("autorino")
 logger.setLevel(aroenv.ARO_ENV_DIC["general"]["log_level"])
@@ -136,15 +138,52 @@ def ftp_create_obj(
             return ftp
         except TimeoutError as e:
             try_count += 1
+            arocmn.count_event("timeouts")
             if try_count > max_try:
                 raise e
             else:
                 print(e)
+                arocmn.count_event("retries")
                 time.sleep(sleep_time)
         except (OSError, ftplib.error_perm, Exception) as e:
             logger.error("Unable to create FTP object: %s", str(e))
             return None
 
+def _ftp_reconnect(ftp_obj, hostname, username=None, password=None, timeout=15):
+    """
+    Reconnects an FTP object in place (thus also an object of a connections pool),
+    e.g. after a failed transfer.
+
+    Parameters
+    ----------
+    ftp_obj : ftplib.FTP
+        The FTP object.
+    hostname : str
+        The hostname of the FTP server (if not known by the object).
+    username : str, optional
+        The username for FTP login. Default is None (no login).
+    password : str, optional
+        The password for FTP login. Default is None (no login).
+    timeout : int, optional
+        The timeout for FTP connection in seconds. Default is 15 seconds.
+
+    Returns
+    -------
+    None
+    """
+    try:
+        ftp_obj.close()
+    except Exception:
+        pass
+    if ftp_obj.host:
+        ftp_obj.connect(ftp_obj.host, ftp_obj.port, timeout=timeout)
+    else:
+        ftp_obj.connect(hostname, timeout=timeout)
+    if (username is not None) and (password is not None):
+        ftp_obj.login(username, password)
+    return None
+
+
 def list_remote_ftp(
     hostname,
     remote_dir,
@@ -273,6 +312,12 @@ def download_ftp(
     """
     Download a file from an FTP server with retry logic and progress bar.
 
+    The file is downloaded in a ``<filename>.part`` file, renamed to its final
+    name once its size is checked against the remote one.
+    A ``.part`` file left by a previous try or run is resumed with a REST offset.
+    Before a retry, the FTP object is reconnected (the connection of a failed
+    transfer is often dead), thus a ``.part`` file is resumed in the same run.
+
     Parameters
     ----------
     url : str
@@ -354,24 +399,43 @@ def download_ftp(
     ftp_obj.sendcmd("TYPE I")
     file_size = ftp_obj.size(filename)
     output_path = os.path.join(output_dir, filename)
+    part_path = _part_path(output_path)
     try_count = 0
 
     while True:
         try:
+            if try_count:
+                # the connection of the failed try is likely dead
+                _ftp_reconnect(ftp_obj, url_host, username, password, timeout)
+                ftp_obj.cwd(url_dir)
+                ftp_obj.sendcmd("TYPE I")
+
+            # a partial file from a previous try/run is resumed (REST offset)
+            offset = _resume_offset(part_path, file_size)
+            if offset:
+                logger.info("resume download of %s at byte %i", filename, offset)
+
             with tqdm.tqdm(
-                total=file_size, unit="B", unit_scale=True, desc=filename
-            ) as pbar, open(output_path, "wb") as f:
+                total=file_size, initial=offset, unit="B", unit_scale=True, desc=filename
+            ) as pbar, open(part_path, "ab" if offset else "wb") as f:
 
                 _ftp_callback.bytes_transferred = 0
-                ftp_obj.retrbinary(
-                    "RETR " + filename,
-                    lambda data: (f.write(data), pbar.update(len(data))),
-                    1024,
-                )
-                break
+                if not file_size or offset < file_size:
+                    ftp_obj.retrbinary(
+                        "RETR " + filename,
+                        lambda data: (f.write(data), pbar.update(len(data))),
+                        1024,
+                        rest=offset if offset else None,
+                    )
+
+            _check_complete_size(part_path, file_size)
+            os.replace(part_path, output_path)
+            break
         # here are all the possible exceptions that can be raised
         except Exception as e:
             try_count += 1
+            if isinstance(e, TimeoutError):
+                arocmn.count_event("timeouts")
             if try_count > max_try:
                 logger.error("download failed, max try exceeded: %s", str(e))
                 raise AutorinoDownloadError
@@ -380,16 +444,162 @@ def download_ftp(
                 logger.warning(
                     "download failed (%s), try %i/%i", str(e), try_count, max_try
                 )
+                arocmn.count_event("retries")
                 time.sleep(sleep_time)
 
-    f.close()
-
     if disposable_ftp_obj:
         ftp_obj.quit()
 
     return output_path
 
 
+def load_listing_cache(cache_path):
+    """
+    Load the on-disk cache of the remote directories listings.
+
+    Parameters
+    ----------
+    cache_path : str
+        The path of the JSON cache file.
+
+    Returns
+    -------
+    dict
+        The cache dictionary. Keys are '<hostname>|<remote_dir>',
+        values are dictionaries with the 'listing_time' (POSIX timestamp)
+        and the 'files' list.
+        An empty dictionary is returned if the cache file does not exist
+        or is corrupted.
+    """
+    if not os.path.isfile(cache_path):
+        return dict()
+
+    try:
+        with open(cache_path, "r") as f:
+            cache_dic = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("unable to read the listing cache %s: %s", cache_path, e)
+        cache_dic = dict()
+
+    return cache_dic
+
+
+def save_listing_cache(cache_path, cache_dic, max_age_days=60):
+    """
+    Save the cache of the remote directories listings on disk.
+
+    The file is written atomically (temporary file + rename),
+    and the entries older than max_age_days are purged.
+
+    Parameters
+    ----------
+    cache_path : str
+        The path of the JSON cache file.
+    cache_dic : dict
+        The cache dictionary (see load_listing_cache).
+    max_age_days : int, optional
+        The maximum age of the cached entries in days. Default is 60.
+
+    Returns
+    -------
+    None
+    """
+    time_min = time.time() - max_age_days * 86400
+    cache_dic_out = {
+        k: v for k, v in cache_dic.items() if v.get("listing_time", 0) > time_min
+    }
+
+    cache_path_tmp = cache_path + "." + str(os.getpid()) + ".tmp"
+    try:
+        with open(cache_path_tmp, "w") as f:
+            json.dump(cache_dic_out, f)
+        os.replace(cache_path_tmp, cache_path)
+    except OSError as e:
+        logger.warning("unable to write the listing cache %s: %s", cache_path, e)
+
+    return None
+
+
+def get_listing_cache(
+    cache_dic, hostname, remote_dir, epoch_end=None, ttl=3600, closed_delay=3600
+):
+    """
+    Get a remote directory listing from the cache, if it is still valid.
+
+    A cached listing is valid if:
+    * it is younger than the time-to-live ttl, or
+    * the directory was closed when it was listed, i.e. it was listed
+      more than closed_delay seconds after the end of the epochs it
+      contains (epoch_end). Such a listing is considered immutable.
+
+    Parameters
+    ----------
+    cache_dic : dict
+        The cache dictionary (see load_listing_cache).
+    hostname : str
+        The hostname of the remote server.
+    remote_dir : str
+        The remote directory.
+    epoch_end : pd.Timestamp or datetime, optional
+        The latest end epoch of the data stored in the remote directory.
+        If not provided, the directory is never considered as closed.
+    ttl : int, optional
+        The time-to-live of the cached listings in seconds. Default is 3600.
+    closed_delay : int, optional
+        The delay in seconds after epoch_end after which the directory
+        is considered as closed. Default is 3600.
+
+    Returns
+    -------
+    list or None
+        The cached list of files, or None if there is no valid cached listing.
+    """
+    entry = cache_dic.get(hostname + "|" + remote_dir)
+    if not entry:
+        return None
+
+    listing_time = entry["listing_time"]
+
+    if time.time() - listing_time < ttl:
+        return entry["files"]
+    elif epoch_end is not None and listing_time > epoch_end.timestamp() + closed_delay:
+        return entry["files"]
+    else:
+        return None
+
+
+def set_listing_cache(cache_dic, hostname, remote_dir, file_list):
+    """
+    Store a remote directory listing in the cache.
+
+    Empty listings are not stored, since they are
+    also the output of failed listings.
+
+    Parameters
+    ----------
+    cache_dic : dict
+        The cache dictionary (see load_listing_cache).
+    hostname : str
+        The hostname of the remote server.
+    remote_dir : str
+        The remote directory.
+    file_list : list
+        The list of the remote files.
+
+    Returns
+    -------
+    None
+    """
+    if not file_list:
+        return None
+
+    cache_dic[hostname + "|" + remote_dir] = {
+        "listing_time": time.time(),
+        "files": list(file_list),
+    }
+    return None
+
+
 #  _    _ _______ _______ _____
 # | |  | |__   __|__   __|  __ \
 # | |__| |  | |     | |  | |__) |
@@ -449,6 +659,15 @@ def download_http(url, output_dir, timeout=120, max_try=4, sleep_time=5):
     """
     Download a file from an HTTP server with retry logic and progress bar.
 
+    The file is downloaded in a ``<filename>.part`` file, renamed to its final
+    name once its size is checked against the remote one.
+    A ``.part`` file left by a previous try or run is resumed with a Range header.
+    If the server rejects the range (status 416), the ``.part`` file is
+    discarded and the download restarts from the beginning.
+    The file is asked without content encoding: if the server encodes it
+    anyway (e.g. gzip), the size of the decoded file can not be checked
+    against the remote one, and the download is not resumed.
+
     Parameters
     ----------
     url : str
@@ -472,40 +691,191 @@ def download_http(url, output_dir, timeout=120, max_try=4, sleep_time=5):
     AutorinoDownloadError
         If the download fails after the maximum number of retry attempts.
     """
+    # the remote size is the one of the raw file, not of a compressed transfer
+    headers_base = {"Accept-Encoding": "identity"}
+
     # Get file size
-    response = requests.head(url, timeout=timeout)
-    file_size = int(response.headers.get("content-length", 0))
+    response = requests.head(url, timeout=timeout, headers=headers_base)
+    if _http_encoded(response):
+        file_size = 0
+    else:
+        file_size = int(response.headers.get("content-length", 0))
 
     # Construct output path
     filename = url.split("/")[-1]
     output_path = os.path.join(output_dir, filename)
+    part_path = _part_path(output_path)
 
     # Download file with progress bar
     try_count = 0
     while True:
         try:
-            response = requests.get(url, stream=True, timeout=timeout)
-            with open(output_path, "wb") as f:
+            # a partial file from a previous try/run is resumed (Range header)
+            offset = _resume_offset(part_path, file_size)
+            if file_size and offset >= file_size:
+                _check_complete_size(part_path, file_size)
+                os.replace(part_path, output_path)
+                break
+
+            headers = dict(headers_base)
+            if offset:
+                headers["Range"] = "bytes={}-".format(offset)
+            response = requests.get(
+                url, stream=True, timeout=timeout, headers=headers
+            )
+
+            # encoded anyway by the server: no size check nor resume
+            if file_size and _http_encoded(response):
+                logger.warning(
+                    "content encoded by server (%s), no size check nor resume: %s",
+                    response.headers.get("content-encoding"),
+                    url,
+                )
+                file_size = 0
+                if offset:
+                    response.close()
+                    os.remove(part_path)
+                    continue
+
+            # the range is not satisfiable: the remote file changed, restart
+            if offset and response.status_code == 416:
+                logger.warning(
+                    "resume rejected by server (416), partial file discarded: %s",
+                    part_path,
+                )
+                response.close()
+                os.remove(part_path)
+                continue
+
+            response.raise_for_status()
+
+            # the server may ignore the Range header (status 200 instead of 206)
+            if offset and response.status_code != 206:
+                logger.warning("resume not supported by server, restart: %s", url)
+                offset = 0
+            elif offset:
+                logger.info("resume download of %s at byte %i", filename, offset)
+
+            with open(part_path, "ab" if offset else "wb") as f:
                 with tqdm.tqdm(
-                    total=file_size, unit="B", unit_scale=True, desc=filename
+                    total=file_size or None,
+                    initial=offset,
+                    unit="B",
+                    unit_scale=True,
+                    desc=filename,
                 ) as pbar:
                     for data in response.iter_content(chunk_size=1024):
                         f.write(data)
                         pbar.update(len(data))
+
+            _check_complete_size(part_path, file_size)
+            os.replace(part_path, output_path)
             break
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, AutorinoDownloadError) as e:
             try_count += 1
+            if isinstance(e, requests.exceptions.Timeout):
+                arocmn.count_event("timeouts")
             if try_count > max_try:
                 raise AutorinoDownloadError
 
             logger.warning(
                 "download failed (%s), try %i/%i", str(e), try_count, max_try
             )
+            arocmn.count_event("retries")
             time.sleep(sleep_time)
 
     return output_path
 
 
+def _http_encoded(response):
+    """
+    Returns True if the body of an HTTP response has a content encoding
+    (e.g. gzip), i.e. if its Content-Length is not the size of the file.
+    """
+    encoding = response.headers.get("content-encoding", "")
+    return encoding.strip().lower() not in ("", "identity")
+
+
+def _part_path(output_path):
+    """
+    Returns the path of the partial file of a download,
+    renamed to output_path once the download is complete.
+    """
+    return output_path + ".part"
+
+
+def _resume_offset(part_path, remote_size=None):
+    """
+    Returns the offset to resume a partial download,
+    i.e. the size of the partial local file (see ``_part_path``).
+
+    Only a ``.part`` file is resumed, never a final file:
+    a remote file overwritten with the same size is thus downloaded again.
+    The offset is 0 if the partial file does not exist,
+    or if it is bigger than the remote file (it is then discarded).
+
+    Parameters
+    ----------
+    part_path : str
+        The path of the partial local file.
+    remote_size : int, optional
+        The size of the remote file in bytes.
+        If not provided (or 0), no resume is done.
+
+    Returns
+    -------
+    int
+        The offset in bytes.
+    """
+    if not remote_size or not os.path.isfile(part_path):
+        return 0
+
+    offset = os.path.getsize(part_path)
+    if offset > remote_size:
+        logger.warning(
+            "local partial file bigger than remote one, discarded: %s", part_path
+        )
+        os.remove(part_path)
+        offset = 0
+
+    return offset
+
+
+def _check_complete_size(output_path, remote_size=None):
+    """
+    Checks that a downloaded file has the same size as the remote one.
+
+    Parameters
+    ----------
+    output_path : str
+        The path of the downloaded local file.
+    remote_size : int, optional
+        The size of the remote file in bytes.
+        If not provided (or 0), no check is done.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    AutorinoDownloadError
+        If the downloaded file is incomplete.
+    """
+    if not remote_size:
+        return None
+
+    local_size = os.path.getsize(output_path)
+    if local_size != remote_size:
+        raise AutorinoDownloadError(
+            "incomplete download ({}/{}B): {}".format(
+                local_size, remote_size, output_path
+            )
+        )
+
+    return None
+
+
 #  _____ _
 # |  __ (_)
 # | |__) | _ __   __ _
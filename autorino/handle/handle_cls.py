@@ -338,6 +338,9 @@ class HandleGnss(arocmn.StepGnss):
         """
 
         local_paths_list = []
+        # the input tree is scanned once, and the epochs' searches are
+        # resolved against this index
+        fs_index = arocmn.FsIndex()
 
         for epoch in self.epoch_range.eporng_list(end_bound=True):
             # guess the potential local files
@@ -348,11 +351,11 @@ class HandleGnss(arocmn.StepGnss):
             else:
                 patrn = ".*"
 
-            local_paths_list_epo = utils.find_recursive(
-                local_dir_use, pattern=patrn, regex=True
-            )
+            local_paths_list_epo = fs_index.find(local_dir_use, pattern=patrn)
             local_paths_list.extend(local_paths_list_epo)
 
+        logger.debug(fs_index)
+
         logger.info("nbr local files found: %s", len(local_paths_list))
         if return_as_step_obj:
             return arocmn.rnxs2step_obj(rnxs_lis_inp=local_paths_list)
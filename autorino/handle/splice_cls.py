@@ -10,8 +10,8 @@ Created on 20/05/2025 20:26:56
 
 
 # Create a logger object.
+import concurrent.futures
 import os
-import time
 
 import numpy as np
 import pandas as pd
@@ -109,6 +109,8 @@ class SpliceGnss(arohdlcls.HandleGnss):
         rinexmod_options=None,
         verbose=False,
         force=False,
+        decompress_workers=1,
+        workers=1,
     ):
         """
         Splice RINEX files.
@@ -137,6 +139,14 @@ class SpliceGnss(arohdlcls.HandleGnss):
             If True, prints the table for debugging purposes. Default is False.
         force : bool, optional
             If True, forces the splicing operation. Default is False.
+        decompress_workers : int, optional
+            The number of processes decompressing the input RINEXs
+            of each spliced epoch concurrently. If more than 1, the calling
+            script needs a ``if __name__ == "__main__":`` guard (see ``decompress_files``).
+            Default is 1 (sequential).
+        workers : int, optional
+            The number of epochs spliced concurrently (see ``splice_core``).
+            Default is 1 (sequential).
 
         Returns
         -------
@@ -169,7 +179,10 @@ class SpliceGnss(arohdlcls.HandleGnss):
 
         # Perform the core splicing operation
         self.splice_core(
-            handle_software=handle_software, rinexmod_options=rinexmod_options
+            handle_software=handle_software,
+            rinexmod_options=rinexmod_options,
+            decompress_workers=decompress_workers,
+            workers=workers,
         )
 
         # close the log file
@@ -178,7 +191,12 @@ class SpliceGnss(arohdlcls.HandleGnss):
         return None
 
     def splice_core(
-        self, handle_software="converto", rinexmod_options=None, rm_inp_files=False
+        self,
+        handle_software="converto",
+        rinexmod_options=None,
+        rm_inp_files=False,
+        decompress_workers=1,
+        workers=1,
     ):
         """
         Perform the core splicing operation.
@@ -193,6 +211,15 @@ class SpliceGnss(arohdlcls.HandleGnss):
             The software to use for handling the RINEX files. Default is "converto".
         rinexmod_options : dict, optional
             Additional options for the RINEX modification. Default is None.
+        rm_inp_files : bool, optional
+            Not implemented yet. Default is False.
+        decompress_workers : int, optional
+            The number of processes decompressing the input RINEXs
+            of each spliced epoch concurrently. Default is 1 (sequential).
+        workers : int, optional
+            The number of epochs (rows) spliced concurrently
+            (splice, rinexmod and final move), see ``splice_workers_pool``.
+            Default is 1 (sequential).
 
         Returns
         -------
@@ -201,45 +228,167 @@ class SpliceGnss(arohdlcls.HandleGnss):
 
         self.set_tmp_dirs()
 
-        for irow, row in self.table.iterrows():
-            if not self.mono_ok_check(
-                irow,
-                "splice",
-                fname_custom=arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
-            ):
-                continue
+        chain_kwargs = dict(
+            handle_software=handle_software,
+            rinexmod_options=rinexmod_options,
+            decompress_workers=decompress_workers,
+        )
 
-            logger.info(
-                ">>>> Splicing %s between %s and %s",
-                self.table.loc[irow, "site"],
-                arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
-                arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_end"]),
-            )
+        if workers and workers > 1:
+            self.splice_workers_pool(workers, **chain_kwargs)
+        else:
+            for irow, row in self.table.iterrows():
+                self.mono_splice_chain(irow, **chain_kwargs)
+
+        self.remov_tmp_files()
+        if workers and workers > 1:
+            # the rows' tmp subdirs are removed if empty
+            for tmp_dir in (self.tmp_dir_converted, self.tmp_dir_rinexmoded):
+                for d in Path(tmp_dir).glob("row_*"):
+                    if d.is_dir() and not any(d.iterdir()):
+                        d.rmdir()
+
+        return None
+
+    def splice_workers_pool(self, workers, **chain_kwargs):
+        """
+        Runs the splicing chain of the table's rows with a pool of workers.
+
+        The epochs (rows) are independent: each one has its own input RINEXs
+        and its own output epoch.
+        Each row is thus processed by a light copy of the SpliceGnss object
+        (see ``copy_mono``), with its own temporary subdirectories
+        (converted & rinexmoded).
+        The splicing itself is done by external programs (subprocesses,
+        bounded by the shared converter runner), thus threads are enough
+        to use several cores.
+
+        Once all the rows are processed, the one-row tables are merged back
+        in the main table following the original index order.
+
+        Parameters
+        ----------
+        workers : int
+            The number of rows processed concurrently.
+        **chain_kwargs
+            Keyword arguments passed to ``mono_splice_chain``.
 
-            self.mono_splice(
-                irow, self.tmp_dir_converted, handle_software=handle_software
+        Returns
+        -------
+        None
+        """
+        logger.info("splicing with a pool of %i workers", workers)
+
+        def _row_worker(irow):
+            stp_row = self.copy_mono(irow)
+
+            row_subdir = "row_" + str(irow)
+            stp_row.tmp_dir_converted = os.path.join(self.tmp_dir_converted, row_subdir)
+            stp_row.tmp_dir_rinexmoded = os.path.join(
+                self.tmp_dir_rinexmoded, row_subdir
             )
+            for d in (stp_row.tmp_dir_converted, stp_row.tmp_dir_rinexmoded):
+                os.makedirs(d, exist_ok=True)
+
+            stp_row.mono_splice_chain(irow, **chain_kwargs)
+            return stp_row
 
-            if not self.table.loc[irow, "ok_out"] and self.table.loc[irow, "ok_inp"]:
-                # print this only if ok_inp is True, i.e. the file should have been converted
-                logger.error("unable to splice\n%s", self.table.loc[irow].to_string())
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures_dic = {
+                irow: executor.submit(_row_worker, irow) for irow in self.table.index
+            }
+
+        ### deterministic merge, following the table's index order
+        for irow, fut in futures_dic.items():
+            try:
+                stp_row = fut.result()
+            except Exception as e:
+                logger.error(
+                    "Error for the epoch: %s",
+                    arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
+                )
+                logger.exception("Exception raised: %s", e)
+                self.table.loc[irow, "ok_out"] = False
                 continue
 
-            self.mono_rinexmod(
-                irow, self.tmp_dir_rinexmoded, rinexmod_options=rinexmod_options
-            )
+            self.merge_mono(irow, stp_row)
+
+        return None
+
+    def mono_splice_chain(
+        self,
+        irow,
+        handle_software="converto",
+        rinexmod_options=None,
+        decompress_workers=1,
+    ):
+        """
+        "on row" method
 
-            # if rm_inp_files:
-            # IMPLEMENT ME !!!!!!
+        Runs the full splicing chain for a row of the table:
+        splice, rinexmod and final move.
 
-            if self.tmp_dir_rinexmoded != self.out_dir:
-                self.mono_mv_final(irow, self.out_dir)
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+        handle_software : str, optional
+            The software to use for handling the RINEX files. Default is "converto".
+        rinexmod_options : dict, optional
+            Additional options for the RINEX modification. Default is None.
+        decompress_workers : int, optional
+            The number of processes decompressing the input RINEXs
+            of the spliced epoch concurrently. Default is 1 (sequential).
+
+        Returns
+        -------
+        None
+        """
+        if not self.mono_ok_check(
+            irow,
+            "splice",
+            fname_custom=arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
+        ):
+            return None
+
+        logger.info(
+            ">>>> Splicing %s between %s and %s",
+            self.table.loc[irow, "site"],
+            arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
+            arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_end"]),
+        )
+
+        self.mono_splice(
+            irow,
+            self.tmp_dir_converted,
+            handle_software=handle_software,
+            decompress_workers=decompress_workers,
+        )
+
+        if not self.table.loc[irow, "ok_out"] and self.table.loc[irow, "ok_inp"]:
+            # print this only if ok_inp is True, i.e. the file should have been converted
+            logger.error("unable to splice\n%s", self.table.loc[irow].to_string())
+            return None
+
+        self.mono_rinexmod(
+            irow, self.tmp_dir_rinexmoded, rinexmod_options=rinexmod_options
+        )
+
+        # if rm_inp_files:
+        # IMPLEMENT ME !!!!!!
+
+        if self.tmp_dir_rinexmoded != self.out_dir:
+            self.mono_mv_final(irow, self.out_dir)
 
-        self.remov_tmp_files()
         return None
 
     def mono_splice(
-        self, irow, out_dir=None, table_col="fpath_inp", handle_software="converto"
+        self,
+        irow,
+        out_dir=None,
+        table_col="fpath_inp",
+        handle_software="converto",
+        decompress_workers=1,
     ):
         """
         "on row" method
@@ -275,7 +424,9 @@ class SpliceGnss(arohdlcls.HandleGnss):
             frnx_spliced = None
         else:
             ### it is not the current object inputs which are decompressed, but the row sub object's ones
-            spc_row.tmp_decmp_files, _ = spc_row.decompress()
+            spc_row.tmp_decmp_files, _ = spc_row.decompress(
+                workers=decompress_workers
+            )
 
             #### add a test here to be sure that only one epoch is inside
             out_dir_use = self.translate_path(
@@ -288,7 +439,8 @@ class SpliceGnss(arohdlcls.HandleGnss):
                 irow, handle_software=handle_software, conv_options_sup=["-cat"]
             )
             try:
-                time.sleep(1)
+                # no delay needed: the converter writes in its own private
+                # output directory (see converter_run)
                 frnx_spliced, _ = arocnv.converter_run(
                     fpath_inp_lst,
                     out_dir_use,
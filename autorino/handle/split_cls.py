@@ -8,6 +8,7 @@ Created on 20/05/2025 20:26:44
 
 
 # Create a logger object.
+import concurrent.futures
 import os
 import time
 
@@ -105,6 +106,8 @@ class SplitGnss(arohdlcls.HandleGnss):
         rinexmod_options=None,
         verbose=False,
         force=False,
+        decompress_workers=1,
+        workers=1,
     ):
         """
         Split RINEX files.
@@ -133,6 +136,14 @@ class SplitGnss(arohdlcls.HandleGnss):
             If True, prints the table for debugging purposes. Default is False.
         force : bool, optional
             If True, forces the splitting operation. Default is False.
+        decompress_workers : int, optional
+            The number of processes decompressing the input RINEXs
+            concurrently. If more than 1, the calling script needs
+            a ``if __name__ == "__main__":`` guard (see ``decompress_files``).
+            Default is 1 (sequential).
+        workers : int, optional
+            The number of output windows split concurrently (see ``split_core``).
+            Default is 1 (sequential).
 
         Returns
         -------
@@ -165,7 +176,10 @@ class SplitGnss(arohdlcls.HandleGnss):
 
         # Perform the core splitting operation
         self.split_core(
-            handle_software=handle_software, rinexmod_options=rinexmod_options
+            handle_software=handle_software,
+            rinexmod_options=rinexmod_options,
+            decompress_workers=decompress_workers,
+            workers=workers,
         )
 
         # close the log file
@@ -173,13 +187,23 @@ class SplitGnss(arohdlcls.HandleGnss):
 
         return None
 
-    def split_core(self, handle_software="converto", rinexmod_options=None):
+    def split_core(
+        self,
+        handle_software="converto",
+        rinexmod_options=None,
+        decompress_workers=1,
+        workers=1,
+    ):
         """
         Perform the core splitting operation.
 
-        This method handles the core splitting operation for RINEX files. It iterates over each row
-        in the table, performs the splitting operation using the specified software, and applies
-        RINEX modifications if necessary. Temporary files are removed after the operation.
+        This method handles the core splitting operation for RINEX files.
+        The source RINEXs are first decompressed, once per source file
+        (several output windows are usually cut from the same source,
+        e.g. 24 hourly files from a daily file).
+        Then, it iterates over each row in the table, performs the splitting
+        operation using the specified software, and applies RINEX modifications
+        if necessary. Temporary files are removed after the operation.
 
         Parameters
         ----------
@@ -187,6 +211,13 @@ class SplitGnss(arohdlcls.HandleGnss):
             The software to use for handling the RINEX files. Default is "converto".
         rinexmod_options : dict, optional
             Additional options for the RINEX modification. Default is None.
+        decompress_workers : int, optional
+            The number of processes decompressing the source RINEXs concurrently,
+            before the splitting loop. Default is 1 (sequential).
+        workers : int, optional
+            The number of output windows (rows) split concurrently
+            (split, rinexmod and final move), see ``split_workers_pool``.
+            Default is 1 (sequential).
 
         Returns
         -------
@@ -194,35 +225,144 @@ class SplitGnss(arohdlcls.HandleGnss):
         """
 
         self.set_tmp_dirs()
-        for irow, row in self.table.iterrows():
 
-            if not self.mono_ok_check(
-                irow,
-                "split",
-                fname_custom=arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
-            ):
-                continue
+        # all the sources are decompressed at once, each source only once,
+        # mono_decompress has then nothing left to do in the loop
+        self.tmp_decmp_files, _ = self.decompress_pool(max(1, decompress_workers or 1))
+
+        chain_kwargs = dict(
+            handle_software=handle_software,
+            rinexmod_options=rinexmod_options,
+        )
+
+        if workers and workers > 1:
+            self.split_workers_pool(workers, **chain_kwargs)
+        else:
+            for irow, row in self.table.iterrows():
+                self.mono_split_chain(irow, **chain_kwargs)
+
+        self.remov_tmp_files()
+        if workers and workers > 1:
+            # the rows' tmp subdirs are removed if empty
+            for tmp_dir in (self.tmp_dir_converted, self.tmp_dir_rinexmoded):
+                for d in Path(tmp_dir).glob("row_*"):
+                    if d.is_dir() and not any(d.iterdir()):
+                        d.rmdir()
+
+        return None
+
+    def split_workers_pool(self, workers, **chain_kwargs):
+        """
+        Runs the splitting chain of the table's rows with a pool of workers.
+
+        The output windows (rows) cut from the same decompressed source
+        are fanned out across the workers.
+        Each row is processed by a light copy of the SplitGnss object
+        (see ``copy_mono``), with its own temporary subdirectories
+        (converted & rinexmoded).
+        The splitting itself is done by external programs (subprocesses,
+        bounded by the shared converter runner), thus threads are enough
+        to use several cores.
+
+        Once all the rows are processed, the one-row tables are merged back
+        in the main table following the original index order.
+
+        Parameters
+        ----------
+        workers : int
+            The number of rows processed concurrently.
+        **chain_kwargs
+            Keyword arguments passed to ``mono_split_chain``.
+
+        Returns
+        -------
+        None
+        """
+        logger.info("splitting with a pool of %i workers", workers)
 
-            fdecmptmp, _ = self.mono_decompress(irow)
-            self.tmp_decmp_files.append(fdecmptmp)
+        def _row_worker(irow):
+            stp_row = self.copy_mono(irow)
 
-            frnx_splited = self.mono_split(
-                irow, self.tmp_dir_converted, handle_software=handle_software
+            row_subdir = "row_" + str(irow)
+            stp_row.tmp_dir_converted = os.path.join(self.tmp_dir_converted, row_subdir)
+            stp_row.tmp_dir_rinexmoded = os.path.join(
+                self.tmp_dir_rinexmoded, row_subdir
             )
-            if not self.table.loc[irow, "ok_out"]:
-                logger.error("unable to split %s, skip", self.table.loc[irow])
+            for d in (stp_row.tmp_dir_converted, stp_row.tmp_dir_rinexmoded):
+                os.makedirs(d, exist_ok=True)
+
+            stp_row.mono_split_chain(irow, **chain_kwargs)
+            return stp_row
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures_dic = {
+                irow: executor.submit(_row_worker, irow) for irow in self.table.index
+            }
+
+        ### deterministic merge, following the table's index order
+        for irow, fut in futures_dic.items():
+            try:
+                stp_row = fut.result()
+            except Exception as e:
+                logger.error(
+                    "Error for the epoch: %s",
+                    arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
+                )
+                logger.exception("Exception raised: %s", e)
+                self.table.loc[irow, "ok_out"] = False
                 continue
 
-            self.tmp_rnx_files.append(frnx_splited)
+            self.merge_mono(irow, stp_row)
 
-            self.mono_rinexmod(
-                irow, self.tmp_dir_rinexmoded, rinexmod_options=rinexmod_options
-            )
+        return None
 
-            if self.tmp_dir_rinexmoded != self.out_dir:
-                self.mono_mv_final(irow, self.out_dir)
+    def mono_split_chain(self, irow, handle_software="converto", rinexmod_options=None):
+        """
+        "on row" method
 
-        self.remov_tmp_files()
+        Runs the full splitting chain for a row of the table:
+        split, rinexmod and final move.
+
+        Parameters
+        ----------
+        irow : int
+            The index of the row in the table.
+        handle_software : str, optional
+            The software to use for handling the RINEX files. Default is "converto".
+        rinexmod_options : dict, optional
+            Additional options for the RINEX modification. Default is None.
+
+        Returns
+        -------
+        None
+        """
+        if not self.mono_ok_check(
+            irow,
+            "split",
+            fname_custom=arocmn.iso_zulu_epoch(self.table.loc[irow, "epoch_srt"]),
+        ):
+            return None
+
+        # the sources are already decompressed (see split_core),
+        # nothing is done here except for a table modified meanwhile
+        fdecmptmp, _ = self.mono_decompress(irow)
+        self.tmp_decmp_files.append(fdecmptmp)
+
+        frnx_splited = self.mono_split(
+            irow, self.tmp_dir_converted, handle_software=handle_software
+        )
+        if not self.table.loc[irow, "ok_out"]:
+            logger.error("unable to split %s, skip", self.table.loc[irow])
+            return None
+
+        self.tmp_rnx_files.append(frnx_splited)
+
+        self.mono_rinexmod(
+            irow, self.tmp_dir_rinexmoded, rinexmod_options=rinexmod_options
+        )
+
+        if self.tmp_dir_rinexmoded != self.out_dir:
+            self.mono_mv_final(irow, self.out_dir)
 
         return None
 
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import timeit
+
+# Setup code
+setup_code = """
+import autorino.check as arochk
+
+p = "/home/psakicki/aaa_FOURBI/OVSM/2025/001/rinex/MLM000MTQ_R_20250010000_01D_30S_MO.crx.gz"
+"""
+
+# Time the full load with rinexMod
+time_full = timeit.timeit(
+    "arochk.rnx_file_stats(p, fast=False)", setup=setup_code, number=10
+)
+print(f"Time for rnx_file_stats (full load): {time_full} seconds")
+
+# Time the fast scan of the epoch lines
+time_fast = timeit.timeit(
+    "arochk.rnx_file_stats(p, fast=True)", setup=setup_code, number=10
+)
+print(f"Time for rnx_file_stats (fast scan): {time_fast} seconds")
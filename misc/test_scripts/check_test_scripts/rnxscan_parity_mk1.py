@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parity test of the fast scanner of the RINEX files (rnx_file_stats(fast=True))
+against the full load with rinexMod (rnx_file_stats(fast=False)).
+
+Synthetic RINEX 2.11/3.04/4.00 files are generated (plain, gzipped and
+Hatanaka-compressed), other RINEX files can be given as arguments:
+    python rnxscan_parity_mk1.py [rinex_file ...]
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+import autorino.check as arochk
+
+KEYS = ["site", "epoch_srt_data", "epoch_end_data", "nepochs", "itrvl", "td_str"]
+
+
+def head_line(content, label):
+    return "{:60}{:20}\n".format(content, label)
+
+
+def mk_rnx_v3(version, marker, epochs):
+    rnx = head_line(
+        "{:9.2f}           OBSERVATION DATA    M".format(version),
+        "RINEX VERSION / TYPE",
+    )
+    rnx += head_line("autorino            IPGP                20240101 000000 UTC", "PGM / RUN BY / DATE")
+    rnx += head_line(marker, "MARKER NAME")
+    rnx += head_line("G    2 C1C L1C", "SYS / # / OBS TYPES")
+    rnx += head_line("{:10.3f}".format(30.0), "INTERVAL")
+    rnx += head_line("  2024     1     1     0     0    0.0000000     GPS", "TIME OF FIRST OBS")
+    rnx += head_line("", "END OF HEADER")
+    for epo, flag in epochs:
+        rnx += "> {:%Y %m %d %H %M} {:10.7f}  {:d}".format(epo, epo.second, flag)
+        if flag in (0, 1):
+            rnx += "  2\n"
+            rnx += "G01  20000000.000   105000000.000  \n"
+            rnx += "G02  21000000.000   110000000.000  \n"
+        else:
+            rnx += "  1\n"
+            rnx += head_line("event", "COMMENT")
+    return rnx
+
+
+def mk_rnx_v2(marker, epochs):
+    rnx = head_line("     2.11           OBSERVATION DATA    G (GPS)", "RINEX VERSION / TYPE")
+    rnx += head_line("autorino            IPGP                20240101 000000 UTC", "PGM / RUN BY / DATE")
+    rnx += head_line(marker, "MARKER NAME")
+    rnx += head_line("     2    C1    L1", "# / TYPES OF OBSERV")
+    rnx += head_line("{:10.3f}".format(30.0), "INTERVAL")
+    rnx += head_line("  2024     1     1     0     0    0.0000000     GPS", "TIME OF FIRST OBS")
+    rnx += head_line("", "END OF HEADER")
+    for epo, flag in epochs:
+        yy = epo.year % 100
+        rnx += " {:02d} {:2d} {:2d} {:2d} {:2d} {:10.7f}  {:d}".format(
+            yy, epo.month, epo.day, epo.hour, epo.minute, epo.second, flag
+        )
+        if flag in (0, 1):
+            rnx += "  2G01G02\n"
+            rnx += "  20000000.000   105000000.000  \n"
+            rnx += "  21000000.000   110000000.000  \n"
+        else:
+            rnx += "  1\n"
+            rnx += head_line("event", "COMMENT")
+    return rnx
+
+
+def mk_epochs():
+    # 30s sampling, a gap, a duplicated epoch and an event
+    epochs = list(pd.date_range("2024-01-01 00:00", "2024-01-01 00:59:30", freq="30s"))
+    epochs = [(e, 0) for e in epochs if not (10 <= e.minute < 15)]
+    epochs.insert(20, epochs[20])
+    epochs.insert(30, (epochs[30][0], 4))
+    return epochs
+
+
+def mk_test_files(dirout):
+    epochs = mk_epochs()
+    files = []
+    specs = [
+        ("ABCD0010.24o", mk_rnx_v2("ABCD", epochs)),
+        ("efgh0010.24o", mk_rnx_v2("XYZT", epochs)),
+        ("ABCD00FRA_R_20240010000_01H_30S_MO.rnx", mk_rnx_v3(3.04, "ABCD", epochs)),
+        ("IJKL00FRA_R_20240010000_01H_30S_MO.rnx", mk_rnx_v3(4.00, "IJKL", epochs)),
+        ("mnop001a.24o", mk_rnx_v3(3.04, "XYZT", epochs)),
+    ]
+    for fname, rnx in specs:
+        fpath = os.path.join(dirout, fname)
+        with open(fpath, "w") as f:
+            f.write(rnx)
+        files.append(fpath)
+
+        fpath_gz = os.path.join(dirout, "gz", fname + ".gz")
+        os.makedirs(os.path.dirname(fpath_gz), exist_ok=True)
+        with open(fpath, "rb") as fin, gzip.open(fpath_gz, "wb") as fout:
+            shutil.copyfileobj(fin, fout)
+        files.append(fpath_gz)
+
+    try:
+        import hatanaka
+
+        for fpath in list(files):
+            if fpath.endswith(".gz"):
+                continue
+            dircrx = os.path.join(dirout, "crx")
+            os.makedirs(dircrx, exist_ok=True)
+            fpath_tmp = os.path.join(dircrx, os.path.basename(fpath))
+            shutil.copy(fpath, fpath_tmp)
+            files.append(str(hatanaka.compress_on_disk(fpath_tmp, compression="gz")))
+            os.remove(fpath_tmp)
+    except ImportError:
+        print("hatanaka not installed, no Hatanaka-compressed test files")
+
+    return files
+
+
+def same(val_fast, val_full):
+    if pd.isna(val_fast) and pd.isna(val_full):
+        return True
+    return val_fast == val_full
+
+
+def parity(fpaths):
+    n_err = 0
+    for fpath in fpaths:
+        ds_fast = arochk.rnx_file_stats(fpath, fast=True)
+        ds_full = arochk.rnx_file_stats(fpath, fast=False)
+        if ds_fast is None or ds_full is None:
+            print("FAIL", fpath, "fast:", ds_fast, "full:", ds_full)
+            n_err += 1
+            continue
+        if ds_fast["method"] != "fast":
+            print("WARN", fpath, "fast scan failed, full load instead")
+        diffs = [
+            "{}: fast {} / full {}".format(k, ds_fast[k], ds_full[k])
+            for k in KEYS
+            if not same(ds_fast[k], ds_full[k])
+        ]
+        if diffs:
+            print("FAIL", fpath, "\n    " + "\n    ".join(diffs))
+            n_err += 1
+        else:
+            print("OK  ", fpath)
+    return n_err
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpaths = mk_test_files(tmpdir) + sys.argv[1:]
+        n_err = parity(fpaths)
+    print("{} file(s), {} difference(s)".format(len(fpaths), n_err))
+    sys.exit(1 if n_err else 0)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the vectorized StepGnss table operations
+vs. the legacy iterrows-based ones, on 10k and 100k rows tables.
+
+@author: psakic
+"""
+
+import os
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import autorino.common as arocmn
+from geodezyx import utils
+
+
+def legacy_check_local_files(stp, io="out"):
+    local_files_list = []
+    for irow, row in stp.table.iterrows():
+        loc_file_out = stp.mono_chk_local(irow, io=io)
+        if loc_file_out:
+            local_files_list.append(loc_file_out)
+    return local_files_list
+
+
+def legacy_get_vals_prev_tab(stp, df_prev_tab, col_ref="fpath_inp", get_cols=("site",)):
+    for col in get_cols:
+        if col in df_prev_tab.columns:
+            mask1 = stp.table[col_ref].isin(df_prev_tab[col_ref])
+            matched = stp.table.loc[mask1, col_ref]
+            for idx in matched.index:
+                mask2 = stp.table.at[idx, col_ref] == df_prev_tab[col_ref]
+                prev_value = df_prev_tab.loc[mask2, col].values[0]
+                stp.table.at[idx, col] = prev_value
+
+
+def legacy_filter_bad_keywords(stp, keywords_path_excl):
+    for irow, row in stp.table.iterrows():
+        if utils.patterns_in_string_checker(row["fname"], *keywords_path_excl):
+            stp.table.loc[irow, "ok_inp"] = False
+
+
+def make_step(tmp_dir, n_rows):
+    """
+    a StepGnss with n_rows, half of the files existing on disk
+    """
+    stp = arocmn.StepGnss(tmp_dir, tmp_dir, tmp_dir)
+    fpaths = [os.path.join(tmp_dir, "file_{:07d}.dat".format(i)) for i in range(n_rows)]
+    for f in fpaths[::2]:
+        with open(f, "w") as fobj:
+            fobj.write("x" * 10)
+
+    stp.table = pd.DataFrame(
+        {
+            "fname": [os.path.basename(f) for f in fpaths],
+            "site": "XXXX00XXX",
+            "ok_inp": True,
+            "ok_out": False,
+            "fpath_inp": fpaths,
+            "fpath_out": fpaths,
+            "size_inp": np.nan,
+            "size_out": np.nan,
+            "note": "",
+        }
+    )
+    return stp
+
+
+for n_rows in (10000, 100000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stp = make_step(tmp_dir, n_rows)
+        prv = stp.table.sample(frac=0.5, random_state=0).copy()
+        prv["site"] = "PREV00XXX"
+
+        bench_dic = {
+            "check_local_files": (
+                lambda: legacy_check_local_files(stp.copy()),
+                lambda: stp.copy().check_local_files(),
+            ),
+            "get_vals_prev_tab": (
+                lambda: legacy_get_vals_prev_tab(stp.copy(), prv),
+                lambda: stp.copy().get_vals_prev_tab(prv, get_cols=["site"]),
+            ),
+            "filter_bad_keywords": (
+                lambda: legacy_filter_bad_keywords(stp.copy(), ["_00001"]),
+                lambda: stp.copy().filter_bad_keywords(["_00001"]),
+            ),
+        }
+
+        for name, (fct_legacy, fct_vect) in bench_dic.items():
+            t_legacy = timeit.timeit(fct_legacy, number=1)
+            t_vect = timeit.timeit(fct_vect, number=1)
+            print(
+                f"{n_rows:7d} rows | {name:20s} | legacy: {t_legacy:8.3f} s"
+                f" | vectorized: {t_vect:8.3f} s | speed-up: x{t_legacy / t_vect:6.1f}"
+            )